@@ -0,0 +1,238 @@
+import atexit
+import datetime
+import json
+import os
+import queue
+import threading
+import time
+from bson import ObjectId
+from per_process import PerProcess
+
+
+OVERFLOW_POLICIES = ("block", "drop", "spill")
+
+
+class ActivityWriter:
+    """
+    Buffer activity events in a bounded in-process queue and write them to
+    MongoDB from a background thread in batches.
+
+    `flush` is called with a list of events and is expected to persist them
+    (e.g. with insert_many). A batch that fails is spilled and replayed
+    whole, so `flush` must be safe to repeat: give events a stable `_id`
+    and ignore duplicate-key errors. A batch is flushed once it reaches `batch_size`
+    events or its oldest event is `max_age` seconds old, whichever comes first.
+
+    When the queue is full the overflow policy decides what happens:
+      block - wait up to `block_timeout` seconds for room, then drop
+      drop  - drop the event immediately
+      spill - append the event to `spill_path` as a JSON line; spilled
+              events are replayed the next time the writer starts
+    """
+
+    def __init__(self, flush, max_queue=10000, batch_size=500, max_age=1.0,
+                 overflow="block", block_timeout=0.5, spill_path=None, logger=None):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {overflow}")
+        if overflow == "spill" and not spill_path:
+            raise ValueError("The spill overflow policy needs a spill_path")
+
+        self._flush = flush
+        self._max_queue = max_queue
+        self.batch_size = batch_size
+        self.max_age = max_age
+        self.overflow = overflow
+        self.block_timeout = block_timeout
+        self.spill_path = spill_path
+        self.logger = logger
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._spill_lock = threading.Lock()
+        # Threads do not survive fork, so every worker process starts its own
+        self._thread = PerProcess(self._start, reset=self._forget_parent)
+        self._stopping = threading.Event()
+
+        self._stats = {
+            "enqueued": 0,
+            "written": 0,
+            "dropped": 0,
+            "spilled": 0,
+            "failed": 0,
+            "flushes": 0,
+            "last_flush_ms": 0.0,
+            "max_flush_ms": 0.0,
+            "total_flush_ms": 0.0
+        }
+
+        atexit.register(self.drain)
+
+    def put(self, event):
+        """Queue an event for writing; never raises on a full queue"""
+        self._ensure_started()
+
+        try:
+            if self.overflow == "block":
+                self._queue.put(event, timeout=self.block_timeout)
+            else:
+                self._queue.put_nowait(event)
+            self._count("enqueued")
+        except queue.Full:
+            if self.overflow == "spill":
+                self._spill([event])
+            else:
+                self._count("dropped")
+
+    def discard(self, predicate):
+        """Remove queued events for which predicate(event) is true; returns how many"""
+        with self._queue.mutex:
+            kept = [event for event in self._queue.queue if not predicate(event)]
+            discarded = len(self._queue.queue) - len(kept)
+            self._queue.queue.clear()
+            self._queue.queue.extend(kept)
+            self._queue.unfinished_tasks -= discarded
+            self._queue.not_full.notify(discarded)
+        return discarded
+
+    def drain(self, timeout=10.0):
+        """Stop the background thread after flushing everything still queued"""
+        thread = self._thread.current()
+        if thread is None:
+            return
+
+        self._stopping.set()
+        thread.join(timeout)
+        if thread.is_alive() and self.logger:
+            self.logger.error("Activity writer did not drain before timeout")
+
+    def stats(self):
+        """Return counters for queue depth, throughput and flush latency"""
+        with self._lock:
+            stats = dict(self._stats)
+
+        flushes = stats.pop("flushes")
+        total_flush_ms = stats.pop("total_flush_ms")
+        stats["flushes"] = flushes
+        stats["avg_flush_ms"] = round(total_flush_ms / flushes, 3) if flushes else 0.0
+        stats["queue_depth"] = self._queue.qsize()
+        stats["queue_capacity"] = self._max_queue
+        stats["overflow"] = self.overflow
+        return stats
+
+    def _ensure_started(self):
+        self._thread.get()
+
+    def _start(self):
+        thread = threading.Thread(target=self._run, name="activity-writer", daemon=True)
+        thread.start()
+        return thread
+
+    def _forget_parent(self):
+        # Anything queued in the parent belongs to the parent
+        self._queue = queue.Queue(maxsize=self._max_queue)
+        self._stopping = threading.Event()
+
+    def _run(self):
+        self._replay_spill()
+
+        batch = []
+        batch_started = None
+        while True:
+            timeout = self.max_age
+            if batch_started is not None:
+                timeout = max(0.0, batch_started + self.max_age - time.monotonic())
+
+            try:
+                event = self._queue.get(timeout=timeout)
+                if not batch:
+                    batch_started = time.monotonic()
+                batch.append(event)
+            except queue.Empty:
+                pass
+
+            if self._stopping.is_set():
+                # Shutting down: fill the batch from whatever is queued instead of waiting for more
+                while len(batch) < self.batch_size:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+
+            expired = batch_started is not None and time.monotonic() - batch_started >= self.max_age
+            if batch and (len(batch) >= self.batch_size or expired or self._stopping.is_set()):
+                self._write(batch)
+                batch = []
+                batch_started = None
+
+            if self._stopping.is_set() and self._queue.empty() and not batch:
+                return
+
+    def _write(self, batch):
+        started = time.perf_counter()
+        try:
+            self._flush(batch)
+            self._count("written", len(batch))
+        except Exception as e:
+            if self.logger:
+                self.logger.error(f"Failed to write activity batch: {str(e)}")
+            if self.spill_path:
+                self._spill(batch)
+            else:
+                self._count("failed", len(batch))
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            with self._lock:
+                self._stats["flushes"] += 1
+                self._stats["last_flush_ms"] = round(elapsed_ms, 3)
+                self._stats["max_flush_ms"] = max(self._stats["max_flush_ms"], round(elapsed_ms, 3))
+                self._stats["total_flush_ms"] += elapsed_ms
+
+    def _spill(self, events):
+        try:
+            with self._spill_lock, open(self.spill_path, "a", encoding="utf-8") as spill_file:
+                for event in events:
+                    spill_file.write(json.dumps(event, default=_encode_datetime) + "\n")
+            self._count("spilled", len(events))
+        except OSError as e:
+            if self.logger:
+                self.logger.error(f"Failed to spill activity events: {str(e)}")
+            self._count("dropped", len(events))
+
+    def _replay_spill(self):
+        if not self.spill_path or not os.path.exists(self.spill_path):
+            return
+
+        replay_path = f"{self.spill_path}.{os.getpid()}.replay"
+        try:
+            with self._spill_lock:
+                os.replace(self.spill_path, replay_path)
+            with open(replay_path, encoding="utf-8") as replay_file:
+                events = [json.loads(line, object_hook=_decode_datetime) for line in replay_file if line.strip()]
+        except (OSError, ValueError) as e:
+            if self.logger:
+                self.logger.error(f"Failed to read spilled activity events: {str(e)}")
+            return
+
+        for start in range(0, len(events), self.batch_size):
+            self._write(events[start:start + self.batch_size])
+        os.remove(replay_path)
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._stats[name] += amount
+
+
+def _encode_datetime(value):
+    if isinstance(value, datetime.datetime):
+        return {"$date": value.isoformat()}
+    if isinstance(value, ObjectId):
+        return {"$oid": str(value)}
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def _decode_datetime(value):
+    if set(value) == {"$date"}:
+        return datetime.datetime.fromisoformat(value["$date"])
+    if set(value) == {"$oid"}:
+        return ObjectId(value["$oid"])
+    return value
@@ -1,36 +1,79 @@
 import datetime
-from flask import Flask, request, session, jsonify, make_response
-from pymongo import MongoClient
+from flask import Flask, request, session, jsonify, make_response, Response
 from flask_cors import CORS
 import os
 from dotenv import load_dotenv
-from argon2 import PasswordHasher
-from bson import ObjectId, json_util
-import json
-from pymongo.errors import DuplicateKeyError
+from bson import ObjectId
+from pymongo.errors import DuplicateKeyError, BulkWriteError
 import base64
-from bson.json_util import dumps
-from collections import Counter
+import threading
+import click
+from streaks import record_active_days, current_streak, get_streak, rebuild_streaks
+from activity_writer import ActivityWriter
+from bson_json import BSONJSONProvider
+from pagination import parse_page_args, keyset_page
+from export import export_lines, gzip_chunks
+from video_catalog import VideoCatalog, bump_catalog_version
+from video_ranking import signal_increments, rebuild_signals, rank_videos
+from video_stats import stats_increments, build_video_analytics, prune_video_stats, rebuild_video_stats
+from counter_buffer import CounterBuffer
+from response_versions import bump_version, bump_versions, ConditionalResponses
+from cache import Cache, make_cache_backend
+from music_catalog import MusicCatalog
+from password_hashing import PasswordHashingService, PasswordServiceBusy
+from indexes import ensure_indexes, index_drift, collection_scans
+from schema import bootstrap_schema
+from mongo import MongoConnection, LazyDatabase, client_options_from_env
+from async_reads import dashboard_reads, recommendation_reads, mood_window_reads
+from query_executor import QueryExecutor, SubQuery, server_timing
+from batch import BatchContext, BatchResolvers
+from mood_analytics import (
+    ROW_SECTIONS, analytics_pipeline, analytics_rows_query, build_analytics_response, variability_level,
+    trend_from_halves
+)
+from mood_trend import MoodTrendCalculator, calculate_mood_trend
+from mood_rollups import (
+    record_mood, record_moods, rebuild_rollups, window_days, window_distribution, window_intensity, window_half_averages
+)
+
+load_dotenv()
 
 app = Flask(__name__)
-app.secret_key = os.getenv("SECRET_KEY", os.urandom(24))
+app.json = BSONJSONProvider(app)  # Encode ObjectId/datetime as Extended JSON in one pass
+# A random fallback key is per process and per start; wsgi.py requires SECRET_KEY in production
+app.secret_key = os.getenv("SECRET_KEY") or os.urandom(24)
 app.config["SESSION_COOKIE_HTTPONLY"] = True
 app.config["SESSION_COOKIE_SECURE"] = False  # In production
 CORS(app, resources={r"/*": {"origins": "http://happify.kentcs.org:8805", "supports_credentials": True}})
 
 
-load_dotenv()
-connection = MongoClient(os.getenv("CONNECTION_STRING"))
-db = connection["appifydb"]
+# Nothing connects until the first query, so importing the app is instant and safe to fork
+mongo = MongoConnection(os.getenv("CONNECTION_STRING"), "appifydb", client_options_from_env())
+db = LazyDatabase(mongo)
+
+# Optional asyncio driver for the read-heavy endpoints, so their independent queries run concurrently
+async_mongo = None
+if os.getenv("ASYNC_MONGO", "false").lower() == "true":
+    from async_mongo import AsyncMongo
+    async_mongo = AsyncMongo(
+        os.getenv("CONNECTION_STRING"),
+        "appifydb",
+        client_options_from_env(),
+        timeout=float(os.getenv("ASYNC_MONGO_TIMEOUT", 30))
+    )
 users_collection = db["users"]
 journals_collection = db["journals"]
 moods_collection = db["moods"]  # Collection for mood tracking
 music_collection = db["music"]
 videos_collection = db["videos"]
 activity_collection = db["user_activity"]  # New collection for tracking user activity
-
-# Create unique index for username
-users_collection.create_index("username", unique=True)
+video_interactions_collection = db["video_interactions"]
+video_signals_collection = db["user_video_signals"]  # Per-user interaction vectors for recommendation ranking
+video_stats_collection = db["user_video_stats"]  # Per-user video analytics summary maintained by log_video_interaction
+catalog_versions_collection = db["catalog_versions"]  # Version stamps bumped when a catalog changes
+streaks_collection = db["user_streaks"]  # Per-user streak rollup maintained by record_activity
+mood_rollups_collection = db["mood_daily_rollups"]  # Per-user daily mood aggregates maintained by log_mood
+versions_collection = db["user_versions"]  # Per-user data versions behind the read endpoints' ETags
 
 # Define the mood intensity mapping
 MOOD_INTENSITY = {
@@ -59,18 +102,178 @@ MOOD_VIDEO_MAPPING = {
 # Default video categories if mood not recognized
 DEFAULT_CATEGORIES = ['wellbeing', 'mindfulness', 'self-care', 'positive']
 
+# Response and value cache: in-process LRU by default, shared across workers with CACHE_URL=redis://...
+cache = Cache(
+    make_cache_backend(
+        os.getenv("CACHE_URL", "memory://"),
+        max_entries=int(os.getenv("CACHE_MAX_ENTRIES", 10000)),
+        default_ttl=float(os.getenv("CACHE_DEFAULT_TTL", 60))
+    ),
+    logger=app.logger
+)
+POPULAR_VIDEOS_CACHE_TTL = float(os.getenv("POPULAR_VIDEOS_CACHE_TTL", 60))
+DASHBOARD_CACHE_TTL = float(os.getenv("DASHBOARD_CACHE_TTL", 60))
+
+# Cached per-user responses to drop when a data area changes
+CACHE_DEPENDENCIES = {
+    "moods": ("dashboard-stats",),
+    "journals": ("dashboard-stats",),
+    "activity": ("dashboard-stats",)
+}
+
+# 304 Not Modified for per-user reads whose data hasn't changed since the client's copy
+conditional = ConditionalResponses(versions_collection, logger=app.logger)
+
+# Argon2 runs on a bounded pool so a burst of logins can't stall the other endpoints
+password_service = PasswordHashingService(
+    time_cost=int(os.getenv("ARGON2_TIME_COST", 3)),
+    memory_cost=int(os.getenv("ARGON2_MEMORY_COST", 65536)),
+    parallelism=int(os.getenv("ARGON2_PARALLELISM", 4)),
+    workers=int(os.getenv("PASSWORD_HASH_WORKERS", 2)),
+    max_pending=int(os.getenv("PASSWORD_HASH_QUEUE", 64)),
+    queue_timeout=float(os.getenv("PASSWORD_HASH_QUEUE_TIMEOUT", 10)),
+    logger=app.logger
+)
+
+# Reads /user/dashboard-stats runs side by side (see user_sub_queries)
+DASHBOARD_SUB_QUERIES = ["journals", "streak", "last_activity", "mood_trend"]
+
+# Most sub-queries a single request submits to query_executor
+# (/api/home: the dashboard's reads, the latest mood and the video signals)
+SUB_QUERIES_PER_REQUEST = 6
+
+# Shared pool for the dashboard's independent sub-queries; a slow one only degrades its own field.
+# Sized so every request thread of the worker (GUNICORN_THREADS) can have all of its sub-queries running at once
+query_executor = QueryExecutor(
+    workers=int(os.getenv("QUERY_POOL_WORKERS", int(os.getenv("GUNICORN_THREADS", 4)) * SUB_QUERIES_PER_REQUEST)),
+    default_timeout=float(os.getenv("DASHBOARD_QUERY_TIMEOUT", 2.0)),
+    logger=app.logger
+)
+
+# Resolvers for POST /api/home, which loads a page's data in one round trip
+batch_resolvers = BatchResolvers(logger=app.logger)
+
+# Resources POST /api/home resolves when the body doesn't name any: what the dashboard shows on load
+HOME_RESOURCES = ["currentUser", "dashboardStats", "currentMood", "moodVideos"]
+
+# Largest number of moods accepted by POST /moods/batch
+MAX_MOOD_BATCH = 500
+
+# Serve whole lists to callers that don't send cursor/page_size until the frontend has migrated
+LEGACY_UNPAGINATED = os.getenv("PAGINATION_LEGACY_DEFAULT", "true").lower() == "true"
+
+# Daily watch-time buckets older than this are dropped by `flask prune-video-stats` and rebuild-video-stats
+VIDEO_STATS_RETENTION_DAYS = int(os.getenv("VIDEO_STATS_RETENTION_DAYS", 90))
+
+# Write-behind buffer for video counters and per-user video signals
+counter_buffer = CounterBuffer(
+    {
+        "videos": (videos_collection, "_id", False),
+        "user_video_signals": (video_signals_collection, "username", True),
+        "user_video_stats": (video_stats_collection, "username", True)
+    },
+    interval=float(os.getenv("COUNTER_FLUSH_INTERVAL", 2.0)),
+    persist_path=os.getenv("COUNTER_PERSIST_PATH", "pending_counters.jsonl"),
+    # Only the per-user collections upsert; skip users deleted since their deltas were buffered
+    live_keys=lambda name, usernames: existing_usernames(usernames),
+    logger=app.logger
+)
+
+# In-memory index of active videos used by the recommendation endpoints
+video_catalog = VideoCatalog(
+    videos_collection,
+    catalog_versions_collection,
+    check_interval=float(os.getenv("VIDEO_CATALOG_CHECK_INTERVAL", 30)),
+    max_age=float(os.getenv("VIDEO_CATALOG_MAX_AGE", 300)),
+    logger=app.logger
+)
+
+# Pre-serialized /music response, reloaded when the music catalog version changes
+music_catalog = MusicCatalog(
+    music_collection,
+    catalog_versions_collection,
+    app.json.dumps,
+    check_interval=float(os.getenv("MUSIC_CATALOG_CHECK_INTERVAL", 30)),
+    max_age=float(os.getenv("MUSIC_CATALOG_MAX_AGE", 3600)),
+    compress=os.getenv("MUSIC_CATALOG_GZIP", "true").lower() == "true",
+    logger=app.logger
+)
+MUSIC_MAX_AGE = int(os.getenv("MUSIC_MAX_AGE", 300))  # Seconds browsers may reuse /music without revalidating
+
+# Shared mood trend calculator, memoized per user and invalidated by log_mood
+mood_trends = MoodTrendCalculator(
+    moods_collection,
+    cache,
+    ttl=float(os.getenv("MOOD_TREND_CACHE_TTL", 60)),
+    mood_version=lambda username: conditional.versions(username, ("moods",))[0],
+    logger=app.logger
+)
+
 def get_auth_user():
     """Get the currently authenticated user from session"""
     return session.get('user')
 
+def existing_usernames(usernames):
+    """The given usernames that still have an account"""
+    return set(users_collection.distinct("username", {"username": {"$in": list(set(usernames))}}))
+
+# Helper function to persist a batch of queued activity events
+def write_activity_batch(events):
+    """Write queued activity events and fold them into the streak rollup"""
+    # Events queued before an account was deleted must not recreate its activity and streak
+    live = existing_usernames(event["username"] for event in events)
+    events = [event for event in events if event["username"] in live]
+    if not events:
+        return
+    try:
+        activity_collection.insert_many([dict(event) for event in events], ordered=False)
+    except BulkWriteError as e:
+        # A replayed batch whose insert already succeeded: the events carry their _id, so
+        # duplicates are the only error to expect and the streak fold is idempotent per day
+        if any(error.get("code") != 11000 for error in e.details.get("writeErrors", [])) \
+                or e.details.get("writeConcernErrors"):
+            raise
+    record_active_days(streaks_collection, events)
+    # The events are stored, so a failed bump must not make the writer retry the batch
+    usernames = {event["username"] for event in events}
+    try:
+        bump_versions(versions_collection, usernames, "activity")
+    except Exception as e:
+        app.logger.error(f"Failed to bump activity versions: {str(e)}")
+    for username in usernames:
+        for name in CACHE_DEPENDENCIES["activity"]:
+            cache.invalidate(name, username)
+
+activity_writer = ActivityWriter(
+    write_activity_batch,
+    max_queue=int(os.getenv("ACTIVITY_QUEUE_SIZE", 10000)),
+    batch_size=int(os.getenv("ACTIVITY_BATCH_SIZE", 500)),
+    max_age=float(os.getenv("ACTIVITY_FLUSH_INTERVAL", 1.0)),
+    overflow=os.getenv("ACTIVITY_OVERFLOW", "block"),
+    spill_path=os.getenv("ACTIVITY_SPILL_PATH", "activity_spill.jsonl"),
+    logger=app.logger
+)
+
 # Helper function to record user activity
+def mark_changed(username, *areas):
+    """Bump the user's data versions and drop cached responses built from them"""
+    try:
+        bump_version(versions_collection, username, *areas)
+    except Exception as e:
+        app.logger.error(f"Failed to bump data versions: {str(e)}")
+    for area in areas:
+        for name in CACHE_DEPENDENCIES.get(area, ()):
+            cache.invalidate(name, username)
+
 def record_activity(username, activity_type):
     """
     Record a user activity to track engagement
     activity_type: string - 'journal', 'mood', 'login', etc.
+    Events are queued and written in batches by activity_writer.
     """
     try:
-        activity_collection.insert_one({
+        activity_writer.put({
+            "_id": ObjectId(),  # Stable across retries, so a replayed batch is not inserted twice
             "username": username,
             "activity_type": activity_type,
             "timestamp": datetime.datetime.now()
@@ -86,58 +289,156 @@ def calculate_streak(username):
     Returns the number of consecutive days with activity
     """
     try:
-        today = datetime.datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-        
-        # Get all user activities
-        all_activities = list(activity_collection.find({
-            "username": username
-        }).sort("timestamp", -1))
-        
-        if not all_activities:
-            return 0
-            
-        # Group activities by day
-        activity_days = {}
-        for activity in all_activities:
-            day = activity['timestamp'].replace(hour=0, minute=0, second=0, microsecond=0)
-            activity_days[day] = True
-            
-        # Sort days in descending order
-        days = sorted(activity_days.keys(), reverse=True)
-        
-        # Check if user has activity today
-        if not days or (today - days[0]).days > 0:
-            # If no activity today, check if there was activity yesterday
-            yesterday = today - datetime.timedelta(days=1)
-            if not days or (yesterday - days[0]).days > 0:
-                # No activity yesterday either, streak is 0
-                return 0
-        
-        # Count consecutive days
-        streak = 1  # Start with 1 for the most recent day with activity
-        for i in range(len(days) - 1):
-            if (days[i] - days[i+1]).days == 1:
-                # Days are consecutive
-                streak += 1
-            else:
-                # Found a gap
-                break
-                
-        return streak
-        
+        return get_streak(streaks_collection, username)
     except Exception as e:
         app.logger.error(f"Failed to calculate streak: {str(e)}")
         return 0
 
+@app.cli.command("rebuild-streaks")
+@click.option("--username", default=None, help="Only rebuild the streak for this user")
+def rebuild_streaks_command(username):
+    """Rebuild the user_streaks collection from user_activity history"""
+    rebuilt = rebuild_streaks(activity_collection, streaks_collection, username)
+    click.echo(f"Rebuilt streaks for {rebuilt} user(s)")
+
+@app.cli.command("rebuild-mood-rollups")
+@click.option("--username", default=None, help="Only rebuild the rollups for this user")
+def rebuild_mood_rollups_command(username):
+    """Rebuild the mood_daily_rollups collection from the moods collection"""
+    rebuilt = rebuild_rollups(moods_collection, mood_rollups_collection, username)
+    click.echo(f"Rebuilt {rebuilt} daily mood rollup(s)")
+
+@app.cli.command("rebuild-video-signals")
+@click.option("--username", default=None, help="Only rebuild the vector for this user")
+def rebuild_video_signals_command(username):
+    """Rebuild per-user recommendation vectors from video_interactions history"""
+    rebuilt = rebuild_signals(video_interactions_collection, videos_collection, video_signals_collection, username)
+    click.echo(f"Rebuilt video signals for {rebuilt} user(s)")
+
+@app.cli.command("rebuild-video-stats")
+@click.option("--username", default=None, help="Only rebuild the summary for this user")
+def rebuild_video_stats_command(username):
+    """Rebuild per-user video analytics summaries from video_interactions history"""
+    rebuilt = rebuild_video_stats(
+        video_interactions_collection, videos_collection, video_stats_collection,
+        username, VIDEO_STATS_RETENTION_DAYS
+    )
+    click.echo(f"Rebuilt video stats for {rebuilt} user(s)")
+
+@app.cli.command("prune-video-stats")
+def prune_video_stats_command():
+    """Drop video analytics day buckets older than VIDEO_STATS_RETENTION_DAYS"""
+    pruned = prune_video_stats(video_stats_collection, VIDEO_STATS_RETENTION_DAYS)
+    click.echo(f"Pruned video stats for {pruned} user(s)")
+
+@app.cli.command("reload-music-catalog")
+def reload_music_catalog_command():
+    """Make every app process reload its pre-serialized music catalog"""
+    bump_catalog_version(catalog_versions_collection, "music")
+    click.echo("Music catalog version bumped")
+
+@app.cli.command("reload-video-catalog")
+def reload_video_catalog_command():
+    """Make every app process reload its in-memory video catalog"""
+    bump_catalog_version(catalog_versions_collection, "videos")
+    cache.invalidate("videos-popular")
+    click.echo("Video catalog version bumped")
+
+@app.cli.command("bootstrap-schema")
+def bootstrap_schema_command():
+    """Create missing collections and apply validators and indexes"""
+    errors = bootstrap_schema(db)
+    for schema_error in errors:
+        click.echo(f"Failed to bootstrap schema: {schema_error}", err=True)
+    if errors:
+        raise SystemExit(1)
+    click.echo("Schema is up to date")
+
+@app.cli.command("ensure-indexes")
+def ensure_indexes_command():
+    """Create any missing indexes"""
+    errors = ensure_indexes(db)
+    for index_error in errors:
+        click.echo(f"Failed to create index: {index_error}", err=True)
+    if errors:
+        raise SystemExit(1)
+    click.echo("Indexes are up to date")
+
+@app.cli.command("check-indexes")
+def check_indexes_command():
+    """Report index drift and registered queries that scan a whole collection"""
+    drift = index_drift(db)
+    for collection_name, report in drift.items():
+        for kind, names in report.items():
+            if names:
+                click.echo(f"{collection_name}: {kind} {', '.join(names)}")
+
+    scans = collection_scans(db)
+    for name in scans:
+        click.echo(f"COLLSCAN: {name}", err=True)
+
+    if scans:
+        raise SystemExit(1)
+    if not drift:
+        click.echo("Indexes match the declared set")
+
+def is_local_request():
+    """Operational endpoints are only served to requests from the same host"""
+    return request.remote_addr in ("127.0.0.1", "::1")
+
+@app.route('/ops/stats', methods=['GET'])
+def get_ops_stats():
+    """Get internal counters for background writers and in-memory indexes"""
+    if not is_local_request():
+        return jsonify({"error": "Forbidden"}), 403
+
+    return jsonify({
+        "activityWriter": activity_writer.stats(),
+        "counterBuffer": counter_buffer.stats(),
+        "videoCatalog": video_catalog.stats(),
+        "musicCatalog": music_catalog.stats(),
+        "passwordHashing": password_service.stats(),
+        "mongo": mongo.stats(),
+        "asyncMongo": async_mongo.stats() if async_mongo else None,
+        "subQueries": query_executor.stats(),
+        "cache": cache.stats()
+    }), 200
+
+@app.route('/ops/reload-music', methods=['POST'])
+def reload_music_catalog():
+    """Reload the music catalog here and signal the other processes to do the same"""
+    if not is_local_request():
+        return jsonify({"error": "Forbidden"}), 403
+    
+    try:
+        bump_catalog_version(catalog_versions_collection, "music")
+        music_catalog.refresh()
+        return jsonify(music_catalog.stats()), 200
+    except Exception as e:
+        app.logger.error(f"Failed to reload music catalog: {str(e)}")
+        return jsonify({"error": f"Failed to reload music catalog: {str(e)}"}), 500
+
 # Add endpoint to retrieve calming music
 @app.route('/music', methods=['GET'])
 def get_music():
     try:
-        music_list = list(music_collection.find({"genre": "calming"}))  # Filter by genre "calming"
-        music_list = json.loads(dumps(music_list))  # Convert MongoDB result to JSON format
-        return jsonify({"music": music_list}), 200
+        payload = music_catalog.payload()
     except Exception as e:
         return jsonify({"error": f"Failed to retrieve music: {str(e)}"}), 500
+    
+    # The same weak ETag covers the identity and gzip encodings
+    if request.if_none_match.contains_weak(payload.etag):
+        response = Response(status=304)
+    elif payload.gzipped is not None and request.accept_encodings["gzip"]:
+        response = Response(payload.gzipped, mimetype="application/json")
+        response.headers["Content-Encoding"] = "gzip"
+    else:
+        response = Response(payload.body, mimetype="application/json")
+    
+    response.set_etag(payload.etag, weak=True)
+    response.headers["Cache-Control"] = f"public, max-age={MUSIC_MAX_AGE}"
+    response.vary.add("Accept-Encoding")
+    return response
 
 
 @app.route('/api/current-user', methods=['GET'])
@@ -193,8 +494,7 @@ def insert_user():
             return jsonify({"error": "Username already exists"}), 409
 
         # Hash password
-        ph = PasswordHasher()
-        hashed_password = ph.hash(user_data['password'])
+        hashed_password = password_service.hash(user_data['password'])
 
         # Create user document
         new_user = {
@@ -212,6 +512,8 @@ def insert_user():
             "user_id": str(result.inserted_id)
         }), 201
 
+    except PasswordServiceBusy:
+        return jsonify({"error": "Server busy, please try again"}), 503, {"Retry-After": "1"}
     except Exception as e:
         app.logger.error(f"Registration error: {str(e)}")
         return jsonify({"error": "Internal server error"}), 500
@@ -234,11 +536,25 @@ def get_user():
         else:
             return jsonify({"error": "Invalid username"}), 401
         
-        ph = PasswordHasher()
-        if hashed_password and ph.verify(hashed_password, password):
+        try:
+            verified = bool(hashed_password) and password_service.verify(hashed_password, password)
+        except PasswordServiceBusy:
+            return jsonify({"error": "Server busy, please try again"}), 503, {"Retry-After": "1"}
+        
+        if verified:
             # if matches, return cookie with set-cookie header
             session['user'] = username
             
+            # Move hashes made with older Argon2 parameters to the current ones
+            if password_service.needs_rehash(hashed_password):
+                password_service.rehash_later(
+                    password,
+                    lambda new_hash: users_collection.update_one(
+                        {"username": username, "password": hashed_password},
+                        {"$set": {"password": new_hash}}
+                    )
+                )
+            
             # Record login activity
             record_activity(username, 'login')
             
@@ -270,6 +586,7 @@ def create_journal():
         journal_data = request.get_json()
         journal_data["username"] = session['user']
         journals_collection.insert_one(journal_data)
+        mark_changed(session['user'], "journals")
         
         # Record journal activity
         record_activity(session['user'], 'journal')
@@ -285,14 +602,21 @@ def read_journals():
         return jsonify({"message": "Not logged in"}), 403
     try:
         username = session['user']
-        user_journals = list(journals_collection.find({"username": username}))
-        user_journals = json.loads(json_util.dumps(user_journals))
+        page = parse_page_args(request.args, LEGACY_UNPAGINATED)
+        if page is None:
+            user_journals = journals_collection.find({"username": username})
+            return app.json.stream_list(user_journals), 200
 
-        return jsonify(user_journals), 200
+        # Journals carry no server-side timestamp, so pages are ordered by _id (creation order)
+        user_journals, next_cursor = keyset_page(journals_collection, {"username": username}, page, sort_field=None)
+        return jsonify({"items": user_journals, "next_cursor": next_cursor}), 200
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": f"Failed to read journal entries: {str(e)}"}), 500
 
 @app.route('/journal/count', methods=['GET'])
+@conditional.etag("journals")
 def journal_count():
     if 'user' not in session:
         return jsonify({"message": "Not logged in"}), 403
@@ -313,6 +637,7 @@ def update_journal():
         journalId = ObjectId(oid)
         journal_data.pop("_id")
         journals_collection.update_one({"_id": journalId}, {"$set": journal_data})
+        mark_changed(session['user'], "journals")
         
         # Record journal update activity
         record_activity(session['user'], 'journal_update')
@@ -336,6 +661,8 @@ def delete_journal():
         result = journals_collection.delete_one({"_id": ObjectId(oid)})
 
         if result.deleted_count == 1:
+            mark_changed(session['user'], "journals")
+            
             # Record journal deletion activity
             record_activity(session['user'], 'journal_delete')
             
@@ -347,6 +674,27 @@ def delete_journal():
 
 # =========== MOOD TRACKING API ENDPOINTS ===========
 
+# Helper function to normalize a mood entry before it is stored
+def prepare_mood(mood_data, username):
+    """
+    Add username, timestamp and intensity defaults to a mood entry in place
+    Raises ValueError if the timestamp string cannot be parsed
+    """
+    # Add username and timestamp if not provided
+    mood_data['username'] = username
+    if 'timestamp' not in mood_data:
+        mood_data['timestamp'] = datetime.datetime.now()
+    else:
+        # Ensure timestamp is a datetime object if it's a string
+        if isinstance(mood_data['timestamp'], str):
+            mood_data['timestamp'] = datetime.datetime.fromisoformat(mood_data['timestamp'].replace('Z', '+00:00'))
+    
+    # Add intensity value based on mood if not provided
+    if 'intensity' not in mood_data:
+        mood_data['intensity'] = MOOD_INTENSITY.get(mood_data['mood'], 0)
+    
+    return mood_data
+
 @app.route('/moods', methods=['POST', 'OPTIONS'])
 def log_mood():
     """Log a new mood for the current user with intensity value"""
@@ -370,22 +718,19 @@ def log_mood():
         # Print the received data for debugging
         print("Received mood data:", mood_data)
         
-        # Add username and timestamp if not provided
-        mood_data['username'] = session['user']
-        if 'timestamp' not in mood_data:
-            mood_data['timestamp'] = datetime.datetime.now()
-        else:
-            # Ensure timestamp is a datetime object if it's a string
-            if isinstance(mood_data['timestamp'], str):
-                mood_data['timestamp'] = datetime.datetime.fromisoformat(mood_data['timestamp'].replace('Z', '+00:00'))
-        
-        # Add intensity value based on mood if not provided
-        if 'intensity' not in mood_data:
-            mood_data['intensity'] = MOOD_INTENSITY.get(mood_data['mood'], 0)
+        prepare_mood(mood_data, session['user'])
         
         # Insert the mood entry
         result = moods_collection.insert_one(mood_data)
         
+        # Keep the daily rollup in step; `flask rebuild-mood-rollups` repairs any drift
+        try:
+            record_mood(mood_rollups_collection, mood_data)
+        except Exception as e:
+            app.logger.error(f"Failed to update mood rollup: {str(e)}")
+        mood_trends.invalidate(session['user'])
+        mark_changed(session['user'], "moods")
+        
         # Record mood log activity
         record_activity(session['user'], 'mood_log')
         
@@ -398,6 +743,71 @@ def log_mood():
         app.logger.error(f"Failed to log mood: {str(e)}")
         return jsonify({"error": f"Failed to log mood: {str(e)}"}), 500
     
+@app.route('/moods/batch', methods=['POST'])
+def log_moods_batch():
+    """Log many moods for the current user in one request"""
+    if 'user' not in session:
+        return jsonify({"error": "Not logged in"}), 403
+    
+    try:
+        username = session['user']
+        batch = request.get_json()
+        if isinstance(batch, dict):
+            batch = batch.get('moods')
+        if not isinstance(batch, list) or not batch:
+            return jsonify({"error": "Expected a non-empty list of moods"}), 400
+        if len(batch) > MAX_MOOD_BATCH:
+            return jsonify({"error": f"A batch can hold at most {MAX_MOOD_BATCH} moods"}), 400
+        
+        # Validate every entry first so one bad item doesn't sink the rest
+        results = [None] * len(batch)
+        valid = []
+        for index, mood_data in enumerate(batch):
+            if not isinstance(mood_data, dict) or not isinstance(mood_data.get('mood'), str):
+                results[index] = {"index": index, "status": "error", "error": "Invalid mood data"}
+                continue
+            if not isinstance(mood_data.get('timestamp', ''), str):
+                results[index] = {"index": index, "status": "error", "error": "Invalid timestamp: expected an ISO 8601 string"}
+                continue
+            try:
+                valid.append((index, prepare_mood(mood_data, username)))
+            except ValueError as e:
+                results[index] = {"index": index, "status": "error", "error": f"Invalid timestamp: {str(e)}"}
+        
+        if not valid:
+            return jsonify({"results": results, "created": 0}), 400
+        
+        # One round trip for all valid moods; failed writes are reported per item
+        failed = {}
+        try:
+            moods_collection.insert_many([mood for _, mood in valid], ordered=False)
+        except BulkWriteError as e:
+            failed = {error['index']: error.get('errmsg', 'Write failed') for error in e.details.get('writeErrors', [])}
+        
+        stored = []
+        for position, (index, mood) in enumerate(valid):
+            if position in failed:
+                results[index] = {"index": index, "status": "error", "error": failed[position]}
+            else:
+                results[index] = {"index": index, "status": "created", "mood_id": str(mood['_id'])}
+                stored.append(mood)
+        
+        if stored:
+            try:
+                record_moods(mood_rollups_collection, stored)
+            except Exception as e:
+                app.logger.error(f"Failed to update mood rollups: {str(e)}")
+            mood_trends.invalidate(username)
+            mark_changed(username, "moods")
+            record_activity(username, 'mood_log')
+        
+        status = 201 if len(stored) == len(batch) else 207
+        return jsonify({"results": results, "created": len(stored)}), status
+    
+    except Exception as e:
+        app.logger.error(f"Failed to log mood batch: {str(e)}")
+        return jsonify({"error": f"Failed to log mood batch: {str(e)}"}), 500
+
 @app.route('/moods/trend', methods=['GET'])
 def get_mood_trend():
     """Calculate and return the user's mood trend"""
@@ -407,73 +817,13 @@ def get_mood_trend():
     try:
         username = session['user']
         
-        # Get the past 7 days of moods
-        seven_days_ago = datetime.datetime.now() - datetime.timedelta(days=7)
-        
-        recent_moods = list(moods_collection.find({
-            "username": username,
-            "timestamp": {"$gte": seven_days_ago}
-        }).sort("timestamp", -1))
-        
-        # Default response if no moods are found
-        if not recent_moods:
-            return jsonify({
-                "trend": "neutral",
-                "description": "No recent mood data"
-            }), 200
-        
-        # Extract the mood values
-        mood_values = [mood.get('mood') for mood in recent_moods]
-        
-        # Calculate the most common mood
-        most_common_mood = Counter(mood_values).most_common(1)[0][0]
-        
-        # Check if there's a trend (improving or declining)
-        if len(mood_values) >= 3:
-            # Simple algorithm to determine trend
-            # Define mood ranks from negative to positive
-            mood_ranks = {
-                'sad': -2,
-                'tired': -1,
-                'neutral': 0,
-                'energetic': 1,
-                'happy': 2
-            }
-            
-            # Get the ranks of the last 3 moods
-            recent_ranks = [mood_ranks.get(mood, 0) for mood in mood_values[:3]]
-            
-            # Check if consistently improving
-            if recent_ranks[0] > recent_ranks[1] > recent_ranks[2]:
-                trend = "improving"
-                description = "Your mood is improving"
-            # Check if consistently declining
-            elif recent_ranks[0] < recent_ranks[1] < recent_ranks[2]:
-                trend = "sad"  # Using "sad" as the trend identifier for declining
-                description = "Your mood is declining"
-            # Check if fluctuating significantly
-            elif max(recent_ranks) - min(recent_ranks) >= 3:
-                trend = "fluctuating"
-                description = "Your mood has been fluctuating"
-            else:
-                # Default to the most common mood
-                trend = most_common_mood
-                description = f"Your mood has been mostly {most_common_mood}"
-        else:
-            trend = most_common_mood
-            description = f"Your recent mood: {most_common_mood}"
-        
-        return jsonify({
-            "trend": trend,
-            "description": description,
-            "mostCommonMood": most_common_mood,
-            "recentMoods": mood_values[:5]  # Include the 5 most recent moods
-        }), 200
+        return jsonify(mood_trends.get(username)), 200
     
     except Exception as e:
         app.logger.error(f"Failed to calculate mood trend: {str(e)}")
         return jsonify({"error": f"Failed to calculate mood trend: {str(e)}"}), 500
 @app.route('/moods/current', methods=['GET'])
+@conditional.etag("moods")
 def get_current_mood():
     """Get the user's current mood (alias for last mood)"""
     if 'user' not in session:
@@ -494,9 +844,6 @@ def get_current_mood():
                 "timestamp": None
             }), 200
         
-        # Convert to JSON
-        current_mood = json.loads(json_util.dumps(current_mood))
-        
         return jsonify(current_mood), 200
     
     except Exception as e:
@@ -504,6 +851,7 @@ def get_current_mood():
         return jsonify({"error": f"Failed to retrieve current mood: {str(e)}"}), 500
 
 @app.route('/moods/last', methods=['GET'])
+@conditional.etag("moods")
 def get_last_mood():
     """Get the user's most recent mood"""
     if 'user' not in session:
@@ -524,9 +872,6 @@ def get_last_mood():
                 "timestamp": None
             }), 200
         
-        # Convert to JSON
-        last_mood = json.loads(json_util.dumps(last_mood))
-        
         return jsonify(last_mood), 200
     
     except Exception as e:
@@ -536,6 +881,7 @@ def get_last_mood():
 # =========== USER ACTIVITY & STREAK API ENDPOINTS ===========
 
 @app.route('/user/streak', methods=['GET'])
+@conditional.etag("activity", bucket_seconds=60)
 def get_user_streak():
     """Get the current user's streak (consecutive days of activity)"""
     if 'user' not in session:
@@ -554,7 +900,38 @@ def get_user_streak():
         app.logger.error(f"Failed to calculate streak: {str(e)}")
         return jsonify({"error": f"Failed to calculate streak: {str(e)}"}), 500
 
+def relative_time(activity_time):
+    """Human-readable time since an activity, e.g. 5 minutes ago"""
+    time_diff = datetime.datetime.now() - activity_time
+    
+    if time_diff.days > 0:
+        return f"{time_diff.days} days ago"
+    elif time_diff.seconds >= 3600:
+        hours = time_diff.seconds // 3600
+        return f"{hours} hour{'s' if hours > 1 else ''} ago"
+    elif time_diff.seconds >= 60:
+        minutes = time_diff.seconds // 60
+        return f"{minutes} minute{'s' if minutes > 1 else ''} ago"
+    return "just now"
+
+def last_activity_payload(last_activity):
+    """Response body of /user/last-activity for the latest activity document (or None)"""
+    if not last_activity:
+        return {
+            "lastActivity": None,
+            "relativeTime": "No activity yet",
+            "activityType": None
+        }
+    
+    activity_time = last_activity['timestamp']
+    return {
+        "lastActivity": activity_time,
+        "relativeTime": relative_time(activity_time),
+        "activityType": last_activity['activity_type']
+    }
+
 @app.route('/user/last-activity', methods=['GET'])
+@conditional.etag("activity", bucket_seconds=60)
 def get_last_activity():
     """Get the user's last activity time and type"""
     if 'user' not in session:
@@ -569,44 +946,52 @@ def get_last_activity():
             sort=[("timestamp", -1)]
         )
         
-        if not last_activity:
-            return jsonify({
-                "lastActivity": None,
-                "relativeTime": "No activity yet",
-                "activityType": None
-            }), 200
-        
-        # Format the timestamp for relative time display
-        now = datetime.datetime.now()
-        activity_time = last_activity['timestamp']
-        time_diff = now - activity_time
-        
-        # Create a human-readable relative time
-        if time_diff.days > 0:
-            relative_time = f"{time_diff.days} days ago"
-        elif time_diff.seconds >= 3600:
-            hours = time_diff.seconds // 3600
-            relative_time = f"{hours} hour{'s' if hours > 1 else ''} ago"
-        elif time_diff.seconds >= 60:
-            minutes = time_diff.seconds // 60
-            relative_time = f"{minutes} minute{'s' if minutes > 1 else ''} ago"
-        else:
-            relative_time = "just now"
-        
-        # Convert to JSON
-        activity_data = {
-            "lastActivity": json.loads(json_util.dumps(activity_time)),
-            "relativeTime": relative_time,
-            "activityType": last_activity['activity_type']
-        }
-        
-        return jsonify(activity_data), 200
+        return jsonify(last_activity_payload(last_activity)), 200
     
     except Exception as e:
         app.logger.error(f"Failed to retrieve last activity: {str(e)}")
         return jsonify({"error": f"Failed to retrieve last activity: {str(e)}"}), 500
 
+def dashboard_payload(journal_count, streak, last_activity, trend):
+    """Combine the dashboard's parts into the /user/dashboard-stats body"""
+    return {
+        "journalCount": journal_count,
+        "streak": streak,
+        "lastActivity": relative_time(last_activity['timestamp']) if last_activity else "No activity yet",
+        "moodTrend": {
+            "trend": trend["trend"],
+            "description": trend["description"]
+        }
+    }
+
+def user_sub_queries(username, names):
+    """The named per-user reads as QueryExecutor sub-queries, shared by the dashboard and /api/home"""
+    # Read here, in the request thread: the sub-queries run on pool threads without the request's g
+    mood_version = conditional.request_version(username, "moods")
+    sub_queries = {
+        "journals": SubQuery("journals", lambda: journals_collection.count_documents({'username': username})),
+        "streak": SubQuery("streak", lambda: calculate_streak(username)),
+        "last_activity": SubQuery("last_activity", lambda: activity_collection.find_one(
+            {"username": username},
+            sort=[("timestamp", -1)]
+        )),
+        "mood_trend": SubQuery(
+            "mood_trend", lambda: mood_trends.get(username, mood_version), fallback=calculate_mood_trend([])
+        ),
+        "latest_mood": SubQuery("latest_mood", lambda: moods_collection.find_one(
+            {"username": username},
+            sort=[("timestamp", -1)]
+        )),
+        "video_signals": SubQuery("video_signals", lambda: video_signals_collection.find_one(
+            {"username": username},
+            {"_id": 0}
+        ))
+    }
+    return [sub_queries[name] for name in names]
+
 @app.route('/user/dashboard-stats', methods=['GET'])
+@conditional.etag("journals", "activity", "moods", bucket_seconds=60)
+@cache.cached("dashboard-stats", DASHBOARD_CACHE_TTL, per_user=True)
 def get_dashboard_stats():
     """Get combined dashboard statistics for the current user"""
     if 'user' not in session:
@@ -615,88 +1000,45 @@ def get_dashboard_stats():
     try:
         username = session['user']
         
-        # Get journal count
-        journal_count = journals_collection.count_documents({'username': username})
-        
-        # Get streak
-        streak = calculate_streak(username)
-        
-        # Get last activity
-        last_activity = activity_collection.find_one(
-            {"username": username},
-            sort=[("timestamp", -1)]
-        )
-        
-        # Format relative time for last activity
-        relative_time = "No activity yet"
-        if last_activity:
-            now = datetime.datetime.now()
-            activity_time = last_activity['timestamp']
-            time_diff = now - activity_time
-            
-            if time_diff.days > 0:
-                relative_time = f"{time_diff.days} days ago"
-            elif time_diff.seconds >= 3600:
-                hours = time_diff.seconds // 3600
-                relative_time = f"{hours} hour{'s' if hours > 1 else ''} ago"
-            elif time_diff.seconds >= 60:
-                minutes = time_diff.seconds // 60
-                relative_time = f"{minutes} minute{'s' if minutes > 1 else ''} ago"
-            else:
-                relative_time = "just now"
-        
-        # Get mood trend
-        seven_days_ago = datetime.datetime.now() - datetime.timedelta(days=7)
-        recent_moods = list(moods_collection.find({
-            "username": username,
-            "timestamp": {"$gte": seven_days_ago}
-        }).sort("timestamp", -1))
-        
-        mood_trend = {
-            "trend": "neutral",
-            "description": "No recent mood data"
-        }
-        
-        if recent_moods:
-            mood_values = [mood.get('mood') for mood in recent_moods]
-            most_common_mood = Counter(mood_values).most_common(1)[0][0]
-            
-            if len(mood_values) >= 3:
-                mood_ranks = {
-                    'sad': -2,
-                    'tired': -1,
-                    'neutral': 0,
-                    'energetic': 1,
-                    'happy': 2
-                }
-                
-                recent_ranks = [mood_ranks.get(mood, 0) for mood in mood_values[:3]]
-                
-                if recent_ranks[0] > recent_ranks[1] > recent_ranks[2]:
-                    mood_trend["trend"] = "improving"
-                    mood_trend["description"] = "Your mood is improving"
-                elif recent_ranks[0] < recent_ranks[1] < recent_ranks[2]:
-                    mood_trend["trend"] = "sad"
-                    mood_trend["description"] = "Your mood is declining"
-                elif max(recent_ranks) - min(recent_ranks) >= 3:
-                    mood_trend["trend"] = "fluctuating"
-                    mood_trend["description"] = "Your mood has been fluctuating"
+        if async_mongo:
+            # Journal count, streak, last activity and trend moods in one concurrent round
+            stamp, trend = mood_trends.cached(username, conditional.request_version(username, "moods"))
+            results, timings = async_mongo.run(
+                dashboard_reads, username, trend is None, query_executor.default_timeout
+            )
+            for name, timing in timings.items():
+                if timing["status"] == "error":
+                    app.logger.error(f"Sub-query {name} failed: {timing.pop('error')}")
+            journal_count = results["journals"]
+            streak = current_streak(results["streak"])
+            last_activity = results["last_activity"]
+            if trend is None:
+                if timings["mood_trend"]["status"] == "ok":
+                    trend = mood_trends.remember(username, stamp, results["mood_trend"])
                 else:
-                    mood_trend["trend"] = most_common_mood
-                    mood_trend["description"] = f"Your mood has been mostly {most_common_mood}"
-            else:
-                mood_trend["trend"] = most_common_mood
-                mood_trend["description"] = f"Your recent mood: {most_common_mood}"
-        
-        # Combine all stats
-        dashboard_stats = {
-            "journalCount": journal_count,
-            "streak": streak,
-            "lastActivity": relative_time,
-            "moodTrend": mood_trend
-        }
-        
-        return jsonify(dashboard_stats), 200
+                    # Same fallback as the executor path, and never cached
+                    trend = calculate_mood_trend([])
+        else:
+            # Journal count, streak, last activity and mood trend side by side on the shared pool
+            results, timings = query_executor.run(user_sub_queries(username, DASHBOARD_SUB_QUERIES))
+            journal_count = results["journals"]
+            streak = results["streak"]
+            last_activity = results["last_activity"]
+            trend = results["mood_trend"]
+        
+        dashboard_stats = dashboard_payload(journal_count, streak, last_activity, trend)
+        
+        # Sub-queries that failed or timed out fell back; tell the client which
+        partial = [name for name, timing in timings.items() if timing["status"] != "ok"]
+        if partial:
+            dashboard_stats["partial"] = partial
+        
+        response = make_response(jsonify(dashboard_stats), 200)
+        response.headers["Server-Timing"] = server_timing(timings)
+        if partial:
+            # Keep the fallback values out of the response cache and ETag revalidation
+            response.headers["Cache-Control"] = "no-store"
+        return response
     
     except Exception as e:
         app.logger.error(f"Failed to retrieve dashboard stats: {str(e)}")
@@ -704,6 +1046,35 @@ def get_dashboard_stats():
 
 # =========== VIDEO RECOMMENDATIONS API ENDPOINTS ===========
 
+def format_video(video):
+    """Catalog video as returned by the recommendation endpoints"""
+    return {
+        'id': str(video['_id']),
+        'title': video['title'],
+        'description': video['description'],
+        'youtube_id': video['youtube_id'],  # YouTube video ID for embedding
+        'thumbnail': video['thumbnail'],
+        'duration': video['duration'],
+        'categories': video['categories']
+    }
+
+def recommendations_payload(mood, signals):
+    """Rank the catalog for a mood and a user's interaction vector; the /videos/recommendations body"""
+    # Get recommended categories based on mood
+    categories = MOOD_VIDEO_MAPPING.get(mood, DEFAULT_CATEGORIES)
+    
+    # Rank every active video matching the categories or mood tags for this user
+    videos = rank_videos(video_catalog.recommend(mood, categories), mood, categories, signals, 6)
+    
+    # If no videos found for specific categories, get default recommendations
+    if len(videos) == 0:
+        videos = video_catalog.recommend(None, DEFAULT_CATEGORIES, 6)
+    
+    return {
+        'videos': [format_video(video) for video in videos],
+        'mood': mood
+    }
+
 @app.route('/videos/recommendations', methods=['GET'])
 def get_video_recommendations():
     """Get video recommendations based on user's mood"""
@@ -715,53 +1086,25 @@ def get_video_recommendations():
         
         # Get mood parameter from query or use the user's latest mood
         mood = request.args.get('mood')
+        if async_mongo:
+            # Latest mood and interaction vector in one concurrent round
+            latest_mood, signals = async_mongo.run(recommendation_reads, username, not mood)
+        else:
+            latest_mood = None
+            if not mood:
+                # Get the user's latest mood
+                latest_mood = moods_collection.find_one(
+                    {"username": username},
+                    sort=[("timestamp", -1)]
+                )
+            signals = video_signals_collection.find_one({"username": username}, {"_id": 0})
         if not mood:
-            # Get the user's latest mood
-            latest_mood = moods_collection.find_one(
-                {"username": username},
-                sort=[("timestamp", -1)]
-            )
             mood = latest_mood.get('mood', 'neutral') if latest_mood else 'neutral'
         
-        # Get recommended categories based on mood
-        categories = MOOD_VIDEO_MAPPING.get(mood, DEFAULT_CATEGORIES)
-        
-        # Query videos matching the categories or mood tags
-        videos = list(videos_collection.find({
-            '$or': [
-                {'categories': {'$in': categories}},
-                {'mood_tags': {'$in': [mood]}}
-            ],
-            'active': True  # Only include active videos
-        }).sort('rating', -1).limit(6))  # Get top 6 by rating
-        
-        # If no videos found for specific categories, get default recommendations
-        if len(videos) == 0:
-            videos = list(videos_collection.find({
-                'categories': {'$in': DEFAULT_CATEGORIES},
-                'active': True
-            }).limit(6))
-        
-        # Format the videos for response
-        formatted_videos = []
-        for video in videos:
-            formatted_videos.append({
-                'id': str(video['_id']),
-                'title': video['title'],
-                'description': video['description'],
-                'youtube_id': video['youtube_id'],  # YouTube video ID for embedding
-                'thumbnail': video['thumbnail'],
-                'duration': video['duration'],
-                'categories': video['categories']
-            })
-        
         # Log this recommendation for analytics
         record_activity(username, 'video_recommendation')
         
-        return jsonify({
-            'videos': formatted_videos,
-            'mood': mood
-        }), 200
+        return jsonify(recommendations_payload(mood, signals)), 200
     
     except Exception as e:
         app.logger.error(f"Error getting video recommendations: {str(e)}")
@@ -780,7 +1123,7 @@ def log_video_interaction():
         if not data or 'videoId' not in data or 'interactionType' not in data:
             return jsonify({'error': 'Missing required fields'}), 400
         
-        # Add to a new video_interactions collection
+        # Add to the video_interactions collection
         interaction = {
             'username': username,
             'video_id': ObjectId(data['videoId']),
@@ -790,13 +1133,28 @@ def log_video_interaction():
             'device': data.get('device', request.user_agent.string)
         }
         
-        # Create the collection if it doesn't exist
-        if 'video_interactions' not in db.list_collection_names():
-            db.create_collection('video_interactions')
-            
-        db.video_interactions.insert_one(interaction)
+        video_interactions_collection.insert_one(interaction)
         
-        # Update video stats
+        # Keep the user's interaction vector current for recommendation ranking
+        video = video_catalog.get(interaction['video_id'])
+        increments = signal_increments(
+            interaction['video_id'],
+            data['interactionType'],
+            video.get('categories', []) if video else []
+        )
+        if increments:
+            counter_buffer.add("user_video_signals", username, increments)
+        
+        # Fold the interaction into the user's analytics summary; inactive videos aren't in the catalog
+        if video is None:
+            video = videos_collection.find_one({"_id": interaction['video_id']}, {"categories": 1})
+        counter_buffer.add(
+            "user_video_stats",
+            username,
+            stats_increments(interaction, video.get('categories', []) if video else [])
+        )
+        
+        # Update video stats; the counters are written behind by counter_buffer
         if data['interactionType'] in ['view', 'complete', 'like']:
             update_fields = {}
             if data['interactionType'] == 'view':
@@ -806,10 +1164,7 @@ def log_video_interaction():
             elif data['interactionType'] == 'like':
                 update_fields['like_count'] = 1
                 
-            videos_collection.update_one(
-                {'_id': ObjectId(data['videoId'])},
-                {'$inc': update_fields}
-            )
+            counter_buffer.add("videos", interaction['video_id'], update_fields)
         
         # Record video interaction activity
         activity_type = f"video_{data['interactionType']}"
@@ -822,6 +1177,7 @@ def log_video_interaction():
         return jsonify({'error': 'Could not log video interaction'}), 500
 
 @app.route('/videos/popular', methods=['GET'])
+@cache.cached("videos-popular", POPULAR_VIDEOS_CACHE_TTL)
 def get_popular_videos():
     """Get popular videos across all categories"""
     if 'user' not in session:
@@ -831,10 +1187,8 @@ def get_popular_videos():
         # Get limit parameter
         limit = int(request.args.get('limit', 6))
         
-        # Query most popular videos based on view count
-        videos = list(videos_collection.find({
-            'active': True
-        }).sort('view_count', -1).limit(limit))
+        # Most popular videos based on view count
+        videos = video_catalog.popular(limit)
         
         # Format the videos for response
         formatted_videos = []
@@ -871,30 +1225,11 @@ def get_videos_by_mood(mood):
         # Get limit parameter
         limit = int(request.args.get('limit', 8))
         
-        # Query videos directly tagged with this mood
-        videos = list(videos_collection.find({
-            '$or': [
-                {'mood_tags': mood},
-                {'categories': {'$in': MOOD_VIDEO_MAPPING.get(mood, [])}}
-            ],
-            'active': True
-        }).sort('rating', -1).limit(limit))
-        
-        # Format the videos for response
-        formatted_videos = []
-        for video in videos:
-            formatted_videos.append({
-                'id': str(video['_id']),
-                'title': video['title'],
-                'description': video['description'],
-                'youtube_id': video['youtube_id'],
-                'thumbnail': video['thumbnail'],
-                'duration': video['duration'],
-                'categories': video['categories']
-            })
+        # Videos directly tagged with this mood or in its categories, by rating
+        videos = video_catalog.recommend(mood, MOOD_VIDEO_MAPPING.get(mood, []), limit)
         
         return jsonify({
-            'videos': formatted_videos,
+            'videos': [format_video(video) for video in videos],
             'mood': mood
         }), 200
     
@@ -902,6 +1237,121 @@ def get_videos_by_mood(mood):
         app.logger.error(f"Error getting videos by mood: {str(e)}")
         return jsonify({'error': 'Could not retrieve videos for this mood'}), 500
     
+# =========== BATCHED PAGE LOAD ===========
+# Each resolver returns the body of the endpoint it stands in for. The
+# per-user reads resolvers declare in `needs` are fetched once per batch,
+# side by side on query_executor, with the same sub-queries as
+# /user/dashboard-stats.
+
+def batch_mood(context):
+    # The requested mood, else the latest one, as the video resolvers pick it
+    latest_mood = context.value("latest_mood")
+    return context.params.get("mood") or (latest_mood.get('mood', 'neutral') if latest_mood else 'neutral')
+
+@batch_resolvers.register("currentUser")
+def resolve_current_user(context):
+    return {"username": context.username, "email": session.get('email')}
+
+@batch_resolvers.register("currentMood", needs=["latest_mood"])
+@batch_resolvers.register("lastMood", needs=["latest_mood"])
+def resolve_current_mood(context):
+    return context.value("latest_mood") or {"mood": "neutral", "timestamp": None}
+
+@batch_resolvers.register("journalCount", needs=["journals"])
+def resolve_journal_count(context):
+    return {"count": context.value("journals")}
+
+@batch_resolvers.register("streak", needs=["streak"])
+def resolve_streak(context):
+    return {"streak": context.value("streak"), "unit": "days"}
+
+@batch_resolvers.register("lastActivity", needs=["last_activity"])
+def resolve_last_activity(context):
+    return last_activity_payload(context.value("last_activity"))
+
+@batch_resolvers.register("moodTrend", needs=["mood_trend"])
+def resolve_mood_trend(context):
+    trend = context.value("mood_trend")
+    return {"trend": trend["trend"], "description": trend["description"]}
+
+@batch_resolvers.register("dashboardStats", needs=DASHBOARD_SUB_QUERIES)
+def resolve_dashboard_stats(context):
+    return dashboard_payload(
+        context.value("journals"),
+        context.value("streak"),
+        context.value("last_activity"),
+        context.value("mood_trend")
+    )
+
+@batch_resolvers.register("recommendations", needs=["latest_mood", "video_signals"])
+def resolve_recommendations(context):
+    mood = batch_mood(context)
+    record_activity(context.username, 'video_recommendation')
+    return recommendations_payload(mood, context.value("video_signals"))
+
+# Falls back to the recommendations, so it needs their reads too
+@batch_resolvers.register("moodVideos", needs=["latest_mood", "video_signals"])
+def resolve_mood_videos(context):
+    mood = batch_mood(context)
+    if mood not in MOOD_VIDEO_MAPPING:
+        # /videos/by-mood rejects it; the dashboard used to fall back to the recommendations then
+        return resolve_recommendations(context)
+    videos = video_catalog.recommend(mood, MOOD_VIDEO_MAPPING.get(mood, []), 8)
+    return {'videos': [format_video(video) for video in videos], 'mood': mood}
+
+@app.route('/api/home', methods=['POST'])
+def get_home():
+    """
+    Resolve several of the user's read endpoints in one request. The body
+    names them, e.g. {"resources": ["currentUser", "dashboardStats"], "mood": "happy"};
+    without a body the dashboard's page-load set is returned.
+    """
+    if 'user' not in session:
+        return jsonify({"error": "Not logged in"}), 403
+    
+    body = request.get_json(silent=True)
+    if body is None:
+        body = {}
+    if not isinstance(body, dict):
+        return jsonify({"error": "Request body must be a JSON object"}), 400
+    resources = body.get('resources') or HOME_RESOURCES
+    if not isinstance(resources, list) or not all(isinstance(name, str) for name in resources):
+        return jsonify({"error": "resources must be a list of names"}), 400
+    unknown = [name for name in resources if not batch_resolvers.has(name)]
+    if unknown:
+        return jsonify({
+            "error": f"Unknown resources: {', '.join(unknown)}",
+            "available": batch_resolvers.names()
+        }), 400
+    mood = body.get('mood')
+    if mood is not None and not isinstance(mood, str):
+        return jsonify({"error": "mood must be a string"}), 400
+    
+    try:
+        username = session['user']
+        
+        # The reads the resources need, side by side; a failed or slow one falls back like on the dashboard
+        results, timings = query_executor.run(user_sub_queries(username, batch_resolvers.needs(resources)))
+        context = BatchContext(username, results, {"mood": mood})
+        data, errors, resolver_timings = batch_resolvers.resolve(resources, context)
+        
+        home = {"data": data, "errors": errors}
+        # Reads that fell back, as in the dashboard's partial field
+        partial = [name for name, timing in timings.items() if timing["status"] != "ok"]
+        if partial:
+            home["partial"] = partial
+        
+        response = make_response(jsonify(home), 200)
+        timings.update({f"resolve-{name}": timing for name, timing in resolver_timings.items()})
+        response.headers["Server-Timing"] = server_timing(timings)
+        # The combined body mixes areas with different versions; revalidate the parts instead
+        response.headers["Cache-Control"] = "no-store"
+        return response
+    
+    except Exception as e:
+        app.logger.error(f"Failed to load home data: {str(e)}")
+        return jsonify({"error": f"Failed to load home data: {str(e)}"}), 500
+
 @app.route('/api/user/profile', methods=['GET'])
 def get_user_profile():
     """Get the current user's profile information"""
@@ -920,10 +1370,7 @@ def get_user_profile():
         if not user:
             return jsonify({"error": "User not found"}), 404
         
-        # Convert to JSON
-        user_data = json.loads(json_util.dumps(user))
-        
-        return jsonify(user_data), 200
+        return jsonify(user), 200
     
     except Exception as e:
         app.logger.error(f"Error retrieving user profile: {str(e)}")
@@ -989,14 +1436,11 @@ def change_password():
             return jsonify({"error": "User not found"}), 404
         
         # Verify current password
-        ph = PasswordHasher()
-        try:
-            ph.verify(user['password'], data['currentPassword'])
-        except:
+        if not password_service.verify(user['password'], data['currentPassword']):
             return jsonify({"error": "Current password is incorrect"}), 401
         
         # Hash new password
-        hashed_password = ph.hash(data['newPassword'])
+        hashed_password = password_service.hash(data['newPassword'])
         
         # Update password
         result = users_collection.update_one(
@@ -1014,6 +1458,8 @@ def change_password():
         
         return jsonify({"message": "Password changed successfully"}), 200
     
+    except PasswordServiceBusy:
+        return jsonify({"error": "Server busy, please try again"}), 503, {"Retry-After": "1"}
     except Exception as e:
         app.logger.error(f"Error changing password: {str(e)}")
         return jsonify({"error": f"Failed to change password: {str(e)}"}), 500
@@ -1027,17 +1473,22 @@ def delete_user_account():
     try:
         username = session['user']
         
+        # Delete the account first: from then on every worker's activity writer and counter
+        # buffer skip this user, so pending writes cannot recreate the data deleted below
+        users_collection.delete_one({"username": username})
+        activity_writer.discard(lambda event: event["username"] == username)
+        counter_buffer.discard(username)
+        
         # Delete user's data from collections
         journals_collection.delete_many({"username": username})
         moods_collection.delete_many({"username": username})
         activity_collection.delete_many({"username": username})
-        
-        # If video_interactions collection exists, delete from it too
-        if 'video_interactions' in db.list_collection_names():
-            db.video_interactions.delete_many({"username": username})
-        
-        # Finally delete the user
-        users_collection.delete_one({"username": username})
+        streaks_collection.delete_many({"username": username})
+        video_signals_collection.delete_many({"username": username})
+        video_stats_collection.delete_many({"username": username})
+        mood_rollups_collection.delete_many({"username": username})
+        versions_collection.delete_many({"username": username})
+        video_interactions_collection.delete_many({"username": username})
         
         # Clear session
         session.clear()
@@ -1048,6 +1499,41 @@ def delete_user_account():
         app.logger.error(f"Error deleting user account: {str(e)}")
         return jsonify({"error": f"Failed to delete account: {str(e)}"}), 500
 
+@app.route('/api/user/export', methods=['GET'])
+def export_user_data():
+    """Stream all of the user's data as newline-delimited JSON"""
+    if 'user' not in session:
+        return jsonify({"error": "Not logged in"}), 403
+    
+    username = session['user']
+    compress = request.args.get('gzip', 'false').lower() == 'true'
+    
+    # Oldest first, in the order of each collection's username index (see indexes.QUERY_SHAPES)
+    sources = [
+        ("journal", journals_collection, [("_id", 1)]),
+        ("mood", moods_collection, [("timestamp", 1), ("_id", 1)]),
+        ("activity", activity_collection, [("timestamp", 1), ("_id", 1)]),
+        ("video_interaction", video_interactions_collection, [("timestamp", 1)])
+    ]
+    
+    def generate():
+        try:
+            lines = export_lines(sources, username, lambda doc: app.json.dumps(doc, separators=(",", ":")))
+            yield from gzip_chunks(lines) if compress else lines
+        except Exception as e:
+            # Headers are already sent, so the export just ends early
+            app.logger.error(f"Error exporting user data: {str(e)}")
+    
+    filename = "happify-export.ndjson"
+    if compress:
+        response = Response(generate(), mimetype="application/gzip")
+        filename += ".gz"
+    else:
+        response = Response(generate(), mimetype="application/x-ndjson")
+    response.headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+    
+    return response
+
 @app.route('/api/user/activity-history', methods=['GET'])
 def get_user_activity_history():
     """Get the user's activity history"""
@@ -1057,19 +1543,23 @@ def get_user_activity_history():
     try:
         username = session['user']
         
-        # Get limit parameter (default 20)
-        limit = int(request.args.get('limit', 20))
-        
-        # Get activity history
-        activities = list(activity_collection.find(
-            {"username": username}
-        ).sort("timestamp", -1).limit(limit))
-        
-        # Convert to JSON
-        activities = json.loads(json_util.dumps(activities))
+        page = parse_page_args(request.args, LEGACY_UNPAGINATED)
+        if page is None:
+            # Get limit parameter (default 20)
+            limit = int(request.args.get('limit', 20))
+            
+            # Get activity history
+            activities = list(activity_collection.find(
+                {"username": username}
+            ).sort("timestamp", -1).limit(limit))
+            
+            return jsonify(activities), 200
         
-        return jsonify(activities), 200
+        activities, next_cursor = keyset_page(activity_collection, {"username": username}, page)
+        return jsonify({"items": activities, "next_cursor": next_cursor}), 200
     
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         app.logger.error(f"Error retrieving activity history: {str(e)}")
         return jsonify({"error": f"Failed to retrieve activity history: {str(e)}"}), 500
@@ -1086,44 +1576,41 @@ def get_watched_videos():
         # Get limit parameter (default 10)
         limit = int(request.args.get('limit', 10))
         
-        # Check if video_interactions collection exists
-        if 'video_interactions' not in db.list_collection_names():
-            return jsonify([]), 200
-        
-        # Get unique video IDs watched by the user
+        # Most recently watched distinct videos with their details, in one round trip
         pipeline = [
             {"$match": {"username": username, "interaction_type": "view"}},
             {"$sort": {"timestamp": -1}},
             {"$group": {
                 "_id": "$video_id",
-                "watchedAt": {"$first": "$timestamp"},
-                "videoId": {"$first": "$video_id"}
+                "watchedAt": {"$first": "$timestamp"}
             }},
-            {"$limit": limit}
+            {"$sort": {"watchedAt": -1}},
+            {"$limit": limit},
+            {"$lookup": {
+                "from": "videos",
+                "let": {"video_id": "$_id"},
+                "pipeline": [
+                    {"$match": {"$expr": {"$eq": ["$_id", "$$video_id"]}}},
+                    {"$project": {"title": 1, "description": 1, "thumbnail": 1, "youtube_id": 1}}
+                ],
+                "as": "video"
+            }},
+            # Videos that no longer exist drop out here
+            {"$unwind": "$video"},
+            {"$project": {
+                "_id": 0,
+                "id": {"$toString": "$video._id"},
+                "title": "$video.title",
+                "description": "$video.description",
+                "thumbnail": {"$ifNull": ["$video.thumbnail", ""]},
+                "youtube_id": {"$ifNull": ["$video.youtube_id", ""]},
+                "watchedAt": 1
+            }}
         ]
         
-        watched_video_ids = list(db.video_interactions.aggregate(pipeline))
-        
-        # Get video details for these IDs
-        watched_videos = []
+        watched_videos = list(video_interactions_collection.aggregate(pipeline))
         
-        for item in watched_video_ids:
-            video = videos_collection.find_one({"_id": item["videoId"]})
-            
-            if video:
-                watched_videos.append({
-                    "id": str(video["_id"]),
-                    "title": video["title"],
-                    "description": video["description"],
-                    "thumbnail": video.get("thumbnail", ""),
-                    "youtube_id": video.get("youtube_id", ""),
-                    "watchedAt": item["watchedAt"]
-                })
-        
-        # Convert to JSON
-        watched_videos_json = json.loads(json_util.dumps(watched_videos))
-        
-        return jsonify(watched_videos_json), 200
+        return jsonify(watched_videos), 200
     
     except Exception as e:
         app.logger.error(f"Error retrieving watched videos: {str(e)}")
@@ -1138,101 +1625,9 @@ def get_video_analytics():
     try:
         username = session['user']
         
-        # Check if video_interactions collection exists
-        if 'video_interactions' not in db.list_collection_names():
-            return jsonify({
-                "totalWatched": 0,
-                "completionRate": 0,
-                "watchTimeByDay": [],
-                "mostWatchedCategories": []
-            }), 200
-        
-        # Get total videos watched
-        total_watched = db.video_interactions.count_documents({
-            "username": username, 
-            "interaction_type": "view"
-        })
-        
-        # Get completed videos count
-        completed = db.video_interactions.count_documents({
-            "username": username, 
-            "interaction_type": "complete"
-        })
-        
-        # Calculate completion rate
-        completion_rate = (completed / total_watched * 100) if total_watched > 0 else 0
+        stats = video_stats_collection.find_one({"username": username}, {"_id": 0})
         
-        # Get watch time by day (last 7 days)
-        seven_days_ago = datetime.datetime.now() - datetime.timedelta(days=7)
-        
-        pipeline_by_day = [
-            {
-                "$match": {
-                    "username": username,
-                    "timestamp": {"$gte": seven_days_ago}
-                }
-            },
-            {
-                "$group": {
-                    "_id": {
-                        "year": {"$year": "$timestamp"},
-                        "month": {"$month": "$timestamp"},
-                        "day": {"$dayOfMonth": "$timestamp"}
-                    },
-                    "count": {"$sum": 1},
-                    "watchTime": {"$sum": "$watched_duration"}
-                }
-            },
-            {"$sort": {"_id.year": 1, "_id.month": 1, "_id.day": 1}}
-        ]
-        
-        watch_time_by_day = list(db.video_interactions.aggregate(pipeline_by_day))
-        
-        # Format for response
-        formatted_watch_time = []
-        for day in watch_time_by_day:
-            date_str = f"{day['_id']['year']}-{day['_id']['month']}-{day['_id']['day']}"
-            formatted_watch_time.append({
-                "date": date_str,
-                "count": day["count"],
-                "watchTime": day["watchTime"]
-            })
-        
-        # Get most watched categories
-        pipeline_categories = [
-            {"$match": {"username": username}},
-            {"$lookup": {
-                "from": "videos",
-                "localField": "video_id",
-                "foreignField": "_id",
-                "as": "video_info"
-            }},
-            {"$unwind": "$video_info"},
-            {"$unwind": "$video_info.categories"},
-            {"$group": {
-                "_id": "$video_info.categories",
-                "count": {"$sum": 1}
-            }},
-            {"$sort": {"count": -1}},
-            {"$limit": 5}
-        ]
-        
-        category_counts = list(db.video_interactions.aggregate(pipeline_categories))
-        
-        # Format for response
-        most_watched_categories = []
-        for category in category_counts:
-            most_watched_categories.append({
-                "category": category["_id"],
-                "count": category["count"]
-            })
-        
-        return jsonify({
-            "totalWatched": total_watched,
-            "completionRate": round(completion_rate, 1),
-            "watchTimeByDay": formatted_watch_time,
-            "mostWatchedCategories": most_watched_categories
-        }), 200
+        return jsonify(build_video_analytics(stats)), 200
     
     except Exception as e:
         app.logger.error(f"Error retrieving video analytics: {str(e)}")
@@ -1262,36 +1657,14 @@ def get_mood_distribution():
         else:  # 'all'
             start_date = datetime.datetime(2000, 1, 1)  # Far back in time
         
-        # Query moods within the date range
-        moods = list(moods_collection.find({
-            "username": username,
-            "timestamp": {"$gte": start_date}
-        }))
-        
-        # Count occurrences of each mood
-        mood_counts = {}
-        for mood in moods:
-            mood_type = mood.get('mood')
-            if mood_type in mood_counts:
-                mood_counts[mood_type] += 1
-            else:
-                mood_counts[mood_type] = 1
-        
-        # Format the results
-        distribution = []
-        for mood, count in mood_counts.items():
-            distribution.append({
-                "mood": mood,
-                "count": count
-            })
-        
-        # Sort by count (descending)
-        distribution.sort(key=lambda x: x["count"], reverse=True)
+        # Read per-day rollups instead of the raw moods
+        days = window_days(moods_collection, mood_rollups_collection, username, start_date)
+        distribution = window_distribution(days)
         
         return jsonify({
             "data": distribution,
             "time_range": time_range,
-            "total": len(moods)
+            "total": sum(day["count"] for day in days)
         }), 200
     
     except Exception as e:
@@ -1320,130 +1693,37 @@ def get_mood_analytics():
         else:  # 'all'
             start_date = datetime.datetime(2000, 1, 1)
         
-        # Get all moods in date range
-        moods = list(moods_collection.find({
-            "username": username,
-            "timestamp": {"$gte": start_date}
-        }).sort("timestamp", 1))  # Sort by timestamp ascending
-        
-        # Format moods for response with proper date handling
-        formatted_moods = []
-        for mood in moods:
-            # Format the timestamp for consistent use in frontend
-            timestamp = mood.get('timestamp')
-            if timestamp:
-                # Format: YYYY-MM-DD
-                date_str = timestamp.strftime('%Y-%m-%d')
-                # Format: HH:MM:SS
-                time_str = timestamp.strftime('%H:%M:%S')
-            else:
-                date_str = 'Unknown'
-                time_str = 'Unknown'
-            
-            formatted_moods.append({
-                "id": str(mood.get('_id')),
-                "mood": mood.get('mood'),
-                "intensity": mood.get('intensity'),
-                "note": mood.get('note', ''),
-                "date": date_str,
-                "time": time_str,
-                "timestamp": timestamp.isoformat() if timestamp else None
-            })
-        
-        # Calculate mood summary statistics
-        mood_counts = {}
-        total_intensity = 0
-        intensity_values = []
-        
-        for mood in formatted_moods:
-            mood_type = mood.get('mood')
-            intensity = mood.get('intensity', 0)
-            
-            # Update mood counts
-            if mood_type in mood_counts:
-                mood_counts[mood_type] += 1
-            else:
-                mood_counts[mood_type] = 1
-            
-            # Update intensity stats
-            total_intensity += intensity
-            intensity_values.append(intensity)
-        
-        # Calculate most common mood
-        most_common_mood = max(mood_counts.items(), key=lambda x: x[1])[0] if mood_counts else 'neutral'
+        # Row sections the client wants back; summary and distribution are always included
+        include = request.args.get('include', ','.join(ROW_SECTIONS)).split(',')
+        include_rows = any(section in include for section in ROW_SECTIONS)
         
-        # Calculate average intensity
-        avg_intensity = total_intensity / len(formatted_moods) if formatted_moods else 0
-        
-        # Calculate mood variability (standard deviation)
-        if len(intensity_values) > 1:
-            mean = sum(intensity_values) / len(intensity_values)
-            variance = sum((x - mean) ** 2 for x in intensity_values) / len(intensity_values)
-            std_dev = variance ** 0.5
-        else:
-            std_dev = 0
-        
-        # Determine variability level
-        if std_dev > 1.5:
-            variability = 'high'
-        elif std_dev > 0.7:
-            variability = 'medium'
+        if include_rows:
+            # Summary and distribution in one aggregation; the rows stream from an index-ordered cursor
+            facet_result = next(moods_collection.aggregate(analytics_pipeline(username, start_date)))
+            query, projection = analytics_rows_query(username, start_date)
+            rows = moods_collection.find(query, projection).sort("timestamp", 1)
+            response = build_analytics_response(facet_result, rows, include)
         else:
-            variability = 'low'
-        
-        # Determine mood trend (improving, worsening, or stable)
-        if len(formatted_moods) >= 3:
-            # Split moods into first and second half
-            half_point = len(formatted_moods) // 2
-            first_half = formatted_moods[:half_point]
-            second_half = formatted_moods[half_point:]
-            
-            # Calculate average intensity for each half
-            first_half_avg = sum(m.get('intensity', 0) for m in first_half) / len(first_half) if first_half else 0
-            second_half_avg = sum(m.get('intensity', 0) for m in second_half) / len(second_half) if second_half else 0
-            
-            # Determine trend
-            if second_half_avg - first_half_avg > 0.5:
-                trend = 'improving'
-            elif first_half_avg - second_half_avg > 0.5:
-                trend = 'worsening'
+            # Without rows everything can be answered from the daily rollups
+            if async_mongo:
+                days, (first_half_avg, second_half_avg) = async_mongo.run(mood_window_reads, username, start_date)
             else:
-                trend = 'stable'
-        else:
-            trend = 'stable'
-        
-        # Format mood distribution
-        distribution = []
-        for mood_type, count in mood_counts.items():
-            distribution.append({
-                "mood": mood_type,
-                "count": count
-            })
-        
-        # Sort by count (descending)
-        distribution.sort(key=lambda x: x["count"], reverse=True)
-        
-        # Create mood calendar data (grouped by date)
-        calendar_data = {}
-        for mood in formatted_moods:
-            date = mood.get('date')
-            if date not in calendar_data:
-                calendar_data[date] = []
-            calendar_data[date].append(mood)
-        
-        # Final response
-        response = {
-            "moods": formatted_moods,
-            "summary": {
-                "mostCommonMood": most_common_mood,
-                "averageIntensity": round(avg_intensity, 2),
-                "variability": variability,
-                "trend": trend,
-                "totalEntries": len(formatted_moods)
-            },
-            "distribution": distribution,
-            "calendar": [{"date": date, "entries": entries} for date, entries in calendar_data.items()]
-        }
+                days = window_days(moods_collection, mood_rollups_collection, username, start_date)
+                first_half_avg, second_half_avg = window_half_averages(moods_collection, username, start_date, days)
+            distribution = window_distribution(days)
+            total, avg_intensity, std_dev = window_intensity(days)
+            response = {
+                "moods": [],
+                "summary": {
+                    "mostCommonMood": distribution[0]["mood"] if distribution else 'neutral',
+                    "averageIntensity": round(avg_intensity, 2),
+                    "variability": variability_level(std_dev if total > 1 else 0),
+                    "trend": trend_from_halves(first_half_avg, second_half_avg),
+                    "totalEntries": total
+                },
+                "distribution": distribution,
+                "calendar": []
+            }
         
         return jsonify(response), 200
     
@@ -1481,17 +1761,47 @@ def get_moods():
             "timestamp": {"$gte": start_date}
         }
         
-        # Get all moods sorted by timestamp (newest first)
-        moods = list(moods_collection.find(query).sort("timestamp", -1))
+        page = parse_page_args(request.args, LEGACY_UNPAGINATED)
+        if page is None:
+            # Get all moods sorted by timestamp (newest first)
+            moods = moods_collection.find(query).sort("timestamp", -1)
+            return app.json.stream_list(moods), 200
         
-        # Convert MongoDB objects to JSON
-        moods_json = json.loads(json_util.dumps(moods))
-        
-        return jsonify(moods_json), 200
+        moods, next_cursor = keyset_page(moods_collection, query, page)
+        return jsonify({"items": moods, "next_cursor": next_cursor}), 200
     
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         app.logger.error(f"Failed to retrieve moods: {str(e)}")
         return jsonify({"error": f"Failed to retrieve moods: {str(e)}"}), 500
 
+_started = False
+_startup_lock = threading.Lock()
+
+def create_app():
+    """
+    Run the one-time startup work and return the app. Under gunicorn with
+    preload this runs in the master, which then forks; every worker opens
+    its own MongoDB connection on first use.
+    """
+    global _started
+    with _startup_lock:
+        if _started:
+            return app
+        
+        # Create every collection with its validator and indexes once, instead of checking per request
+        for schema_error in bootstrap_schema(db):
+            app.logger.error(f"Failed to bootstrap schema: {schema_error}")
+        
+        try:
+            video_catalog.refresh()
+        except Exception as e:
+            # The catalog loads on first use instead
+            app.logger.error(f"Failed to load video catalog: {str(e)}")
+        
+        _started = True
+    return app
+
 if __name__ == "__main__":
-    app.run(port=8000, debug=True)
\ No newline at end of file
+    create_app().run(port=8000, debug=True)
\ No newline at end of file
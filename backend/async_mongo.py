@@ -0,0 +1,76 @@
+import asyncio
+import concurrent.futures
+import threading
+import time
+from pymongo import AsyncMongoClient
+from per_process import PerProcess
+
+
+class AsyncMongo:
+    """
+    AsyncMongoClient running on a dedicated event loop thread.
+
+    Flask views stay synchronous: run() hands a coroutine to the loop and
+    waits for its result, so queries inside it that don't depend on each
+    other overlap with asyncio.gather and a request costs the slowest query
+    instead of the sum of them. The loop and client are created on first
+    use in each process, like MongoConnection.
+    """
+
+    def __init__(self, uri, database_name, client_options=None, timeout=30):
+        self.uri = uri
+        self.database_name = database_name
+        self.client_options = client_options or {}
+        self.timeout = timeout
+
+        # Neither the loop thread nor the client survive fork, so every worker process starts its own
+        self._started = PerProcess(self._start)
+        self._lock = threading.Lock()
+        self._stats = {"runs": 0, "failures": 0, "in_flight": 0, "total_ms": 0.0, "max_ms": 0.0}
+
+    def run(self, reader, *args):
+        """Run `await reader(database, *args)` on the event loop and return its result"""
+        loop, database = self._started.get()
+        started = time.perf_counter()
+        with self._lock:
+            self._stats["in_flight"] += 1
+
+        future = asyncio.run_coroutine_threadsafe(reader(database, *args), loop)
+        failed = False
+        try:
+            return future.result(self.timeout)
+        except concurrent.futures.TimeoutError:
+            failed = True
+            future.cancel()
+            raise
+        except Exception:
+            failed = True
+            raise
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            with self._lock:
+                self._stats["in_flight"] -= 1
+                self._stats["runs"] += 1
+                self._stats["failures"] += 1 if failed else 0
+                self._stats["total_ms"] += elapsed_ms
+                self._stats["max_ms"] = max(self._stats["max_ms"], elapsed_ms)
+
+    def stats(self):
+        """Run counts and latency of the coroutines handed to the loop"""
+        with self._lock:
+            stats = dict(self._stats)
+        total_ms = stats.pop("total_ms")
+        stats["avg_ms"] = round(total_ms / stats["runs"], 3) if stats["runs"] else 0.0
+        stats["max_ms"] = round(stats["max_ms"], 3)
+        stats["started"] = self._started.current() is not None
+        return stats
+
+    def _start(self):
+        loop = asyncio.new_event_loop()
+        threading.Thread(target=loop.run_forever, name="async-mongo", daemon=True).start()
+        client = asyncio.run_coroutine_threadsafe(self._create_client(), loop).result()
+        return loop, client[self.database_name]
+
+    async def _create_client(self):
+        # Created on the loop so the client binds to it
+        return AsyncMongoClient(self.uri, **self.client_options)
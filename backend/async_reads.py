@@ -0,0 +1,101 @@
+import asyncio
+import time
+from streaks import STREAK_PROJECTION
+from mood_trend import recent_moods_query
+from mood_rollups import (
+    ROLLUP_WINDOW_FIELDS, window_days_queries, partial_day, half_average_split, half_averages
+)
+
+
+# Coroutines for AsyncMongo.run(); each takes the async database first and
+# issues its independent reads together.
+
+
+async def guarded(name, awaitable, timeout, fallback, timings):
+    """
+    Await one read with its own timeout, like a QueryExecutor sub-query:
+    on timeout or error the fallback is returned, and timings[name] gets
+    {"ms": float, "status": "ok" | "timeout" | "error"} (plus "error" with
+    the message when it failed)
+    """
+    started = time.perf_counter()
+    timing = {"status": "ok"}
+    try:
+        value = await asyncio.wait_for(awaitable, timeout)
+    except asyncio.TimeoutError:
+        value = fallback
+        timing["status"] = "timeout"
+    except Exception as e:
+        value = fallback
+        timing["status"] = "error"
+        timing["error"] = str(e)
+    timing["ms"] = round((time.perf_counter() - started) * 1000, 3)
+    timings[name] = timing
+    return value
+
+
+async def dashboard_reads(db, username, read_moods, timeout):
+    """
+    Journal count, streak document, last activity and (if read_moods) the
+    mood values a trend is computed from, read concurrently. Returns
+    (results, timings) keyed like the dashboard's QueryExecutor sub-queries;
+    a read that fails or takes longer than `timeout` seconds is None.
+    """
+    async def mood_values():
+        query, projection = recent_moods_query(username)
+        moods = await db["moods"].find(query, projection).sort("timestamp", -1).to_list(None)
+        return [mood.get('mood') for mood in moods]
+
+    timings = {}
+    reads = {
+        "journals": db["journals"].count_documents({'username': username}),
+        "streak": db["user_streaks"].find_one({"username": username}, STREAK_PROJECTION),
+        "last_activity": db["user_activity"].find_one({"username": username}, sort=[("timestamp", -1)])
+    }
+    if read_moods:
+        reads["mood_trend"] = mood_values()
+
+    values = await asyncio.gather(*(
+        guarded(name, read, timeout, None, timings) for name, read in reads.items()
+    ))
+    return dict(zip(reads, values)), timings
+
+
+async def recommendation_reads(db, username, read_latest_mood):
+    """The user's latest mood (if read_latest_mood) and interaction vector, read concurrently"""
+    async def latest_mood():
+        if not read_latest_mood:
+            return None
+        return await db["moods"].find_one({"username": username}, sort=[("timestamp", -1)])
+
+    return await asyncio.gather(
+        latest_mood(),
+        db["user_video_signals"].find_one({"username": username}, {"_id": 0})
+    )
+
+
+async def mood_window_reads(db, username, start_date):
+    """
+    Async window_days() and window_half_averages(): the partial first day and
+    the rollups are read concurrently. Returns (days, (first_half_avg, second_half_avg)).
+    """
+    start_day, pipeline, rollup_filter = window_days_queries(username, start_date)
+
+    async def first_day():
+        if not pipeline:
+            return None
+        cursor = await db["moods"].aggregate(pipeline)
+        return partial_day(start_day, await cursor.to_list(None))
+
+    partial, rollups = await asyncio.gather(
+        first_day(),
+        db["mood_daily_rollups"].find(rollup_filter, ROLLUP_WINDOW_FIELDS).sort("date", 1).to_list(None)
+    )
+    days = ([partial] if partial else []) + rollups
+
+    plan, split_query = half_average_split(username, start_date, days)
+    split_entries = []
+    if split_query:
+        query, projection, limit = split_query
+        split_entries = await db["moods"].find(query, projection).sort("timestamp", 1).limit(limit).to_list(None)
+    return days, half_averages(plan, split_entries)
@@ -0,0 +1,73 @@
+import time
+
+
+class BatchContext:
+    """
+    State shared by the resolvers of one batch request.
+
+    `values` holds the per-user reads the batch prefetched (see
+    BatchResolvers.needs), so e.g. the latest mood document is read once
+    even when currentMood and the video resolvers all need it.
+    """
+
+    def __init__(self, username, values, params=None):
+        self.username = username
+        self.params = params or {}
+        self._values = values
+
+    def value(self, name):
+        """A prefetched read; resolvers may only ask for what they declared in `needs`"""
+        return self._values[name]
+
+
+class BatchResolvers:
+    """Registry of named sub-resources that one batch request can resolve together"""
+
+    def __init__(self, logger=None):
+        self.logger = logger
+        self._resolvers = {}
+        self._needs = {}
+
+    def register(self, name, needs=()):
+        """
+        Decorator registering `function(context)` as the resolver of `name`.
+        `needs` names the prefetched reads it takes from context.value().
+        """
+        def decorator(function):
+            self._resolvers[name] = function
+            self._needs[name] = list(needs)
+            return function
+        return decorator
+
+    def has(self, name):
+        return name in self._resolvers
+
+    def names(self):
+        return sorted(self._resolvers)
+
+    def needs(self, names):
+        """The reads the named resources need, each listed once"""
+        return list(dict.fromkeys(read for name in names for read in self._needs[name]))
+
+    def resolve(self, names, context):
+        """
+        Resolve the named resources in order and return (data, errors, timings).
+        A failing resolver only costs its own entry: its error message goes to
+        `errors` and the rest of the batch is still returned.
+        """
+        data = {}
+        errors = {}
+        timings = {}
+        for name in dict.fromkeys(names):
+            started = time.perf_counter()
+            try:
+                data[name] = self._resolvers[name](context)
+                status = "ok"
+            except Exception as e:
+                errors[name] = str(e)
+                status = "error"
+                if self.logger:
+                    self.logger.error(f"Batch resource {name} failed: {str(e)}")
+            timings[name] = {"ms": round((time.perf_counter() - started) * 1000, 3), "status": status}
+
+        return data, errors, timings
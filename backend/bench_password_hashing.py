@@ -0,0 +1,80 @@
+import argparse
+import statistics
+import threading
+import time
+from password_hashing import PasswordHashingService
+
+# Argon2 settings to compare, as time_cost:memory_cost(KiB):parallelism
+DEFAULT_SETTINGS = "1:19456:1,2:19456:1,3:65536:4,4:131072:4"
+
+
+def parse_settings(value):
+    settings = []
+    for item in value.split(","):
+        time_cost, memory_cost, parallelism = (int(part) for part in item.split(":"))
+        settings.append((time_cost, memory_cost, parallelism))
+    return settings
+
+
+def run_setting(time_cost, memory_cost, parallelism, logins, concurrency, workers):
+    """Verify `logins` passwords from `concurrency` caller threads; returns (logins/sec, latencies)"""
+    service = PasswordHashingService(
+        time_cost=time_cost,
+        memory_cost=memory_cost,
+        parallelism=parallelism,
+        workers=workers,
+        max_pending=max(concurrency, workers),
+        queue_timeout=60
+    )
+    password_hash = service.hash("benchmark-password")
+
+    latencies = []
+    latencies_lock = threading.Lock()
+    remaining = [logins]
+
+    def caller():
+        while True:
+            with latencies_lock:
+                if remaining[0] == 0:
+                    return
+                remaining[0] -= 1
+            started = time.perf_counter()
+            service.verify(password_hash, "benchmark-password")
+            elapsed = time.perf_counter() - started
+            with latencies_lock:
+                latencies.append(elapsed)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=caller) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    return logins / elapsed, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure login throughput for Argon2 cost settings")
+    parser.add_argument("--settings", default=DEFAULT_SETTINGS,
+                        help="comma separated time_cost:memory_cost:parallelism triples")
+    parser.add_argument("--logins", type=int, default=100, help="logins to verify per setting")
+    parser.add_argument("--concurrency", type=int, default=8, help="concurrent callers")
+    parser.add_argument("--workers", type=int, default=2, help="hashing pool size (PASSWORD_HASH_WORKERS)")
+    args = parser.parse_args()
+
+    print(f"{args.logins} logins, {args.concurrency} callers, {args.workers} hashing workers")
+    print(f"{'time':>4} {'memory KiB':>10} {'par':>3} {'logins/sec':>10} {'p50 ms':>8} {'p95 ms':>8}")
+    for time_cost, memory_cost, parallelism in parse_settings(args.settings):
+        rate, latencies = run_setting(
+            time_cost, memory_cost, parallelism, args.logins, args.concurrency, args.workers
+        )
+        latencies_ms = sorted(latency * 1000 for latency in latencies)
+        p50 = statistics.median(latencies_ms)
+        p95 = latencies_ms[min(len(latencies_ms) - 1, int(len(latencies_ms) * 0.95))]
+        print(f"{time_cost:>4} {memory_cost:>10} {parallelism:>3} {rate:>10.1f} {p50:>8.1f} {p95:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+import itertools
+from bson import json_util
+from flask.json.provider import DefaultJSONProvider
+
+
+class BSONJSONProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider that encodes BSON types (ObjectId, datetime, Decimal128,
+    ...) as MongoDB Extended JSON in the same pass that encodes the rest of
+    the response. The output matches json.loads(json_util.dumps(doc)) fed
+    back through jsonify(), e.g. {"_id": {"$oid": "..."}}.
+    """
+
+    @staticmethod
+    def default(o):
+        try:
+            return json_util.default(o)
+        except TypeError:
+            return DefaultJSONProvider.default(o)
+
+    def stream_list(self, items):
+        """
+        Return a streaming JSON array response for an iterable of documents
+        (e.g. a pymongo cursor) so the list is never held in memory at once.
+        The first document is fetched eagerly so query errors surface before
+        the response starts.
+        """
+        items = iter(items)
+        first = next(items, None)
+        if first is None:
+            return self.response([])
+
+        separators = (",", ":") if self._compact() else None
+
+        def generate():
+            yield "["
+            for index, item in enumerate(itertools.chain([first], items)):
+                if index:
+                    yield ","
+                yield self.dumps(item, separators=separators)
+            yield "]\n"
+
+        return self._app.response_class(generate(), mimetype=self.mimetype)
+
+    def _compact(self):
+        # Mirrors DefaultJSONProvider.response(): pretty output only in debug mode
+        return self.compact or (self.compact is None and not self._app.debug)
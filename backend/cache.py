@@ -0,0 +1,231 @@
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from bson import json_util
+from flask import Response, g, make_response, request, session
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+
+class LRUCache:
+    """
+    Bounded in-process cache. Entries expire after their TTL and the least
+    recently used entry is evicted once `max_entries` is reached. Each worker
+    process has its own copy, so invalidations only reach the process that
+    made them; the TTL bounds how stale the other workers can be.
+    """
+
+    def __init__(self, max_entries=10000, default_ttl=60):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+
+    def get(self, key, record=True):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= now:
+                del self._entries[key]
+                self._stats["expirations"] += 1
+                entry = None
+            if record:
+                self._stats["hits" if entry is not None else "misses"] += 1
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value, ttl=None):
+        expires = time.monotonic() + (ttl or self.default_ttl)
+        with self._lock:
+            self._entries[key] = (expires, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def incr(self, key, ttl=None):
+        # A counter that was evicted restarts from the clock, never from a value already handed out
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            value = entry[1] + 1 if entry and entry[0] > now else time.time_ns()
+            self._entries[key] = (now + (ttl or self.default_ttl), value)
+            self._entries.move_to_end(key)
+            return value
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+        stats["backend"] = "memory"
+        stats["max_entries"] = self.max_entries
+        return stats
+
+
+class RedisCache:
+    """
+    Cache shared by every worker through a Redis server (or anything that
+    speaks its protocol, such as fakeredis in tests). Values are stored as
+    Extended JSON, so anything jsonify can encode can be cached.
+    """
+
+    def __init__(self, client, prefix="appify:", default_ttl=60):
+        self.client = client
+        self.prefix = prefix
+        self.default_ttl = default_ttl
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0}
+
+    def get(self, key, record=True):
+        raw = self.client.get(self.prefix + key)
+        if record:
+            with self._lock:
+                self._stats["hits" if raw is not None else "misses"] += 1
+        return json_util.loads(raw) if raw is not None else None
+
+    def set(self, key, value, ttl=None):
+        self.client.set(self.prefix + key, json_util.dumps(value), ex=int(ttl or self.default_ttl))
+
+    def delete(self, key):
+        self.client.delete(self.prefix + key)
+
+    def incr(self, key, ttl=None):
+        # Seed a missing counter from the clock so it never repeats a value it had before expiring
+        full_key = self.prefix + key
+        pipeline = self.client.pipeline()
+        pipeline.set(full_key, time.time_ns(), nx=True, ex=int(ttl or self.default_ttl))
+        pipeline.incr(full_key)
+        pipeline.expire(full_key, int(ttl or self.default_ttl))
+        return pipeline.execute()[1]
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats["backend"] = "redis"
+        return stats
+
+
+def make_cache_backend(url, max_entries=10000, default_ttl=60):
+    """Build a cache backend from a URL: memory:// (default) or redis://host:port/db"""
+    if not url or url.startswith("memory://"):
+        return LRUCache(max_entries=max_entries, default_ttl=default_ttl)
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        if redis is None:
+            raise RuntimeError("CACHE_URL points at Redis but the redis package is not installed")
+        return RedisCache(redis.Redis.from_url(url), default_ttl=default_ttl)
+    raise ValueError(f"Unsupported cache URL: {url}")
+
+
+class Cache:
+    """
+    Named, invalidatable caches on top of a backend.
+
+    Every cache name (optionally scoped to a user) has a generation counter
+    that is part of each entry's key; invalidate() bumps the counter, so old
+    entries are never read again and simply age out of the backend.
+    Backend failures are logged and treated as misses.
+    """
+
+    # Generation counters must outlive every entry keyed on them
+    GENERATION_TTL = 7 * 24 * 3600
+
+    def __init__(self, backend, logger=None):
+        self.backend = backend
+        self.logger = logger
+
+    def generation(self, name, username=None):
+        """Current generation of a named cache, or None if the backend is unavailable"""
+        try:
+            return self.backend.get(self._generation_key(name, username), record=False) or 0
+        except Exception as e:
+            self._log_failure(e)
+            return None
+
+    def get(self, name, key, generation, username=None):
+        """Return a cached value of the given generation, or None on a miss"""
+        try:
+            return self.backend.get(self._key(name, key, generation, username))
+        except Exception as e:
+            self._log_failure(e)
+            return None
+
+    def set(self, name, key, value, ttl, generation, username=None):
+        """
+        Store a value under the generation read before it was computed, so a
+        concurrent invalidate() is never hidden by stale data.
+        """
+        try:
+            self.backend.set(self._key(name, key, generation, username), value, ttl)
+        except Exception as e:
+            self._log_failure(e)
+
+    def invalidate(self, name, username=None):
+        """Drop every entry of a named cache, for one user or globally"""
+        try:
+            self.backend.incr(self._generation_key(name, username), self.GENERATION_TTL)
+        except Exception as e:
+            self._log_failure(e)
+
+    def cached(self, name, ttl, per_user=False, public=False):
+        """
+        Decorate a GET view so successful responses are cached under `name`,
+        keyed by path and query string (and by the session user with per_user).
+        Unless `public`, requests without a logged in user bypass the cache so
+        the view can reject them. Inside ConditionalResponses.etag() the key
+        also carries the ETag, so other workers never serve data older than
+        the versions it was computed from.
+        """
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                if request.method != 'GET' or ('user' not in session and not public):
+                    return view(*args, **kwargs)
+                username = session['user'] if per_user else None
+
+                generation = self.generation(name, username)
+                if generation is None:
+                    return view(*args, **kwargs)
+
+                key = request.full_path + g.get("response_etag", "")
+                entry = self.get(name, key, generation, username)
+                if entry is not None:
+                    return Response(entry["body"], status=entry["status"], mimetype=entry["mimetype"])
+
+                response = make_response(view(*args, **kwargs))
+                if response.status_code == 200 and not response.is_streamed and not response.cache_control.no_store:
+                    self.set(name, key, {
+                        "status": response.status_code,
+                        "mimetype": response.mimetype,
+                        "body": response.get_data(as_text=True)
+                    }, ttl, generation, username)
+                return response
+            return wrapper
+        return decorator
+
+    def stats(self):
+        """Hit/miss counters of the backend"""
+        try:
+            return self.backend.stats()
+        except Exception as e:
+            return {"error": str(e)}
+
+    def _key(self, name, key, generation, username):
+        return f"{name}:{username or ''}:{generation}:{key}"
+
+    def _generation_key(self, name, username):
+        return f"generation:{name}:{username or ''}"
+
+    def _log_failure(self, error):
+        if self.logger:
+            self.logger.error(f"Cache backend error: {str(error)}")
@@ -0,0 +1,227 @@
+import atexit
+import os
+import threading
+import time
+from bson import json_util
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from per_process import PerProcess
+
+
+class CounterBuffer:
+    """
+    Accumulate $inc deltas in memory and write them behind the request path.
+
+    Deltas for the same document are merged, so a burst of events on a hot
+    document becomes one update per flush. A background thread flushes all
+    pending deltas every `interval` seconds with one unordered bulk_write per
+    collection. On shutdown pending deltas are flushed; if that fails they
+    are saved to `persist_path` and loaded again the next time the buffer
+    starts.
+
+    Upserts would recreate documents whose owner has been deleted, so for
+    upserting collections `live_keys(name, keys)` (when given) returns the
+    keys that may still be written; deltas for the other keys are dropped.
+    """
+
+    def __init__(self, collections, interval=2.0, persist_path=None, live_keys=None, logger=None):
+        # name -> (collection, key field, upsert)
+        self._collections = collections
+        self.live_keys = live_keys
+        self.interval = interval
+        self.persist_path = persist_path
+        self.logger = logger
+
+        self._pending = {}
+        self._oldest_pending = None
+        self._lock = threading.Lock()
+        # Threads do not survive fork, so every worker process starts its own
+        self._thread = PerProcess(self._start, reset=self._forget_parent)
+        self._stopping = threading.Event()
+
+        self._stats = {
+            "flushes": 0,
+            "failed_flushes": 0,
+            "updates_written": 0,
+            "last_flush_ms": 0.0,
+            "last_flush_at": None
+        }
+
+        atexit.register(self.close)
+
+    def add(self, name, key, increments):
+        """Add deltas for the document whose key field equals `key`"""
+        self._ensure_started()
+
+        with self._lock:
+            pending = self._pending.setdefault((name, key), {})
+            for field, amount in increments.items():
+                pending[field] = pending.get(field, 0) + amount
+            if self._oldest_pending is None:
+                self._oldest_pending = time.time()
+
+    def discard(self, key):
+        """Drop pending deltas for `key` in every upserting collection"""
+        with self._lock:
+            for name, pending_key in list(self._pending):
+                if pending_key == key and self._collections[name][2]:
+                    del self._pending[(name, pending_key)]
+            if not self._pending:
+                self._oldest_pending = None
+
+    def flush(self):
+        """Write all pending deltas now; on failure they are put back"""
+        with self._lock:
+            pending = self._pending
+            oldest_pending = self._oldest_pending
+            self._pending = {}
+            self._oldest_pending = None
+
+        if not pending:
+            return
+
+        started = time.perf_counter()
+        grouped = {}
+        for (name, key), increments in pending.items():
+            grouped.setdefault(name, {})[(name, key)] = increments
+
+        written = 0
+        for name, name_pending in grouped.items():
+            collection, key_field, upsert = self._collections[name]
+            if upsert and self.live_keys is not None:
+                try:
+                    live = self.live_keys(name, [key for (_, key) in name_pending])
+                except Exception as e:
+                    self._restore(name_pending, oldest_pending)
+                    if self.logger:
+                        self.logger.error(f"Failed to check {name} counter owners: {str(e)}")
+                    continue
+                name_pending = {
+                    pending_key: increments for pending_key, increments in name_pending.items()
+                    if pending_key[1] in live
+                }
+                if not name_pending:
+                    continue
+            pending_keys = list(name_pending)
+            operations = [
+                UpdateOne({key_field: pending_key[1]}, {"$inc": name_pending[pending_key]}, upsert=upsert)
+                for pending_key in pending_keys
+            ]
+            try:
+                collection.bulk_write(operations, ordered=False)
+                written += len(operations)
+            except BulkWriteError as e:
+                # The batch is unordered, so every operation not listed in writeErrors was applied
+                failed = [pending_keys[error["index"]] for error in e.details.get("writeErrors", [])]
+                self._restore({pending_key: name_pending[pending_key] for pending_key in failed}, oldest_pending)
+                written += len(operations) - len(failed)
+                with self._lock:
+                    self._stats["failed_flushes"] += 1
+                if self.logger:
+                    self.logger.error(f"Failed to flush {len(failed)} of {len(operations)} {name} counters: {str(e)}")
+            except Exception as e:
+                # Nothing is known to have been applied, so put all the deltas back
+                self._restore(name_pending, oldest_pending)
+                with self._lock:
+                    self._stats["failed_flushes"] += 1
+                if self.logger:
+                    self.logger.error(f"Failed to flush {name} counters: {str(e)}")
+
+        with self._lock:
+            self._stats["flushes"] += 1
+            self._stats["updates_written"] += written
+            self._stats["last_flush_ms"] = round((time.perf_counter() - started) * 1000, 3)
+            self._stats["last_flush_at"] = time.time()
+
+    def close(self):
+        """Stop the flush thread, flush what is left and persist anything that fails"""
+        thread = self._thread.current()
+        if thread is None:
+            return
+
+        self._stopping.set()
+        thread.join(self.interval * 2)
+        self.flush()
+
+        with self._lock:
+            pending = self._pending
+            self._pending = {}
+        if pending and self.persist_path:
+            self._persist(pending)
+
+    def stats(self):
+        """Return how far the stored counters lag behind the buffered deltas"""
+        now = time.time()
+        with self._lock:
+            stats = dict(self._stats)
+            stats["pending_documents"] = len(self._pending)
+            stats["pending_increments"] = sum(
+                sum(increments.values()) for increments in self._pending.values()
+            )
+            stats["lag_seconds"] = round(now - self._oldest_pending, 3) if self._oldest_pending else 0.0
+
+        last_flush_at = stats.pop("last_flush_at")
+        stats["seconds_since_flush"] = round(now - last_flush_at, 3) if last_flush_at else None
+        return stats
+
+    def _ensure_started(self):
+        self._thread.get()
+
+    def _start(self):
+        thread = threading.Thread(target=self._run, name="counter-buffer", daemon=True)
+        thread.start()
+        return thread
+
+    def _forget_parent(self):
+        # Deltas buffered in the parent are the parent's to write
+        self._pending = {}
+        self._oldest_pending = None
+        self._stopping = threading.Event()
+
+    def _run(self):
+        self._load_persisted()
+        while not self._stopping.wait(self.interval):
+            self.flush()
+
+    def _restore(self, pending, oldest_pending):
+        with self._lock:
+            for key, increments in pending.items():
+                current = self._pending.setdefault(key, {})
+                for field, amount in increments.items():
+                    current[field] = current.get(field, 0) + amount
+            if oldest_pending is not None:
+                self._oldest_pending = min(self._oldest_pending or oldest_pending, oldest_pending)
+
+    def _persist(self, pending):
+        entries = [[name, key, increments] for (name, key), increments in pending.items()]
+        try:
+            with open(self.persist_path, "a", encoding="utf-8") as persist_file:
+                for entry in entries:
+                    persist_file.write(json_util.dumps(entry) + "\n")
+        except OSError as e:
+            if self.logger:
+                self.logger.error(f"Failed to persist pending counters: {str(e)}")
+
+    def _load_persisted(self):
+        if not self.persist_path or not os.path.exists(self.persist_path):
+            return
+
+        load_path = f"{self.persist_path}.{os.getpid()}.load"
+        try:
+            os.replace(self.persist_path, load_path)
+            with open(load_path, encoding="utf-8") as load_file:
+                entries = [json_util.loads(line) for line in load_file if line.strip()]
+        except (OSError, ValueError) as e:
+            if self.logger:
+                self.logger.error(f"Failed to load persisted counters: {str(e)}")
+            return
+
+        pending = {}
+        for name, key, increments in entries:
+            if name not in self._collections:
+                continue
+            merged = pending.setdefault((name, key), {})
+            for field, amount in increments.items():
+                merged[field] = merged.get(field, 0) + amount
+        self._restore(pending, time.time())
+        os.remove(load_path)
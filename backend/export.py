@@ -0,0 +1,35 @@
+import zlib
+
+
+EXPORT_BATCH_SIZE = 500
+
+
+def export_lines(sources, username, dumps, batch_size=EXPORT_BATCH_SIZE):
+    """
+    Yield a user's documents as NDJSON, one {"type": ..., "data": ...} object
+    per line. `sources` is a list of (type, collection, sort) triples, where
+    `sort` must follow one of the collection's username indexes so the export
+    never sorts in memory; each collection is read with a cursor in fixed-size
+    batches, and lines are yielded one batch at a time so memory use does not
+    depend on how much history there is.
+    """
+    for record_type, collection, sort in sources:
+        cursor = collection.find({"username": username}).sort(sort).batch_size(batch_size)
+        chunk = []
+        for doc in cursor:
+            chunk.append(dumps({"type": record_type, "data": doc}) + "\n")
+            if len(chunk) >= batch_size:
+                yield "".join(chunk)
+                chunk = []
+        if chunk:
+            yield "".join(chunk)
+
+
+def gzip_chunks(chunks):
+    """Gzip-compress a stream of text chunks incrementally"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk.encode("utf-8"))
+        if compressed:
+            yield compressed
+    yield compressor.flush()
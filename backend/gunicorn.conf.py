@@ -0,0 +1,47 @@
+# Gunicorn settings for serving the backend in production:
+#   gunicorn -c gunicorn.conf.py wsgi:app
+# Every setting can be overridden from the environment (or backend/.env).
+import multiprocessing
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+
+# Worker model: a few processes, each serving requests on a thread pool. Most
+# request time is spent waiting on MongoDB, so threads keep a process busy
+# while staying within one copy of the in-memory catalogs and caches.
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.getenv("GUNICORN_THREADS", 4))
+worker_class = "gthread" if threads > 1 else "sync"
+
+# Import the app once in the master and fork it, so collection bootstrap and
+# catalog loading happen once and the workers share those pages.
+# Background writer threads start lazily in each worker after the fork.
+preload_app = os.getenv("GUNICORN_PRELOAD", "true").lower() == "true"
+
+# Keep-alive and timeouts
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", 5))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 60))
+# On SIGHUP or SIGTERM, workers get this long to finish in-flight requests and flush their queues
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", 30))
+
+# Recycle workers now and then so slow leaks can't build up; the jitter keeps them from restarting together
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", 2000))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", 200))
+
+# `kill -TERM $(cat gunicorn.pid)` stops gracefully. With preload, `kill -HUP` re-forks workers from the
+# code already loaded; deploy new code with USR2, then WINCH and QUIT to the old master
+pidfile = os.getenv("GUNICORN_PIDFILE", "gunicorn.pid")
+accesslog = os.getenv("GUNICORN_ACCESS_LOG", "-")
+errorlog = os.getenv("GUNICORN_ERROR_LOG", "-")
+loglevel = os.getenv("GUNICORN_LOG_LEVEL", "info")
+
+
+def when_ready(server):
+    # With preload the master connected to MongoDB while starting the app; close
+    # that client before forking so every worker opens a pool of its own
+    if preload_app:
+        from app import mongo
+        mongo.close()
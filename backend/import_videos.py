@@ -2,6 +2,7 @@ import datetime
 import pymongo
 import os
 from dotenv import load_dotenv
+from video_catalog import bump_catalog_version
 
 # Load environment variables
 load_dotenv()
@@ -11,6 +12,7 @@ connection_string = os.getenv("CONNECTION_STRING")
 client = pymongo.MongoClient(connection_string)
 db = client["appifydb"]
 videos_collection = db["videos"]
+catalog_versions_collection = db["catalog_versions"]
 
 # Sample videos data with YouTube IDs
 sample_videos = [
@@ -411,6 +413,10 @@ def import_videos():
     videos_collection.create_index([("youtube_id", 1)], unique=True)
     
     print("Created indexes for optimized queries.")
+    
+    # Tell running app processes to reload their in-memory video catalog
+    bump_catalog_version(catalog_versions_collection, "videos")
+    print("Bumped video catalog version.")
 
 if __name__ == "__main__":
     print("YouTube Video Import Script for Mental Health App")
@@ -0,0 +1,152 @@
+import datetime
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+
+# Indexes every collection needs, keyed by collection name.
+# Index names are left to MongoDB's default naming (e.g. "username_1_timestamp_-1").
+INDEXES = {
+    "users": [
+        IndexModel([("username", ASCENDING)], unique=True)
+    ],
+    "journals": [
+        IndexModel([("username", ASCENDING), ("_id", DESCENDING)])
+    ],
+    # _id breaks timestamp ties for keyset pagination
+    "moods": [
+        IndexModel([("username", ASCENDING), ("timestamp", DESCENDING), ("_id", DESCENDING)])
+    ],
+    "user_activity": [
+        IndexModel([("username", ASCENDING), ("timestamp", DESCENDING), ("_id", DESCENDING)])
+    ],
+    "video_interactions": [
+        IndexModel([("username", ASCENDING), ("timestamp", DESCENDING)]),
+        IndexModel([("username", ASCENDING), ("interaction_type", ASCENDING), ("timestamp", DESCENDING)])
+    ],
+    "user_streaks": [
+        IndexModel([("username", ASCENDING)], unique=True)
+    ],
+    "user_video_signals": [
+        IndexModel([("username", ASCENDING)], unique=True)
+    ],
+    "user_video_stats": [
+        IndexModel([("username", ASCENDING)], unique=True)
+    ],
+    "user_versions": [
+        IndexModel([("username", ASCENDING)], unique=True)
+    ],
+    "mood_daily_rollups": [
+        IndexModel([("username", ASCENDING), ("date", ASCENDING)], unique=True)
+    ],
+    "videos": [
+        IndexModel([("categories", ASCENDING)]),
+        IndexModel([("mood_tags", ASCENDING)]),
+        IndexModel([("view_count", DESCENDING)]),
+        IndexModel([("rating", DESCENDING)]),
+        IndexModel([("youtube_id", ASCENDING)], unique=True)
+    ]
+}
+
+SHAPE_DATE = datetime.datetime(2000, 1, 1)
+
+# Hot query shapes that must be answered from an index: (name, collection, filter, sort)
+QUERY_SHAPES = [
+    ("journals by user", "journals", {"username": "u"}, [("_id", DESCENDING)]),
+    ("moods in window", "moods", {"username": "u", "timestamp": {"$gte": SHAPE_DATE}}, [("timestamp", DESCENDING)]),
+    ("latest mood", "moods", {"username": "u"}, [("timestamp", DESCENDING)]),
+    ("mood analytics rows", "moods", {"username": "u", "timestamp": {"$gte": SHAPE_DATE}}, [("timestamp", ASCENDING)]),
+    ("latest activity", "user_activity", {"username": "u"}, [("timestamp", DESCENDING)]),
+    ("mood page", "moods", {"username": "u", "timestamp": {"$gte": SHAPE_DATE}},
+     [("timestamp", DESCENDING), ("_id", DESCENDING)]),
+    ("activity page", "user_activity", {"username": "u"}, [("timestamp", DESCENDING), ("_id", DESCENDING)]),
+    ("interactions by type", "video_interactions",
+     {"username": "u", "interaction_type": "view"}, [("timestamp", DESCENDING)]),
+    ("interactions in window", "video_interactions",
+     {"username": "u", "timestamp": {"$gte": SHAPE_DATE}}, None),
+    ("streak by user", "user_streaks", {"username": "u"}, None),
+    ("video signals by user", "user_video_signals", {"username": "u"}, None),
+    ("video stats by user", "user_video_stats", {"username": "u"}, None),
+    ("data versions by user", "user_versions", {"username": "u"}, None),
+    ("mood rollups in window", "mood_daily_rollups",
+     {"username": "u", "date": {"$gte": ""}}, [("date", ASCENDING)]),
+    ("user by name", "users", {"username": "u"}, None),
+    ("journal export", "journals", {"username": "u"}, [("_id", ASCENDING)]),
+    ("mood export", "moods", {"username": "u"}, [("timestamp", ASCENDING), ("_id", ASCENDING)]),
+    ("activity export", "user_activity", {"username": "u"}, [("timestamp", ASCENDING), ("_id", ASCENDING)]),
+    ("interaction export", "video_interactions", {"username": "u"}, [("timestamp", ASCENDING)])
+]
+
+
+def ensure_indexes(db):
+    """
+    Create every declared index. Safe to run repeatedly; existing indexes
+    are left alone. Returns a list of error messages for indexes that could
+    not be created (e.g. an index with the same name but different options).
+    """
+    errors = []
+    for collection_name, models in INDEXES.items():
+        try:
+            db[collection_name].create_indexes(models)
+        except OperationFailure as e:
+            errors.append(f"{collection_name}: {str(e)}")
+    return errors
+
+
+def index_drift(db):
+    """
+    Compare declared indexes with what the database has.
+    Returns {collection: {"missing": [...], "changed": [...], "extra": [...]}}
+    for every collection that differs.
+    """
+    drift = {}
+    for collection_name, models in INDEXES.items():
+        existing = db[collection_name].index_information()
+        existing.pop("_id_", None)
+
+        report = {"missing": [], "changed": [], "extra": []}
+        declared_names = set()
+        for model in models:
+            spec = model.document
+            name = spec["name"]
+            declared_names.add(name)
+            if name not in existing:
+                report["missing"].append(name)
+                continue
+
+            current = existing[name]
+            current_key = [(field, int(direction)) for field, direction in current["key"]]
+            if current_key != list(spec["key"].items()) or \
+                    bool(current.get("unique")) != bool(spec.get("unique")):
+                report["changed"].append(name)
+
+        report["extra"] = sorted(set(existing) - declared_names)
+        if any(report.values()):
+            drift[collection_name] = report
+
+    return drift
+
+
+def _plan_stages(plan):
+    """Yield every stage name in an explain plan tree"""
+    if not isinstance(plan, dict):
+        return
+    if "stage" in plan:
+        yield plan["stage"]
+    for key in ("inputStage", "queryPlan"):
+        yield from _plan_stages(plan.get(key))
+    for child in plan.get("inputStages", []):
+        yield from _plan_stages(child)
+
+
+def collection_scans(db):
+    """Return the names of registered query shapes whose winning plan is a COLLSCAN"""
+    scans = []
+    for name, collection_name, query, sort in QUERY_SHAPES:
+        command = {"find": collection_name, "filter": query}
+        if sort:
+            command["sort"] = dict(sort)
+        explain = db.command("explain", command, verbosity="queryPlanner")
+        winning_plan = explain["queryPlanner"]["winningPlan"]
+        if "COLLSCAN" in _plan_stages(winning_plan):
+            scans.append(name)
+    return scans
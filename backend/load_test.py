@@ -0,0 +1,116 @@
+import argparse
+import base64
+import http.client
+import statistics
+import threading
+import time
+from urllib.parse import urlsplit
+
+# Endpoints hit by default: the public music list and the dashboard reads (those need --username/--password)
+DEFAULT_PATHS = "/music,/user/dashboard-stats,/moods/current,/journal/count,/videos/popular"
+
+
+class Worker(threading.Thread):
+    """One client with its own keep-alive connection, cycling through the paths"""
+
+    def __init__(self, host, port, paths, deadline, auth):
+        super().__init__(daemon=True)
+        self.host = host
+        self.port = port
+        self.paths = paths
+        self.deadline = deadline
+        self.auth = auth
+        self.cookie = None
+        self.latencies = []
+        self.statuses = {}
+        self.errors = 0
+
+    def run(self):
+        connection = http.client.HTTPConnection(self.host, self.port, timeout=30)
+        if self.auth:
+            self.cookie = self._login(connection)
+
+        index = 0
+        while time.perf_counter() < self.deadline:
+            path = self.paths[index % len(self.paths)]
+            index += 1
+            headers = {"Accept-Encoding": "gzip"}
+            if self.cookie:
+                headers["Cookie"] = self.cookie
+            started = time.perf_counter()
+            try:
+                connection.request("GET", path, headers=headers)
+                response = connection.getresponse()
+                response.read()
+            except (OSError, http.client.HTTPException):
+                self.errors += 1
+                connection.close()
+                connection = http.client.HTTPConnection(self.host, self.port, timeout=30)
+                continue
+            self.latencies.append(time.perf_counter() - started)
+            self.statuses[response.status] = self.statuses.get(response.status, 0) + 1
+        connection.close()
+
+    def _login(self, connection):
+        connection.request("GET", "/login", headers={"Authorization": f"Basic {self.auth}"})
+        response = connection.getresponse()
+        response.read()
+        cookies = [
+            header.split(";", 1)[0]
+            for name, header in response.getheaders() if name.lower() == "set-cookie"
+        ]
+        return "; ".join(cookies) or None
+
+
+def run(url, paths, concurrency, duration, auth):
+    parts = urlsplit(url)
+    deadline = time.perf_counter() + duration
+    workers = [Worker(parts.hostname, parts.port or 80, paths, deadline, auth) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(latency * 1000 for worker in workers for latency in worker.latencies)
+    statuses = {}
+    for worker in workers:
+        for status, count in worker.statuses.items():
+            statuses[status] = statuses.get(status, 0) + count
+    errors = sum(worker.errors for worker in workers)
+
+    def percentile(fraction):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * fraction))] if latencies else 0.0
+
+    print(f"{url}: {concurrency} clients for {elapsed:.1f}s")
+    print(f"  requests/sec  {len(latencies) / elapsed:.1f}")
+    if latencies:
+        print(f"  latency ms    p50 {statistics.median(latencies):.1f}  p95 {percentile(0.95):.1f}  p99 {percentile(0.99):.1f}")
+    print(f"  status codes  {dict(sorted(statuses.items()))}")
+    print(f"  errors        {errors}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measure request throughput of a running backend, e.g. `flask run` against gunicorn"
+    )
+    parser.add_argument("urls", nargs="+", help="base URLs to test one after another, e.g. http://127.0.0.1:8000")
+    parser.add_argument("--paths", default=DEFAULT_PATHS, help="comma separated paths to cycle through")
+    parser.add_argument("--concurrency", type=int, default=16, help="concurrent keep-alive clients")
+    parser.add_argument("--duration", type=float, default=20, help="seconds per URL")
+    parser.add_argument("--username", help="log every client in as this user first")
+    parser.add_argument("--password")
+    args = parser.parse_args()
+
+    auth = None
+    if args.username:
+        auth = base64.b64encode(f"{args.username}:{args.password or ''}".encode("utf-8")).decode("ascii")
+
+    paths = [path.strip() for path in args.paths.split(",") if path.strip()]
+    for url in args.urls:
+        run(url.rstrip("/"), paths, args.concurrency, args.duration, auth)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+import collections
+import os
+import threading
+from pymongo import MongoClient, monitoring
+from per_process import PerProcess
+
+
+def client_options_from_env(environ=None):
+    """MongoClient pool and compression settings from MONGO_* environment variables"""
+    environ = os.environ if environ is None else environ
+    options = {
+        "maxPoolSize": int(environ.get("MONGO_MAX_POOL_SIZE", 100)),
+        "minPoolSize": int(environ.get("MONGO_MIN_POOL_SIZE", 0))
+    }
+    integer_settings = {
+        "MONGO_WAIT_QUEUE_TIMEOUT_MS": "waitQueueTimeoutMS",
+        "MONGO_MAX_IDLE_TIME_MS": "maxIdleTimeMS",
+        "MONGO_MAX_CONNECTING": "maxConnecting",
+        "MONGO_CONNECT_TIMEOUT_MS": "connectTimeoutMS",
+        "MONGO_SERVER_SELECTION_TIMEOUT_MS": "serverSelectionTimeoutMS"
+    }
+    for variable, option in integer_settings.items():
+        if environ.get(variable):
+            options[option] = int(environ[variable])
+    # e.g. "zstd,snappy,zlib"; zstd needs the zstandard package and snappy python-snappy
+    if environ.get("MONGO_COMPRESSORS"):
+        options["compressors"] = environ["MONGO_COMPRESSORS"]
+    return options
+
+
+class PoolWaitListener(monitoring.ConnectionPoolListener):
+    """Record how long operations wait to check a connection out of the pool"""
+
+    def __init__(self, window=1000):
+        self._lock = threading.Lock()
+        self._window = window
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._waits = collections.deque(maxlen=self._window)
+            self._counters = {
+                "checkouts": 0,
+                "checkout_failures": 0,
+                "checked_out": 0,
+                "open_connections": 0,
+                "pool_clears": 0
+            }
+            self._failure_reasons = {}
+            self._total_wait_ms = 0.0
+            self._max_wait_ms = 0.0
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+            waits = sorted(self._waits)
+            failure_reasons = dict(self._failure_reasons)
+            total_wait_ms = self._total_wait_ms
+            max_wait_ms = self._max_wait_ms
+
+        stats["failure_reasons"] = failure_reasons
+        stats["avg_wait_ms"] = round(total_wait_ms / stats["checkouts"], 3) if stats["checkouts"] else 0.0
+        stats["max_wait_ms"] = round(max_wait_ms, 3)
+        stats["p95_wait_ms"] = round(waits[min(len(waits) - 1, int(len(waits) * 0.95))], 3) if waits else 0.0
+        return stats
+
+    def connection_checked_out(self, event):
+        wait_ms = event.duration * 1000
+        with self._lock:
+            self._counters["checkouts"] += 1
+            self._counters["checked_out"] += 1
+            self._waits.append(wait_ms)
+            self._total_wait_ms += wait_ms
+            self._max_wait_ms = max(self._max_wait_ms, wait_ms)
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self._counters["checkout_failures"] += 1
+            self._failure_reasons[event.reason] = self._failure_reasons.get(event.reason, 0) + 1
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self._counters["checked_out"] -= 1
+
+    def connection_created(self, event):
+        with self._lock:
+            self._counters["open_connections"] += 1
+
+    def connection_closed(self, event):
+        with self._lock:
+            self._counters["open_connections"] -= 1
+
+    def pool_cleared(self, event):
+        with self._lock:
+            self._counters["pool_clears"] += 1
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_check_out_started(self, event):
+        pass
+
+
+class MongoConnection:
+    """
+    MongoClient that is only created when it is first used, once per process.
+
+    A client must not be shared across fork, so a worker forked from a master
+    that already connected (gunicorn preload) builds its own client instead
+    of reusing the parent's sockets.
+    """
+
+    def __init__(self, uri, database_name, client_options=None):
+        self.uri = uri
+        self.database_name = database_name
+        self.client_options = client_options or {}
+        self.pool_listener = PoolWaitListener()
+
+        # The parent's client belongs to the parent; a forked worker just drops its reference to it
+        self._client = PerProcess(self._connect)
+
+    def client(self):
+        return self._client.get()
+
+    def database(self):
+        return self.client()[self.database_name]
+
+    def close(self):
+        """Close this process's client; the next query opens a new one"""
+        client = self._client.clear()
+        if client is not None:
+            client.close()
+
+    def stats(self):
+        """Pool settings and checkout wait statistics of this process's client"""
+        return {
+            "connected": self._client.current() is not None,
+            "maxPoolSize": self.client_options.get("maxPoolSize"),
+            "minPoolSize": self.client_options.get("minPoolSize"),
+            "waitQueueTimeoutMS": self.client_options.get("waitQueueTimeoutMS"),
+            "compressors": self.client_options.get("compressors"),
+            "pool": self.pool_listener.stats()
+        }
+
+    def _connect(self):
+        self.pool_listener.reset()
+        return MongoClient(self.uri, event_listeners=[self.pool_listener], **self.client_options)
+
+
+class LazyDatabase:
+    """Database handle that resolves to the current process's client on use"""
+
+    def __init__(self, connection):
+        self._connection = connection
+
+    def __getitem__(self, name):
+        return LazyCollection(self._connection, name)
+
+    def __getattr__(self, attribute):
+        return getattr(self._connection.database(), attribute)
+
+
+class LazyCollection:
+    """Collection handle that can be created at import time without connecting"""
+
+    def __init__(self, connection, name):
+        self._connection = connection
+        self.name = name
+
+    def __getattr__(self, attribute):
+        return getattr(self._connection.database()[self.name], attribute)
@@ -0,0 +1,159 @@
+ROW_SECTIONS = ("moods", "calendar")
+
+
+def analytics_pipeline(username, start_date):
+    """
+    Build the $facet aggregation behind /moods/analytics: summary numbers
+    and the distribution, both computed by MongoDB. Every mood is numbered
+    by timestamp first, so the averages of the older and newer half of the
+    window need no per-mood array. The mood rows are read separately with
+    analytics_rows_query(), since $facet returns one document capped at 16 MB.
+    """
+    intensity = {"$ifNull": ["$intensity", 0]}
+    half_point = {"$floor": {"$divide": ["$total", 2]}}
+    # Matches slicing the timestamp-ordered intensities at the half point (the first half is at least one mood)
+    in_first_half = {"$lte": ["$position", {"$max": [half_point, 1]}]}
+    in_second_half = {"$gt": ["$position", half_point]}
+
+    return [
+        {"$match": {
+            "username": username,
+            "timestamp": {"$gte": start_date}
+        }},
+        {"$setWindowFields": {
+            "sortBy": {"timestamp": 1},
+            "output": {
+                "position": {"$documentNumber": {}},
+                "total": {"$count": {}, "window": {"documents": ["unbounded", "unbounded"]}}
+            }
+        }},
+        {"$facet": {
+            "summary": [
+                {"$group": {
+                    "_id": None,
+                    "total": {"$sum": 1},
+                    "averageIntensity": {"$avg": intensity},
+                    "stdDev": {"$stdDevPop": intensity},
+                    # $avg skips the nulls of moods outside the half
+                    "firstHalfAvg": {"$avg": {"$cond": [in_first_half, intensity, None]}},
+                    "secondHalfAvg": {"$avg": {"$cond": [in_second_half, intensity, None]}}
+                }},
+                {"$project": {
+                    "_id": 0,
+                    "total": 1,
+                    "averageIntensity": 1,
+                    "stdDev": 1,
+                    "firstHalfAvg": {"$cond": [{"$gte": ["$total", 3]}, "$firstHalfAvg", None]},
+                    "secondHalfAvg": {"$cond": [{"$gte": ["$total", 3]}, "$secondHalfAvg", None]}
+                }}
+            ],
+            "distribution": [
+                {"$group": {
+                    "_id": "$mood",
+                    "count": {"$sum": 1},
+                    "firstSeen": {"$min": "$timestamp"}
+                }},
+                # Ties keep the order in which moods first appeared
+                {"$sort": {"count": -1, "firstSeen": 1}}
+            ]
+        }}
+    ]
+
+
+def analytics_rows_query(username, start_date):
+    """Filter and projection of the mood rows /moods/analytics returns; read them sorted by timestamp"""
+    query = {"username": username, "timestamp": {"$gte": start_date}}
+    projection = {"mood": 1, "intensity": 1, "note": 1, "timestamp": 1}
+    return query, projection
+
+
+def calendar_from_rows(rows):
+    """Group timestamp-ordered mood rows into calendar days while streaming through them"""
+    calendar = []
+    for mood in rows:
+        entry = format_mood_row(mood)
+        if not calendar or calendar[-1]["date"] != entry["date"]:
+            calendar.append({"date": entry["date"], "entries": []})
+        calendar[-1]["entries"].append(entry)
+    return calendar
+
+
+def format_mood_row(mood):
+    """Format a mood document the way the analytics endpoint returns it"""
+    timestamp = mood.get('timestamp')
+    if timestamp:
+        # Format: YYYY-MM-DD
+        date_str = timestamp.strftime('%Y-%m-%d')
+        # Format: HH:MM:SS
+        time_str = timestamp.strftime('%H:%M:%S')
+    else:
+        date_str = 'Unknown'
+        time_str = 'Unknown'
+
+    return {
+        "id": str(mood.get('_id')),
+        "mood": mood.get('mood'),
+        "intensity": mood.get('intensity'),
+        "note": mood.get('note', ''),
+        "date": date_str,
+        "time": time_str,
+        "timestamp": timestamp.isoformat() if timestamp else None
+    }
+
+
+def variability_level(std_dev):
+    """Map the standard deviation of intensity to a variability level"""
+    if std_dev > 1.5:
+        return 'high'
+    elif std_dev > 0.7:
+        return 'medium'
+    return 'low'
+
+
+def trend_from_halves(first_half_avg, second_half_avg):
+    """Compare the two halves of a window (improving, worsening, or stable)"""
+    if first_half_avg is None or second_half_avg is None:
+        return 'stable'
+    if second_half_avg - first_half_avg > 0.5:
+        return 'improving'
+    elif first_half_avg - second_half_avg > 0.5:
+        return 'worsening'
+    return 'stable'
+
+
+def build_analytics_response(facet_result, rows=(), include=ROW_SECTIONS):
+    """Turn the $facet output and the timestamp-ordered mood rows into the /moods/analytics response body"""
+    summary = facet_result["summary"][0] if facet_result["summary"] else None
+    distribution = [
+        {"mood": bucket["_id"], "count": bucket["count"]}
+        for bucket in facet_result["distribution"]
+    ]
+
+    calendar = calendar_from_rows(rows)
+    formatted_moods = [entry for day in calendar for entry in day["entries"]]
+
+    if summary:
+        total = summary["total"]
+        most_common_mood = distribution[0]["mood"]
+        avg_intensity = summary["averageIntensity"]
+        std_dev = summary["stdDev"] if total > 1 else 0
+        trend = trend_from_halves(summary["firstHalfAvg"], summary["secondHalfAvg"])
+    else:
+        total = 0
+        most_common_mood = 'neutral'
+        avg_intensity = 0
+        std_dev = 0
+        trend = 'stable'
+
+    return {
+        "moods": formatted_moods if "moods" in include else [],
+        "summary": {
+            "mostCommonMood": most_common_mood,
+            "averageIntensity": round(avg_intensity, 2),
+            "variability": variability_level(std_dev),
+            "trend": trend,
+            "totalEntries": total
+        },
+        "distribution": distribution,
+        "calendar": calendar if "calendar" in include else []
+    }
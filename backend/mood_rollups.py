@@ -0,0 +1,347 @@
+import datetime
+import math
+from pymongo import DeleteMany, ReplaceOne, UpdateOne
+
+
+# One document per (username, date) in the mood_daily_rollups collection:
+#   {
+#       "username": str,
+#       "date": "YYYY-MM-DD",
+#       "count": int,
+#       "counts": {mood: int},
+#       "first_seen": {mood: datetime},
+#       "intensity_sum": number,
+#       "intensity_sq_sum": number,
+#       "first_timestamp": datetime,
+#       "last_timestamp": datetime
+#   }
+# Mood names are used as field names, so they are escaped with mood_key().
+
+NUMERIC_INTENSITY = {"$cond": [{"$isNumber": "$intensity"}, "$intensity", 0]}
+
+
+def stored_timestamp(timestamp):
+    """Return a timestamp the way MongoDB hands it back: naive UTC"""
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return timestamp
+
+
+def rollup_date(timestamp):
+    """Return the rollup date key for a timestamp, as MongoDB stores it (UTC)"""
+    return stored_timestamp(timestamp).strftime('%Y-%m-%d')
+
+
+def mood_key(mood):
+    """Escape a mood (or category) name so it can be used as a field name"""
+    return str(mood).replace('%', '%25').replace('.', '%2E').replace('$', '%24')
+
+
+def mood_name(key):
+    """Reverse mood_key()"""
+    return key.replace('%24', '$').replace('%2E', '.').replace('%25', '%')
+
+
+def numeric_intensity(value):
+    """Intensity as it is summed into the rollups; non-numeric values count as 0"""
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return 0
+    return value
+
+
+def rollup_update(mood_doc):
+    """Build the (filter, update) pair that adds one mood to its daily rollup"""
+    timestamp = stored_timestamp(mood_doc['timestamp'])
+    key = mood_key(mood_doc['mood'])
+    intensity = numeric_intensity(mood_doc.get('intensity'))
+
+    return (
+        {"username": mood_doc['username'], "date": rollup_date(timestamp)},
+        {
+            "$inc": {
+                "count": 1,
+                f"counts.{key}": 1,
+                "intensity_sum": intensity,
+                "intensity_sq_sum": intensity * intensity
+            },
+            "$min": {"first_timestamp": timestamp, f"first_seen.{key}": timestamp},
+            "$max": {"last_timestamp": timestamp}
+        }
+    )
+
+
+def record_mood(rollups_collection, mood_doc):
+    """Add one logged mood to its daily rollup with an atomic upsert"""
+    query, update = rollup_update(mood_doc)
+    rollups_collection.update_one(query, update, upsert=True)
+
+
+def record_moods(rollups_collection, mood_docs):
+    """
+    Add many moods to their daily rollups with one bulk write.
+    Moods that land on the same day are merged into a single update.
+    """
+    merged = {}
+    for mood_doc in mood_docs:
+        query, update = rollup_update(mood_doc)
+        key = (query["username"], query["date"])
+        if key not in merged:
+            merged[key] = (query, update)
+            continue
+
+        combined = merged[key][1]
+        for field, amount in update["$inc"].items():
+            combined["$inc"][field] = combined["$inc"].get(field, 0) + amount
+        for field, value in update["$min"].items():
+            combined["$min"][field] = min(combined["$min"].get(field, value), value)
+        for field, value in update["$max"].items():
+            combined["$max"][field] = max(combined["$max"].get(field, value), value)
+
+    operations = [UpdateOne(query, update, upsert=True) for query, update in merged.values()]
+    if operations:
+        rollups_collection.bulk_write(operations, ordered=False)
+
+
+def rebuild_rollups(moods_collection, rollups_collection, username=None):
+    """
+    Regenerate daily rollups from the raw moods collection, one user at a
+    time. Each day's rollup is replaced in place with an upsert and only the
+    days a user no longer has moods for are deleted, so readers never see
+    missing rollups and log_mood's $inc on other users is untouched while
+    the rebuild runs. Returns the number of rollup documents written.
+    """
+    if username:
+        usernames = [username]
+    else:
+        usernames = sorted(set(moods_collection.distinct("username")) | set(rollups_collection.distinct("username")))
+
+    written = 0
+    for name in usernames:
+        rollups = _user_rollups(moods_collection, name)
+        operations = [
+            ReplaceOne({"username": name, "date": date}, rollup, upsert=True)
+            for date, rollup in rollups.items()
+        ]
+        operations.append(DeleteMany({"username": name, "date": {"$nin": list(rollups)}}))
+        rollups_collection.bulk_write(operations, ordered=True)
+        written += len(rollups)
+
+    return written
+
+
+def _user_rollups(moods_collection, username):
+    # date -> rollup document, aggregated from the user's moods
+    pipeline = [
+        {"$match": {"username": username, "timestamp": {"$type": "date"}}},
+        {"$group": {
+            "_id": {
+                "date": {"$dateToString": {"format": "%Y-%m-%d", "date": "$timestamp"}},
+                "mood": "$mood"
+            },
+            "count": {"$sum": 1},
+            "intensity_sum": {"$sum": NUMERIC_INTENSITY},
+            "intensity_sq_sum": {"$sum": {"$multiply": [NUMERIC_INTENSITY, NUMERIC_INTENSITY]}},
+            "first_timestamp": {"$min": "$timestamp"},
+            "last_timestamp": {"$max": "$timestamp"}
+        }}
+    ]
+
+    rollups = {}
+    for bucket in moods_collection.aggregate(pipeline, allowDiskUse=True):
+        group = bucket["_id"]
+        rollup = rollups.setdefault(group["date"], {
+            "username": username,
+            "date": group["date"],
+            "count": 0,
+            "counts": {},
+            "first_seen": {},
+            "intensity_sum": 0,
+            "intensity_sq_sum": 0,
+            "first_timestamp": bucket["first_timestamp"],
+            "last_timestamp": bucket["last_timestamp"]
+        })
+        key = mood_key(group["mood"])
+        rollup["count"] += bucket["count"]
+        rollup["counts"][key] = bucket["count"]
+        rollup["first_seen"][key] = bucket["first_timestamp"]
+        rollup["intensity_sum"] += bucket["intensity_sum"]
+        rollup["intensity_sq_sum"] += bucket["intensity_sq_sum"]
+        rollup["first_timestamp"] = min(rollup["first_timestamp"], bucket["first_timestamp"])
+        rollup["last_timestamp"] = max(rollup["last_timestamp"], bucket["last_timestamp"])
+    return rollups
+
+
+# Rollup fields the window readers use
+ROLLUP_WINDOW_FIELDS = {
+    "_id": 0, "date": 1, "count": 1, "counts": 1, "first_seen": 1,
+    "intensity_sum": 1, "intensity_sq_sum": 1
+}
+
+
+def window_days_queries(username, start_date):
+    """
+    Return (start_day, partial_pipeline, rollup_filter) for window_days().
+    partial_pipeline aggregates the raw moods of a partial first day and is
+    None when start_date is midnight; the rollup filter covers whole days.
+    """
+    start_day = rollup_date(start_date)
+    day_start = datetime.datetime.strptime(start_day, '%Y-%m-%d')
+    start_date = stored_timestamp(start_date)
+
+    if start_date <= day_start:
+        return start_day, None, {"username": username, "date": {"$gte": start_day}}
+
+    pipeline = [
+        {"$match": {
+            "username": username,
+            "timestamp": {"$gte": start_date, "$lt": day_start + datetime.timedelta(days=1)}
+        }},
+        {"$group": {
+            "_id": "$mood",
+            "count": {"$sum": 1},
+            "intensity_sum": {"$sum": NUMERIC_INTENSITY},
+            "intensity_sq_sum": {"$sum": {"$multiply": [NUMERIC_INTENSITY, NUMERIC_INTENSITY]}},
+            "first_seen": {"$min": "$timestamp"}
+        }}
+    ]
+    return start_day, pipeline, {"username": username, "date": {"$gt": start_day}}
+
+
+def partial_day(start_day, buckets):
+    """Fold the partial first day's aggregation buckets into a day summary, or None if empty"""
+    partial = {
+        "date": start_day,
+        "count": 0,
+        "counts": {},
+        "first_seen": {},
+        "intensity_sum": 0,
+        "intensity_sq_sum": 0
+    }
+    for bucket in buckets:
+        key = mood_key(bucket["_id"])
+        partial["count"] += bucket["count"]
+        partial["counts"][key] = bucket["count"]
+        partial["first_seen"][key] = bucket["first_seen"]
+        partial["intensity_sum"] += bucket["intensity_sum"]
+        partial["intensity_sq_sum"] += bucket["intensity_sq_sum"]
+    return partial if partial["count"] else None
+
+
+def window_days(moods_collection, rollups_collection, username, start_date):
+    """
+    Return per-day mood summaries from start_date onwards, oldest first.
+    Whole days come from the rollups; if start_date falls mid-day, that
+    first partial day is aggregated from the raw moods instead.
+    """
+    start_day, pipeline, rollup_filter = window_days_queries(username, start_date)
+
+    days = []
+    if pipeline:
+        partial = partial_day(start_day, moods_collection.aggregate(pipeline))
+        if partial:
+            days.append(partial)
+
+    days.extend(rollups_collection.find(rollup_filter, ROLLUP_WINDOW_FIELDS).sort("date", 1))
+    return days
+
+
+def window_distribution(days):
+    """Count moods across day summaries, most common first"""
+    counts = {}
+    first_seen = {}
+    for day in days:
+        for key, count in day.get("counts", {}).items():
+            counts[key] = counts.get(key, 0) + count
+            seen = day.get("first_seen", {}).get(key)
+            if seen is not None and (key not in first_seen or seen < first_seen[key]):
+                first_seen[key] = seen
+
+    distribution = [
+        {"mood": mood_name(key), "count": count}
+        for key, count in sorted(
+            counts.items(),
+            # Ties keep the order in which moods first appeared
+            key=lambda item: (-item[1], first_seen.get(item[0], datetime.datetime.max))
+        )
+    ]
+    return distribution
+
+
+def window_intensity(days):
+    """Return (total entries, average intensity, population std dev) for day summaries"""
+    total = sum(day["count"] for day in days)
+    if not total:
+        return 0, 0, 0
+
+    intensity_sum = sum(day["intensity_sum"] for day in days)
+    intensity_sq_sum = sum(day["intensity_sq_sum"] for day in days)
+    mean = intensity_sum / total
+    variance = max(0, intensity_sq_sum / total - mean ** 2)
+    return total, mean, math.sqrt(variance)
+
+
+def half_average_split(username, start_date, days):
+    """
+    Plan window_half_averages(): returns (plan, split_query). split_query is
+    (filter, projection, limit) for the first entries of the day the split
+    falls on, sorted by timestamp, or None when whole days are enough.
+    """
+    total = sum(day["count"] for day in days)
+    if total < 3:
+        return None, None
+
+    half_point = total // 2
+    intensity_sum = sum(day["intensity_sum"] for day in days)
+    start_date = stored_timestamp(start_date)
+
+    first_half_sum = 0
+    seen = 0
+    split_query = None
+    for day in days:
+        if seen + day["count"] <= half_point:
+            first_half_sum += day["intensity_sum"]
+            seen += day["count"]
+            if seen == half_point:
+                break
+            continue
+
+        # The split falls inside this day; its first entries are read in order
+        day_start = datetime.datetime.strptime(day["date"], '%Y-%m-%d')
+        split_query = (
+            {
+                "username": username,
+                "timestamp": {
+                    "$gte": max(day_start, start_date),
+                    "$lt": day_start + datetime.timedelta(days=1)
+                }
+            },
+            {"_id": 0, "intensity": 1},
+            half_point - seen
+        )
+        break
+
+    return (total, half_point, intensity_sum, first_half_sum), split_query
+
+
+def half_averages(plan, split_entries):
+    """Finish a half_average_split() plan with the entries its split query returned"""
+    if plan is None:
+        return None, None
+
+    total, half_point, intensity_sum, first_half_sum = plan
+    first_half_sum += sum(numeric_intensity(entry.get("intensity")) for entry in split_entries)
+    return first_half_sum / half_point, (intensity_sum - first_half_sum) / (total - half_point)
+
+
+def window_half_averages(moods_collection, username, start_date, days):
+    """
+    Average intensity of the older and newer half of the entries in a window.
+    Whole days are summed from their rollups; only the day the split falls on
+    is read from the raw moods, and only as many entries as needed.
+    """
+    plan, split_query = half_average_split(username, start_date, days)
+    split_entries = []
+    if split_query:
+        query, projection, limit = split_query
+        split_entries = moods_collection.find(query, projection).sort("timestamp", 1).limit(limit)
+    return half_averages(plan, split_entries)
@@ -0,0 +1,147 @@
+import datetime
+from collections import Counter
+
+
+# Mood ranks from negative to positive, used to spot a trend in the last three moods
+MOOD_RANKS = {
+    'sad': -2,
+    'tired': -1,
+    'neutral': 0,
+    'energetic': 1,
+    'happy': 2
+}
+
+TREND_WINDOW_DAYS = 7
+
+
+def calculate_mood_trend(mood_values):
+    """
+    Calculate the mood trend from mood names ordered newest first.
+    Returns the trend, a description, the most common mood and the five
+    most recent moods.
+    """
+    # Default response if no moods are found
+    if not mood_values:
+        return {
+            "trend": "neutral",
+            "description": "No recent mood data"
+        }
+
+    # Calculate the most common mood
+    most_common_mood = Counter(mood_values).most_common(1)[0][0]
+
+    # Check if there's a trend (improving or declining)
+    if len(mood_values) >= 3:
+        # Get the ranks of the last 3 moods
+        recent_ranks = [MOOD_RANKS.get(mood, 0) for mood in mood_values[:3]]
+
+        # Check if consistently improving
+        if recent_ranks[0] > recent_ranks[1] > recent_ranks[2]:
+            trend = "improving"
+            description = "Your mood is improving"
+        # Check if consistently declining
+        elif recent_ranks[0] < recent_ranks[1] < recent_ranks[2]:
+            trend = "sad"  # Using "sad" as the trend identifier for declining
+            description = "Your mood is declining"
+        # Check if fluctuating significantly
+        elif max(recent_ranks) - min(recent_ranks) >= 3:
+            trend = "fluctuating"
+            description = "Your mood has been fluctuating"
+        else:
+            # Default to the most common mood
+            trend = most_common_mood
+            description = f"Your mood has been mostly {most_common_mood}"
+    else:
+        trend = most_common_mood
+        description = f"Your recent mood: {most_common_mood}"
+
+    return {
+        "trend": trend,
+        "description": description,
+        "mostCommonMood": most_common_mood,
+        "recentMoods": mood_values[:5]  # Include the 5 most recent moods
+    }
+
+
+def recent_moods_query(username):
+    """Filter and projection for the moods a trend is computed from; sort newest first"""
+    window_start = datetime.datetime.now() - datetime.timedelta(days=TREND_WINDOW_DAYS)
+    return {"username": username, "timestamp": {"$gte": window_start}}, {"mood": 1, "_id": 0}
+
+
+class MoodTrendCalculator:
+    """
+    Compute mood trends from the last week of moods and memoize them per user
+    in the shared cache. Entries expire after `ttl` seconds and are dropped by
+    invalidate() as soon as the user logs a new mood.
+
+    `mood_version(username)` returns the user's moods version from
+    user_versions. It is part of every entry's key, so a mood logged through
+    another worker (whose invalidate() never reached this process's cache)
+    still makes the old trend unreachable. If it fails, the cache is skipped.
+    Callers that already read the version for the request pass it to get()
+    or cached(), so a cache hit costs no MongoDB read.
+    """
+
+    CACHE_NAME = "mood-trend"
+
+    def __init__(self, moods_collection, cache, ttl=60, mood_version=None, logger=None):
+        self.moods_collection = moods_collection
+        self.cache = cache
+        self.ttl = ttl
+        self.mood_version = mood_version
+        self.logger = logger
+
+    def get(self, username, mood_version=None):
+        """Return the mood trend for a user, from the cache when it is fresh"""
+        generation, trend = self.cached(username, mood_version)
+        if trend is not None:
+            return trend
+        return self.remember(username, generation, self._recent_mood_values(username))
+
+    def cached(self, username, mood_version=None):
+        """
+        Return (stamp, trend) from the cache; trend is None on a miss.
+        Pass the stamp to remember() once the moods have been read.
+        """
+        stamp = self._stamp(username, mood_version)
+        if stamp is not None:
+            generation, key = stamp
+            cached = self.cache.get(self.CACHE_NAME, key, generation, username)
+            if cached is not None:
+                return stamp, dict(cached)
+        return stamp, None
+
+    def remember(self, username, stamp, mood_values):
+        """Compute the trend from mood values (newest first) and cache it"""
+        trend = calculate_mood_trend(mood_values)
+        if stamp is not None:
+            generation, key = stamp
+            self.cache.set(self.CACHE_NAME, key, trend, self.ttl, generation, username)
+        return dict(trend)
+
+    def invalidate(self, username):
+        """Forget the cached trend for a user"""
+        self.cache.invalidate(self.CACHE_NAME, username)
+
+    def _stamp(self, username, mood_version=None):
+        # (cache generation, entry key), or None when the trend must not come from the cache
+        generation = self.cache.generation(self.CACHE_NAME, username)
+        if generation is None:
+            return None
+        if mood_version is not None:
+            return generation, f"trend:{mood_version}"
+        if self.mood_version is None:
+            return generation, "trend"
+        try:
+            return generation, f"trend:{self.mood_version(username)}"
+        except Exception as e:
+            if self.logger:
+                self.logger.error(f"Failed to read mood version: {str(e)}")
+            return None
+
+    def _recent_mood_values(self, username):
+        # Only the mood names are needed, newest first
+        query, projection = recent_moods_query(username)
+        recent_moods = self.moods_collection.find(query, projection).sort("timestamp", -1)
+        return [mood.get('mood') for mood in recent_moods]
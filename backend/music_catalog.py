@@ -0,0 +1,49 @@
+import gzip
+import hashlib
+import time
+from video_catalog import VersionedCatalog
+
+
+class _Payload:
+    """The serialized /music response, ready to send"""
+
+    def __init__(self, body, version, compress):
+        self.version = version
+        self.loaded_at = time.monotonic()
+        self.body = body
+        # mtime=0 keeps the compressed bytes identical across processes
+        self.gzipped = gzip.compress(body, mtime=0) if compress else None
+        self.etag = hashlib.sha1(body).hexdigest()
+
+
+class MusicCatalog(VersionedCatalog):
+    """
+    Process-local, pre-serialized copy of the calming music list.
+
+    The list is static content, so it is serialized (and optionally gzipped)
+    once and every request just sends the buffer. It is reloaded like the
+    video catalog; `max_age` bounds how long edits made without bumping the
+    version can go unnoticed.
+    """
+
+    def __init__(self, music_collection, versions_collection, dumps, name="music",
+                 check_interval=30, max_age=3600, compress=True, logger=None):
+        super().__init__(versions_collection, name, check_interval, max_age, logger)
+        self.music_collection = music_collection
+        self.dumps = dumps
+        self.compress = compress
+
+    def payload(self):
+        """Return the current serialized payload, reloading it if the catalog changed"""
+        return self._current()
+
+    def _load(self, version):
+        music_list = list(self.music_collection.find({"genre": "calming"}))  # Filter by genre "calming"
+        body = self.dumps({"music": music_list}).encode("utf-8")
+        return _Payload(body, version, self.compress)
+
+    def _describe(self, payload):
+        return {
+            "bytes": len(payload.body),
+            "gzippedBytes": len(payload.gzipped) if payload.gzipped is not None else None
+        }
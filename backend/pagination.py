@@ -0,0 +1,102 @@
+import base64
+import binascii
+import re
+from bson import json_util
+
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+FIELD_NAME = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*(\.[A-Za-z_][A-Za-z0-9_]*)*$")
+
+
+def encode_cursor(doc, sort_field):
+    """Build the opaque cursor token that resumes after `doc`"""
+    position = {"id": doc["_id"]}
+    if sort_field:
+        position["t"] = doc.get(sort_field)
+    token = json_util.dumps(position).encode("utf-8")
+    return base64.urlsafe_b64encode(token).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token):
+    """Decode a cursor token; raises ValueError if it is not one of ours"""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        position = json_util.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (binascii.Error, UnicodeError, TypeError, ValueError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(position, dict) or "id" not in position:
+        raise ValueError("Invalid cursor")
+    return position
+
+
+def parse_page_args(args, legacy_default=True):
+    """
+    Read pagination arguments from a request's query string.
+    Returns None when the caller should get the old unpaginated response,
+    otherwise a dict with page_size, cursor and projection.
+    Raises ValueError for malformed arguments.
+    """
+    token = args.get("cursor")
+    page_size = args.get("page_size")
+    if legacy_default and token is None and page_size is None:
+        return None
+
+    page_size = int(page_size) if page_size is not None else DEFAULT_PAGE_SIZE
+    if page_size < 1:
+        raise ValueError("page_size must be positive")
+
+    projection = None
+    fields = args.get("fields")
+    if fields:
+        names = [name.strip() for name in fields.split(",") if name.strip()]
+        if not all(FIELD_NAME.match(name) for name in names):
+            raise ValueError("Invalid fields parameter")
+        projection = {name: 1 for name in names}
+
+    return {
+        "page_size": min(page_size, MAX_PAGE_SIZE),
+        "cursor": decode_cursor(token) if token else None,
+        "projection": projection
+    }
+
+
+def keyset_page(collection, query, page, sort_field="timestamp"):
+    """
+    Fetch one page ordered newest first on (sort_field, _id), resuming after
+    page["cursor"]. With sort_field=None the page is ordered by _id alone.
+    Returns (documents, next_cursor); next_cursor is None on the last page.
+    """
+    position = page["cursor"]
+    if position is not None:
+        if sort_field:
+            after = {"$or": [
+                {sort_field: {"$lt": position.get("t")}},
+                {sort_field: position.get("t"), "_id": {"$lt": position["id"]}}
+            ]}
+        else:
+            after = {"_id": {"$lt": position["id"]}}
+        query = {"$and": [query, after]}
+
+    projection = page["projection"]
+    if projection is not None and sort_field:
+        # The sort key is needed to build the next cursor
+        projection = dict(projection, **{sort_field: 1})
+
+    sort = [("_id", -1)]
+    if sort_field:
+        sort.insert(0, (sort_field, -1))
+
+    docs = list(collection.find(query, projection).sort(sort).limit(page["page_size"] + 1))
+
+    next_cursor = None
+    if len(docs) > page["page_size"]:
+        docs = docs[:page["page_size"]]
+        next_cursor = encode_cursor(docs[-1], sort_field)
+
+    if page["projection"] is not None and sort_field and sort_field not in page["projection"]:
+        for doc in docs:
+            doc.pop(sort_field, None)
+
+    return docs, next_cursor
@@ -0,0 +1,133 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from argon2 import PasswordHasher
+from argon2.exceptions import InvalidHashError, VerificationError
+from per_process import PerProcess
+
+
+class PasswordServiceBusy(Exception):
+    """Raised when the hashing queue stays full for longer than the queue timeout"""
+
+
+class PasswordHashingService:
+    """
+    Run Argon2 on a small bounded thread pool instead of the request thread.
+
+    argon2-cffi releases the GIL while hashing, so the pool's threads hash in
+    parallel while only `workers` hashes compete for the CPU at a time; a
+    burst of logins queues up (at most `max_pending` hashes per process)
+    instead of starving every other request on the worker. When the queue is
+    full for `queue_timeout` seconds, PasswordServiceBusy is raised so the
+    caller can answer 503.
+    """
+
+    def __init__(self, time_cost, memory_cost, parallelism, workers=2, max_pending=64,
+                 queue_timeout=10.0, logger=None):
+        self.hasher = PasswordHasher(time_cost=time_cost, memory_cost=memory_cost, parallelism=parallelism)
+        self.workers = workers
+        self.max_pending = max_pending
+        self.queue_timeout = queue_timeout
+        self.logger = logger
+
+        self._slots = threading.BoundedSemaphore(max_pending)
+        # Pool threads do not survive fork, so every worker process creates its own
+        self._executor = PerProcess(
+            lambda: ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password-hash")
+        )
+        self._lock = threading.Lock()
+        self._stats = {
+            "hashes": 0,
+            "verifies": 0,
+            "rehashes": 0,
+            "rejected": 0,
+            "pending": 0,
+            "max_wait_ms": 0.0,
+            "total_wait_ms": 0.0
+        }
+
+    def hash(self, password):
+        """Hash a password with the configured parameters"""
+        return self._run("hashes", self.hasher.hash, password)
+
+    def verify(self, password_hash, password):
+        """Return True if the password matches the stored hash"""
+        return self._run("verifies", self._verify, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        """True if the hash was made with parameters other than the configured ones"""
+        try:
+            return self.hasher.check_needs_rehash(password_hash)
+        except InvalidHashError:
+            return False
+
+    def rehash_later(self, password, store):
+        """
+        Hash the password with the current parameters in the background and
+        pass the new hash to `store`. Skipped when the queue is full; the next
+        login will try again.
+        """
+        if not self._slots.acquire(blocking=False):
+            return
+
+        def rehash():
+            try:
+                store(self.hasher.hash(password))
+                with self._lock:
+                    self._stats["rehashes"] += 1
+            except Exception as e:
+                if self.logger:
+                    self.logger.error(f"Failed to rehash password: {str(e)}")
+            finally:
+                self._slots.release()
+
+        self._pool().submit(rehash)
+
+    def stats(self):
+        """Queue depth, throughput counters and how long callers waited"""
+        with self._lock:
+            stats = dict(self._stats)
+        calls = stats["hashes"] + stats["verifies"]
+        stats["avg_wait_ms"] = round(stats.pop("total_wait_ms") / calls, 3) if calls else 0.0
+        stats["workers"] = self.workers
+        stats["max_pending"] = self.max_pending
+        stats["parameters"] = {
+            "time_cost": self.hasher.time_cost,
+            "memory_cost": self.hasher.memory_cost,
+            "parallelism": self.hasher.parallelism
+        }
+        return stats
+
+    def _verify(self, password_hash, password):
+        try:
+            return self.hasher.verify(password_hash, password)
+        except (VerificationError, InvalidHashError):
+            return False
+
+    def _run(self, counter, function, *args):
+        started = time.perf_counter()
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            with self._lock:
+                self._stats["rejected"] += 1
+            raise PasswordServiceBusy("Password hashing queue is full")
+
+        try:
+            with self._lock:
+                self._stats["pending"] += 1
+            future = self._pool().submit(self._timed, started, function, *args)
+            return future.result()
+        finally:
+            with self._lock:
+                self._stats["pending"] -= 1
+                self._stats[counter] += 1
+            self._slots.release()
+
+    def _timed(self, queued_at, function, *args):
+        waited_ms = (time.perf_counter() - queued_at) * 1000
+        with self._lock:
+            self._stats["total_wait_ms"] += waited_ms
+            self._stats["max_wait_ms"] = round(max(self._stats["max_wait_ms"], waited_ms), 3)
+        return function(*args)
+
+    def _pool(self):
+        return self._executor.get()
@@ -0,0 +1,61 @@
+import os
+import threading
+import weakref
+
+
+class PerProcess:
+    """
+    A resource created on first use, once per process.
+
+    Threads, pools, event loops and client sockets do not survive fork, so a
+    worker forked from a master that already used the resource (gunicorn
+    preload) creates its own with `factory()` instead of reusing the
+    parent's. `reset()`, when given, runs in the child before that to drop
+    state that belongs to the parent (e.g. events the parent had queued).
+    """
+
+    _instances = weakref.WeakSet()
+
+    def __init__(self, factory, reset=None):
+        self.factory = factory
+        self.reset = reset
+
+        self._value = None
+        self._pid = None
+        self._lock = threading.Lock()
+        PerProcess._instances.add(self)
+
+    def get(self):
+        """This process's resource, created if it does not exist yet"""
+        if self._pid == os.getpid():
+            return self._value
+
+        with self._lock:
+            if self._pid != os.getpid():
+                if self._pid is not None and self.reset:
+                    self.reset()
+                self._value = self.factory()
+                self._pid = os.getpid()
+            return self._value
+
+    def current(self):
+        """This process's resource, or None if it has not been created here"""
+        value = self._value
+        return value if self._pid == os.getpid() else None
+
+    def clear(self):
+        """Forget this process's resource and return it; the next get() creates a new one"""
+        with self._lock:
+            value = self.current()
+            self._value = None
+            self._pid = None
+        return value
+
+    @classmethod
+    def _after_fork(cls):
+        # A thread of the parent may have held the lock while forking; nothing in the child ever releases it
+        for instance in list(cls._instances):
+            instance._lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=PerProcess._after_fork)
@@ -0,0 +1,136 @@
+import concurrent.futures
+import threading
+import time
+from per_process import PerProcess
+
+
+class SubQuery:
+    """A named query for QueryExecutor.run(), with the value to use if it fails or times out"""
+
+    def __init__(self, name, function, fallback=None, timeout=None):
+        self.name = name
+        self.function = function
+        self.fallback = fallback
+        self.timeout = timeout
+
+
+class _Run:
+    """A submitted sub-query and when a pool thread picked it up"""
+
+    def __init__(self):
+        self.future = None
+        self.started = threading.Event()
+        self.started_at = None
+
+
+class QueryExecutor:
+    """
+    Run independent sub-queries of one request concurrently on a shared
+    thread pool.
+
+    Every sub-query gets its own timeout, counted from when a pool thread
+    starts running it, so time spent queued behind other requests' queries
+    does not count against it. One that fails or runs out of time is
+    replaced by its fallback, so a slow query only degrades its own part of
+    the response. A timed-out query keeps running on the pool until it
+    returns, but nobody waits for it. A query still queued after
+    `max_queue_wait` seconds is cancelled and falls back too, so a pool
+    clogged by stuck queries can't hang requests.
+    """
+
+    def __init__(self, workers=8, default_timeout=2.0, max_queue_wait=10.0, logger=None):
+        self.workers = workers
+        self.default_timeout = default_timeout
+        self.max_queue_wait = max_queue_wait
+        self.logger = logger
+
+        # Pool threads do not survive fork, so every worker process creates its own
+        self._executor = PerProcess(
+            lambda: concurrent.futures.ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="sub-query")
+        )
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def run(self, queries):
+        """
+        Run the queries and return (results, timings). results maps each
+        name to its value or fallback; timings maps each name to
+        {"ms": float, "status": "ok" | "timeout" | "error"}.
+        """
+        executor = self._pool()
+        submitted = time.perf_counter()
+        runs = {}
+        for query in queries:
+            run = _Run()
+            run.future = executor.submit(self._timed, query.function, run)
+            runs[query.name] = run
+
+        results = {}
+        timings = {}
+        for query in queries:
+            run = runs[query.name]
+            timeout = query.timeout if query.timeout is not None else self.default_timeout
+            try:
+                if not run.started.wait(max(0.0, submitted + self.max_queue_wait - time.perf_counter())):
+                    if run.future.cancel():
+                        raise concurrent.futures.TimeoutError()
+                    run.started.wait()
+                remaining = max(0.0, run.started_at + timeout - time.perf_counter())
+                results[query.name], elapsed_ms = run.future.result(remaining)
+                status = "ok"
+            except concurrent.futures.TimeoutError:
+                results[query.name] = query.fallback
+                elapsed_ms = (time.perf_counter() - (run.started_at or submitted)) * 1000
+                status = "timeout"
+            except Exception as e:
+                results[query.name] = query.fallback
+                elapsed_ms = (time.perf_counter() - (run.started_at or submitted)) * 1000
+                status = "error"
+                if self.logger:
+                    self.logger.error(f"Sub-query {query.name} failed: {str(e)}")
+
+            timings[query.name] = {"ms": round(elapsed_ms, 3), "status": status}
+            self._record(query.name, elapsed_ms, status)
+
+        return results, timings
+
+    def stats(self):
+        """Per sub-query call counts, failures and latency"""
+        with self._lock:
+            stats = {name: dict(entry) for name, entry in self._stats.items()}
+        for entry in stats.values():
+            calls = entry["calls"]
+            entry["avg_ms"] = round(entry.pop("total_ms") / calls, 3) if calls else 0.0
+            entry["max_ms"] = round(entry["max_ms"], 3)
+        return stats
+
+    def _timed(self, function, run):
+        run.started_at = time.perf_counter()
+        run.started.set()
+        value = function()
+        return value, (time.perf_counter() - run.started_at) * 1000
+
+    def _record(self, name, elapsed_ms, status):
+        with self._lock:
+            entry = self._stats.setdefault(
+                name, {"calls": 0, "timeouts": 0, "errors": 0, "total_ms": 0.0, "max_ms": 0.0}
+            )
+            entry["calls"] += 1
+            entry["timeouts"] += 1 if status == "timeout" else 0
+            entry["errors"] += 1 if status == "error" else 0
+            entry["total_ms"] += elapsed_ms
+            entry["max_ms"] = max(entry["max_ms"], elapsed_ms)
+
+    def _pool(self):
+        return self._executor.get()
+
+
+def server_timing(timings):
+    """Format sub-query timings as a Server-Timing header value"""
+    entries = []
+    for name, timing in timings.items():
+        entry = f"{name};dur={timing['ms']}"
+        if timing["status"] != "ok":
+            entry += f';desc="{timing["status"]}"'
+        entries.append(entry)
+    return ", ".join(entries)
@@ -0,0 +1,102 @@
+import hashlib
+import time
+from functools import wraps
+from flask import g, has_app_context, make_response, request, session
+from pymongo import UpdateOne
+
+
+# Per-user data versions, one document per user in user_versions:
+#   {"username": str, "moods": int, "journals": int, "activity": int}
+# Writers bump the area they changed; read endpoints derive their ETag from
+# the versions of the areas they read.
+
+
+def bump_version(versions_collection, username, *areas):
+    """Mark the given data areas of one user as changed"""
+    versions_collection.update_one(
+        {"username": username},
+        {"$inc": {area: 1 for area in areas}},
+        upsert=True
+    )
+
+
+def bump_versions(versions_collection, usernames, *areas):
+    """Mark the given data areas of several users as changed in one round trip"""
+    operations = [
+        UpdateOne({"username": username}, {"$inc": {area: 1 for area in areas}}, upsert=True)
+        for username in set(usernames)
+    ]
+    if operations:
+        versions_collection.bulk_write(operations, ordered=False)
+
+
+class ConditionalResponses:
+    """
+    ETag / If-None-Match support for per-user read endpoints.
+
+    The ETag of a response is derived from the user, the request path and
+    the versions of the data areas the endpoint reads, so checking it costs
+    one point read of the user's version document. When the client already
+    holds the current ETag the view is not run at all and a 304 is returned.
+    Endpoints whose output also depends on the clock (relative times,
+    streaks) pass `bucket_seconds` so their ETag changes at least that often.
+    """
+
+    def __init__(self, versions_collection, logger=None):
+        self.versions_collection = versions_collection
+        self.logger = logger
+
+    def versions(self, username, areas):
+        """Current versions of the given areas for a user"""
+        projection = {area: 1 for area in areas}
+        projection["_id"] = 0
+        doc = self.versions_collection.find_one({"username": username}, projection) or {}
+        return tuple(doc.get(area, 0) for area in areas)
+
+    def request_version(self, username, area):
+        """The version of `area` this request's ETag was built from, or None if it wasn't read"""
+        if not has_app_context():
+            return None
+        return g.get("data_versions", {}).get((username, area))
+
+    def etag(self, *areas, bucket_seconds=None):
+        """Decorate a view so it answers 304 when the user's data hasn't changed"""
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                if request.method != 'GET' or 'user' not in session:
+                    return view(*args, **kwargs)
+
+                try:
+                    tag = self._tag(session['user'], areas, bucket_seconds)
+                except Exception as e:
+                    # Without versions the endpoint still works, just uncached
+                    if self.logger:
+                        self.logger.error(f"Failed to read response versions: {str(e)}")
+                    return view(*args, **kwargs)
+
+                # Lets an inner response cache key entries on the data versions too
+                g.response_etag = tag
+                if request.if_none_match.contains(tag):
+                    response = make_response("", 304)
+                else:
+                    response = make_response(view(*args, **kwargs))
+                    # Degraded (no-store) responses must not be revalidated as current
+                    if response.status_code != 200 or response.cache_control.no_store:
+                        return response
+
+                response.set_etag(tag)
+                response.headers["Cache-Control"] = "private, no-cache"
+                return response
+            return wrapper
+        return decorator
+
+    def _tag(self, username, areas, bucket_seconds):
+        versions = self.versions(username, areas)
+        # Lets the view reuse them instead of reading user_versions again
+        g.data_versions = {(username, area): version for area, version in zip(areas, versions)}
+        parts = [username, request.full_path]
+        parts.extend(str(version) for version in versions)
+        if bucket_seconds:
+            parts.append(str(int(time.time() // bucket_seconds)))
+        return hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()
@@ -0,0 +1,92 @@
+from pymongo.errors import CollectionInvalid, OperationFailure
+from indexes import ensure_indexes
+
+
+# Every collection the app uses, with the validator it should carry (None for no validator).
+# Validators only cover fields the app itself always writes; "moderate" leaves
+# existing documents that predate a validator alone until they are updated.
+SCHEMAS = {
+    "users": {
+        "$jsonSchema": {
+            "bsonType": "object",
+            "required": ["username", "password"],
+            "properties": {
+                "username": {"bsonType": "string"},
+                "password": {"bsonType": "string"}
+            }
+        }
+    },
+    "journals": {
+        "$jsonSchema": {
+            "bsonType": "object",
+            "required": ["username"],
+            "properties": {"username": {"bsonType": "string"}}
+        }
+    },
+    "moods": {
+        "$jsonSchema": {
+            "bsonType": "object",
+            "required": ["username", "mood", "timestamp"],
+            "properties": {
+                "username": {"bsonType": "string"},
+                "timestamp": {"bsonType": "date"}
+            }
+        }
+    },
+    "user_activity": {
+        "$jsonSchema": {
+            "bsonType": "object",
+            "required": ["username", "activity_type", "timestamp"],
+            "properties": {
+                "username": {"bsonType": "string"},
+                "activity_type": {"bsonType": "string"},
+                "timestamp": {"bsonType": "date"}
+            }
+        }
+    },
+    "video_interactions": {
+        "$jsonSchema": {
+            "bsonType": "object",
+            "required": ["username", "video_id", "interaction_type", "timestamp"],
+            "properties": {
+                "username": {"bsonType": "string"},
+                "video_id": {"bsonType": "objectId"},
+                "interaction_type": {"bsonType": "string"},
+                "timestamp": {"bsonType": "date"}
+            }
+        }
+    },
+    "music": None,
+    "videos": None,
+    "user_streaks": None,
+    "mood_daily_rollups": None,
+    "user_video_signals": None,
+    "user_video_stats": None,
+    "user_versions": None,
+    "catalog_versions": None
+}
+
+
+def bootstrap_schema(db):
+    """
+    Create any missing collection, apply its validator and ensure its indexes.
+    Costs a single list_collection_names() call, so it is meant to run once at
+    startup rather than per request. Returns a list of error messages.
+    """
+    errors = []
+    existing = set(db.list_collection_names())
+
+    for name, validator in SCHEMAS.items():
+        options = {}
+        if validator:
+            options = {"validator": validator, "validationLevel": "moderate"}
+        try:
+            if name not in existing:
+                db.create_collection(name, **options)
+            elif options:
+                db.command("collMod", name, **options)
+        except (CollectionInvalid, OperationFailure) as e:
+            errors.append(f"{name}: {str(e)}")
+
+    errors.extend(ensure_indexes(db))
+    return errors
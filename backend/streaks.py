@@ -0,0 +1,191 @@
+import datetime
+from pymongo import UpdateOne
+
+
+# Each user gets one document in the streaks collection:
+#   {
+#       "username": str,
+#       "active_days": [int, ...],   # sorted day ordinals (date.toordinal())
+#       "current_streak": int,       # consecutive days ending at last_active_day
+#       "longest_streak": int,
+#       "last_active_day": int
+#   }
+
+
+def day_ordinal(timestamp):
+    """Convert a datetime into the day ordinal used by the streaks collection"""
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return timestamp.date().toordinal()
+
+
+def streak_update(day):
+    """
+    Build the update pipeline that folds one active day into a streak document.
+    The update is a single atomic round trip: a day already in active_days is
+    a no-op, the day after last_active_day extends the streak and anything
+    later starts a new streak of 1. A day that arrives late (before
+    last_active_day, e.g. from a replayed batch or another worker's flush) is
+    inserted in order and both streaks are recomputed from active_days.
+    """
+    last_day = {"$ifNull": ["$last_active_day", None]}
+    active_days = {"$ifNull": ["$active_days", []]}
+    is_new_day = {"$or": [
+        {"$eq": [last_day, None]},
+        {"$lt": [last_day, day]}
+    ]}
+    # Run over the (sorted, updated) active_days: the streak ending at the last day and the longest one
+    summary = {"$reduce": {
+        "input": "$active_days",
+        "initialValue": {"previous": None, "run": 0, "longest": 0},
+        "in": {"$let": {
+            "vars": {"run": {"$cond": [
+                {"$eq": ["$$value.previous", {"$subtract": ["$$this", 1]}]},
+                {"$add": ["$$value.run", 1]},
+                1
+            ]}},
+            "in": {"previous": "$$this", "run": "$$run", "longest": {"$max": ["$$value.longest", "$$run"]}}
+        }}
+    }}
+
+    return [
+        {"$set": {
+            "_late_day": {"$and": [
+                {"$lt": [day, last_day]},
+                {"$not": [{"$in": [day, active_days]}]}
+            ]},
+            "current_streak": {"$switch": {
+                "branches": [
+                    {"case": {"$not": [is_new_day]}, "then": "$current_streak"},
+                    {"case": {"$eq": [last_day, day - 1]},
+                     "then": {"$add": [{"$ifNull": ["$current_streak", 0]}, 1]}}
+                ],
+                "default": 1
+            }},
+            "active_days": {"$cond": [
+                {"$in": [day, active_days]},
+                "$active_days",
+                {"$concatArrays": [
+                    {"$filter": {"input": active_days, "cond": {"$lt": ["$$this", day]}}},
+                    [day],
+                    {"$filter": {"input": active_days, "cond": {"$gt": ["$$this", day]}}}
+                ]}
+            ]},
+            "last_active_day": {"$max": [last_day, day]}
+        }},
+        {"$set": {
+            "_late_summary": {"$cond": ["$_late_day", summary, None]}
+        }},
+        {"$set": {
+            "current_streak": {"$cond": ["$_late_day", "$_late_summary.run", "$current_streak"]},
+            "longest_streak": {"$cond": [
+                "$_late_day",
+                "$_late_summary.longest",
+                {"$max": [{"$ifNull": ["$longest_streak", 0]}, "$current_streak"]}
+            ]}
+        }},
+        {"$project": {"_late_day": 0, "_late_summary": 0}}
+    ]
+
+
+def record_active_days(streaks_collection, events):
+    """
+    Fold a batch of activity events into the streaks collection with one
+    bulk write. Events for the same user and day collapse into one update.
+    """
+    seen = set()
+    operations = []
+    for event in sorted(events, key=lambda event: event["timestamp"]):
+        key = (event["username"], day_ordinal(event["timestamp"]))
+        if key in seen:
+            continue
+        seen.add(key)
+        operations.append(UpdateOne(
+            {"username": key[0]},
+            streak_update(key[1]),
+            upsert=True
+        ))
+
+    if operations:
+        streaks_collection.bulk_write(operations, ordered=True)
+
+
+def current_streak(streak_doc, today=None):
+    """
+    Return the live streak for a streak document.
+    A streak only counts if the user was active today or yesterday.
+    """
+    if not streak_doc or streak_doc.get("last_active_day") is None:
+        return 0
+
+    if today is None:
+        today = datetime.datetime.now()
+    today_ordinal = day_ordinal(today)
+
+    if today_ordinal - streak_doc["last_active_day"] > 1:
+        return 0
+
+    return streak_doc.get("current_streak", 0)
+
+
+# Fields current_streak() needs
+STREAK_PROJECTION = {"current_streak": 1, "last_active_day": 1, "_id": 0}
+
+
+def get_streak(streaks_collection, username):
+    """Read the current streak for a user with a single document lookup"""
+    streak_doc = streaks_collection.find_one({"username": username}, STREAK_PROJECTION)
+    return current_streak(streak_doc)
+
+
+def summarize_days(days):
+    """Build a streak document body from a sorted list of distinct day ordinals"""
+    longest = 0
+    run = 0
+    previous = None
+    for day in days:
+        run = run + 1 if previous is not None and day - previous == 1 else 1
+        longest = max(longest, run)
+        previous = day
+
+    return {
+        "active_days": days,
+        "current_streak": run,
+        "longest_streak": longest,
+        "last_active_day": previous
+    }
+
+
+def rebuild_streaks(activity_collection, streaks_collection, username=None):
+    """
+    Rebuild streak documents from the raw user_activity history.
+    Returns the number of users rebuilt.
+    """
+    match = {"username": username} if username else {}
+    pipeline = [
+        {"$match": match},
+        {"$group": {
+            "_id": {
+                "username": "$username",
+                "day": {"$dateToString": {"format": "%Y-%m-%d", "date": "$timestamp"}}
+            }
+        }},
+        {"$group": {
+            "_id": "$_id.username",
+            "days": {"$push": "$_id.day"}
+        }}
+    ]
+
+    rebuilt = 0
+    for user in activity_collection.aggregate(pipeline, allowDiskUse=True):
+        days = sorted(
+            datetime.date.fromisoformat(day).toordinal() for day in user["days"]
+        )
+        streaks_collection.replace_one(
+            {"username": user["_id"]},
+            {"username": user["_id"], **summarize_days(days)},
+            upsert=True
+        )
+        rebuilt += 1
+
+    return rebuilt
@@ -0,0 +1,134 @@
+"""
+Evaluate MongoDB update pipelines in memory, for the aggregation
+expressions the backend's pipeline updates use. Values compare in BSON
+order for the cases that matter here: null sorts before every number.
+"""
+
+MISSING = object()
+
+
+def apply_update(document, pipeline):
+    """Return the document after an update pipeline of $set / exclusion $project stages"""
+    document = dict(document)
+    for stage in pipeline:
+        ((name, spec),) = stage.items()
+        if name in ("$set", "$addFields"):
+            values = {field: evaluate(expression, document, {}) for field, expression in spec.items()}
+            document.update(values)
+        elif name == "$project" and all(value == 0 for value in spec.values()):
+            document = {field: value for field, value in document.items() if field not in spec}
+        else:
+            raise NotImplementedError(name)
+    return document
+
+
+def evaluate(expression, document, variables):
+    if isinstance(expression, str) and expression.startswith("$$"):
+        name, *path = expression[2:].split(".")
+        return _lookup(variables[name], path)
+    if isinstance(expression, str) and expression.startswith("$"):
+        value = _lookup(document, expression[1:].split("."))
+        return None if value is MISSING else value
+    if isinstance(expression, list):
+        return [evaluate(item, document, variables) for item in expression]
+    if isinstance(expression, dict):
+        if len(expression) == 1 and next(iter(expression)).startswith("$"):
+            ((operator, argument),) = expression.items()
+            return OPERATORS[operator](argument, document, variables)
+        return {key: evaluate(value, document, variables) for key, value in expression.items()}
+    return expression
+
+
+def _lookup(value, path):
+    for part in path:
+        if not isinstance(value, dict) or part not in value:
+            return MISSING
+        value = value[part]
+    return value
+
+
+def _arguments(argument, document, variables):
+    if not isinstance(argument, list):
+        argument = [argument]
+    return [evaluate(item, document, variables) for item in argument]
+
+
+def _order(value):
+    # BSON comparison order: null before numbers
+    return (0, 0) if value is None else (1, value)
+
+
+def _filter(argument, document, variables):
+    name = argument.get("as", "this")
+    return [
+        item for item in evaluate(argument["input"], document, variables)
+        if evaluate(argument["cond"], document, {**variables, name: item})
+    ]
+
+
+def _reduce(argument, document, variables):
+    value = evaluate(argument["initialValue"], document, variables)
+    for item in evaluate(argument["input"], document, variables):
+        value = evaluate(argument["in"], document, {**variables, "value": value, "this": item})
+    return value
+
+
+def _let(argument, document, variables):
+    bound = {name: evaluate(value, document, variables) for name, value in argument["vars"].items()}
+    return evaluate(argument["in"], document, {**variables, **bound})
+
+
+def _switch(argument, document, variables):
+    for branch in argument["branches"]:
+        if evaluate(branch["case"], document, variables):
+            return evaluate(branch["then"], document, variables)
+    return evaluate(argument["default"], document, variables)
+
+
+def _cond(argument, document, variables):
+    condition, then, otherwise = argument
+    return evaluate(then if evaluate(condition, document, variables) else otherwise, document, variables)
+
+
+def _if_null(argument, document, variables):
+    for value in _arguments(argument, document, variables):
+        if value is not None:
+            return value
+    return None
+
+
+def _max(argument, document, variables):
+    values = [value for value in _arguments(argument, document, variables) if value is not None]
+    return max(values, key=_order) if values else None
+
+
+def _binary(function):
+    def operator(argument, document, variables):
+        left, right = _arguments(argument, document, variables)
+        return function(left, right)
+    return operator
+
+
+OPERATORS = {
+    "$eq": _binary(lambda left, right: left == right),
+    "$ne": _binary(lambda left, right: left != right),
+    "$lt": _binary(lambda left, right: _order(left) < _order(right)),
+    "$gt": _binary(lambda left, right: _order(left) > _order(right)),
+    "$gte": _binary(lambda left, right: _order(left) >= _order(right)),
+    "$add": lambda argument, document, variables: sum(_arguments(argument, document, variables)),
+    "$subtract": _binary(lambda left, right: left - right),
+    "$in": _binary(lambda value, array: value in array),
+    "$and": lambda argument, document, variables: all(_arguments(argument, document, variables)),
+    "$or": lambda argument, document, variables: any(_arguments(argument, document, variables)),
+    "$not": lambda argument, document, variables: not _arguments(argument, document, variables)[0],
+    "$max": _max,
+    "$ifNull": _if_null,
+    "$cond": _cond,
+    "$switch": _switch,
+    "$concatArrays": lambda argument, document, variables: [
+        item for array in _arguments(argument, document, variables) for item in array
+    ],
+    "$filter": _filter,
+    "$reduce": _reduce,
+    "$let": _let
+}
@@ -0,0 +1,96 @@
+import datetime
+import threading
+from bson import ObjectId
+from activity_writer import ActivityWriter
+
+
+def event(username="alice", index=0):
+    return {
+        "_id": ObjectId(),
+        "username": username,
+        "activity_type": "mood",
+        "timestamp": datetime.datetime(2025, 1, 1, 12, 0, index % 60)
+    }
+
+
+class RecordingFlush:
+    def __init__(self, fail_times=0, gate=None):
+        self.batches = []
+        self.fail_times = fail_times
+        self.gate = gate
+        self._lock = threading.Lock()
+
+    def __call__(self, batch):
+        if self.gate is not None:
+            self.gate.wait(5)
+        with self._lock:
+            if self.fail_times:
+                self.fail_times -= 1
+                raise ConnectionError("database unavailable")
+            self.batches.append(list(batch))
+
+    def events(self):
+        return [event for batch in self.batches for event in batch]
+
+
+def test_batches_are_capped_at_batch_size():
+    flush = RecordingFlush()
+    writer = ActivityWriter(flush, batch_size=3, max_age=0.05)
+    for index in range(7):
+        writer.put(event(index=index))
+    writer.drain()
+
+    assert len(flush.events()) == 7
+    assert all(len(batch) <= 3 for batch in flush.batches)
+    assert writer.stats()["written"] == 7
+
+
+def test_drain_writes_the_backlog_in_full_batches():
+    gate = threading.Event()
+    flush = RecordingFlush(gate=gate)
+    writer = ActivityWriter(flush, batch_size=100, max_age=60)
+    for index in range(250):
+        writer.put(event(index=index))
+
+    gate.set()
+    writer.drain()
+
+    assert len(flush.events()) == 250
+    assert len(flush.batches) <= 3
+
+
+def test_failed_batch_is_spilled_and_replayed_on_the_next_start(tmp_path):
+    spill_path = str(tmp_path / "spill.jsonl")
+    failing = ActivityWriter(RecordingFlush(fail_times=1), batch_size=10, max_age=0.01, spill_path=spill_path)
+    spilled = [event(index=index) for index in range(3)]
+    for item in spilled:
+        failing.put(item)
+    failing.drain()
+    assert failing.stats()["spilled"] == 3
+
+    flush = RecordingFlush()
+    writer = ActivityWriter(flush, batch_size=10, max_age=0.01, spill_path=spill_path)
+    writer.put(event(username="bob"))
+    writer.drain()
+
+    replayed = [item for item in flush.events() if item["username"] == "alice"]
+    # _id and timestamps survive the spill file, so a replay can be deduplicated
+    assert replayed == spilled
+
+
+def test_discard_removes_queued_events():
+    gate = threading.Event()
+    flush = RecordingFlush(gate=gate)
+    writer = ActivityWriter(flush, batch_size=1, max_age=0.01)
+    writer.put(event(username="carol"))  # holds the writer thread in flush
+    for index in range(3):
+        writer.put(event(username="alice", index=index))
+        writer.put(event(username="bob", index=index))
+
+    discarded = writer.discard(lambda item: item["username"] == "alice")
+    gate.set()
+    writer.drain()
+
+    assert discarded == 3
+    assert {item["username"] for item in flush.events()} == {"carol", "bob"}
+    assert len(flush.events()) == 4
@@ -0,0 +1,146 @@
+import pytest
+import cache as cache_module
+from cache import Cache, LRUCache, RedisCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache_module.time, "monotonic", clock)
+    return clock
+
+
+@pytest.fixture
+def fake_redis():
+    fakeredis = pytest.importorskip("fakeredis")
+    return fakeredis.FakeRedis()
+
+
+def test_lru_evicts_least_recently_used(clock):
+    backend = LRUCache(max_entries=2)
+    backend.set("a", 1)
+    backend.set("b", 2)
+    assert backend.get("a") == 1  # "b" is now the least recently used
+    backend.set("c", 3)
+
+    assert backend.get("b") is None
+    assert backend.get("a") == 1
+    assert backend.get("c") == 3
+    assert backend.stats()["evictions"] == 1
+
+
+def test_lru_entries_expire_after_ttl(clock):
+    backend = LRUCache(default_ttl=60)
+    backend.set("short", "value", ttl=5)
+    backend.set("default", "value")
+
+    clock.now += 5
+    assert backend.get("short") is None
+    assert backend.get("default") == "value"
+
+    clock.now += 55
+    assert backend.get("default") is None
+    assert backend.stats()["expirations"] == 2
+
+
+def test_lru_counter_restarts_above_old_values_after_expiring(clock):
+    backend = LRUCache()
+    first = backend.incr("counter", ttl=10)
+    assert backend.incr("counter", ttl=10) == first + 1
+
+    clock.now += 10
+    assert backend.incr("counter", ttl=10) > first + 1
+
+
+def test_invalidate_hides_entries_of_the_old_generation(clock):
+    cache = Cache(LRUCache())
+    generation = cache.generation("trend", "alice")
+    cache.set("trend", "key", "old", 60, generation, "alice")
+    assert cache.get("trend", "key", generation, "alice") == "old"
+
+    cache.invalidate("trend", "alice")
+    new_generation = cache.generation("trend", "alice")
+
+    assert new_generation != generation
+    assert cache.get("trend", "key", new_generation, "alice") is None
+
+
+def test_invalidate_is_scoped_to_the_user(clock):
+    cache = Cache(LRUCache())
+    bob_generation = cache.generation("trend", "bob")
+    cache.set("trend", "key", "bob's", 60, bob_generation, "bob")
+
+    cache.invalidate("trend", "alice")
+
+    assert cache.generation("trend", "bob") == bob_generation
+    assert cache.get("trend", "key", bob_generation, "bob") == "bob's"
+
+
+def test_value_computed_before_an_invalidate_is_never_served(clock):
+    cache = Cache(LRUCache())
+    generation = cache.generation("trend", "alice")
+    cache.invalidate("trend", "alice")  # a write lands while the value is computed
+    cache.set("trend", "key", "stale", 60, generation, "alice")
+
+    assert cache.get("trend", "key", cache.generation("trend", "alice"), "alice") is None
+
+
+def test_backend_failures_are_misses():
+    class BrokenBackend:
+        def get(self, key, record=True):
+            raise ConnectionError("down")
+
+        def set(self, key, value, ttl=None):
+            raise ConnectionError("down")
+
+        def incr(self, key, ttl=None):
+            raise ConnectionError("down")
+
+    cache = Cache(BrokenBackend())
+    assert cache.generation("trend") is None
+    assert cache.get("trend", "key", 0) is None
+    cache.set("trend", "key", "value", 60, 0)
+    cache.invalidate("trend")
+
+
+def test_redis_cache_round_trips_values(fake_redis):
+    backend = RedisCache(fake_redis)
+    backend.set("key", {"trend": "happy", "recentMoods": ["happy", "sad"]}, ttl=60)
+
+    assert backend.get("key") == {"trend": "happy", "recentMoods": ["happy", "sad"]}
+    assert fake_redis.ttl("appify:key") == 60
+    backend.delete("key")
+    assert backend.get("key") is None
+    assert backend.stats() == {"hits": 1, "misses": 1, "backend": "redis"}
+
+
+def test_redis_counter_keeps_counting_and_sets_ttl(fake_redis):
+    backend = RedisCache(fake_redis)
+    first = backend.incr("counter", ttl=30)
+
+    assert backend.incr("counter", ttl=30) == first + 1
+    assert 0 < fake_redis.ttl("appify:counter") <= 30
+
+
+def test_invalidate_through_redis_reaches_every_cache_instance(fake_redis):
+    # Two workers sharing one Redis server
+    worker_a = Cache(RedisCache(fake_redis))
+    worker_b = Cache(RedisCache(fake_redis))
+
+    generation = worker_a.generation("dashboard", "alice")
+    worker_a.set("dashboard", "/user/dashboard-stats?", {"body": "old"}, 60, generation, "alice")
+    assert worker_b.get("dashboard", "/user/dashboard-stats?", worker_b.generation("dashboard", "alice"), "alice")
+
+    worker_b.invalidate("dashboard", "alice")
+
+    assert worker_a.get(
+        "dashboard", "/user/dashboard-stats?", worker_a.generation("dashboard", "alice"), "alice"
+    ) is None
@@ -0,0 +1,30 @@
+import json
+from music_catalog import MusicCatalog
+
+
+class FakeCollection:
+    def __init__(self, documents):
+        self.documents = documents
+
+    def find(self, query):
+        return [document for document in self.documents if all(document.get(k) == v for k, v in query.items())]
+
+    def find_one(self, query):
+        found = self.find(query)
+        return found[0] if found else None
+
+
+def test_catalog_reloads_when_its_version_changes():
+    music = FakeCollection([{"genre": "calming", "title": "Rain"}])
+    versions = FakeCollection([])
+    catalog = MusicCatalog(music, versions, json.dumps, check_interval=0)
+    first = catalog.payload()
+
+    music.documents.append({"genre": "calming", "title": "Waves"})
+    assert catalog.payload() is first
+
+    versions.documents.append({"_id": "music", "version": 1})
+    reloaded = catalog.payload()
+    assert reloaded is not first
+    assert json.loads(reloaded.body)["music"][1]["title"] == "Waves"
+    assert catalog.stats()["version"] == 1
@@ -0,0 +1,128 @@
+import threading
+from pymongo.errors import BulkWriteError
+from counter_buffer import CounterBuffer
+
+
+class FakeCollection:
+    """Applies $inc updates to in-memory documents keyed by their filter value"""
+
+    def __init__(self, fail_times=0, failing_keys=()):
+        self.documents = {}
+        self.fail_times = fail_times
+        self.failing_keys = set(failing_keys)
+        self.bulk_writes = 0
+        self._lock = threading.Lock()
+
+    def bulk_write(self, operations, ordered=True):
+        with self._lock:
+            if self.fail_times:
+                self.fail_times -= 1
+                raise ConnectionError("database unavailable")
+            self.bulk_writes += 1
+            write_errors = []
+            for index, operation in enumerate(operations):
+                ((_, key),) = operation._filter.items()
+                if key in self.failing_keys:
+                    write_errors.append({"index": index, "code": 2, "errmsg": "update failed"})
+                    continue
+                if key not in self.documents and not operation._upsert:
+                    continue
+                document = self.documents.setdefault(key, {})
+                for field, amount in operation._doc["$inc"].items():
+                    document[field] = document.get(field, 0) + amount
+            if write_errors:
+                raise BulkWriteError({"writeErrors": write_errors, "writeConcernErrors": []})
+
+
+def make_buffer(videos=None, signals=None, live_keys=None):
+    return CounterBuffer(
+        {
+            "videos": (videos or FakeCollection(), "_id", False),
+            "user_video_signals": (signals or FakeCollection(), "username", True)
+        },
+        interval=60,
+        live_keys=live_keys
+    )
+
+
+def test_deltas_for_one_document_merge_into_one_update():
+    signals = FakeCollection()
+    buffer = make_buffer(signals=signals)
+    for _ in range(50):
+        buffer.add("user_video_signals", "alice", {"categories.calm": 1, "total": 2})
+    buffer.flush()
+
+    assert signals.documents == {"alice": {"categories.calm": 50, "total": 100}}
+    assert signals.bulk_writes == 1
+    assert buffer.stats()["pending_documents"] == 0
+
+
+def test_concurrent_adds_are_not_lost():
+    signals = FakeCollection()
+    buffer = make_buffer(signals=signals)
+
+    def add_many():
+        for _ in range(1000):
+            buffer.add("user_video_signals", "alice", {"total": 1})
+
+    threads = [threading.Thread(target=add_many) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    buffer.flush()
+
+    assert signals.documents["alice"]["total"] == 8000
+
+
+def test_failed_flush_keeps_the_deltas_for_the_next_one():
+    signals = FakeCollection(fail_times=1)
+    buffer = make_buffer(signals=signals)
+    buffer.add("user_video_signals", "alice", {"total": 1})
+    buffer.flush()
+    buffer.add("user_video_signals", "alice", {"total": 1})
+
+    assert buffer.stats()["failed_flushes"] == 1
+    buffer.flush()
+    assert signals.documents == {"alice": {"total": 2}}
+
+
+def test_partially_applied_flush_only_keeps_the_failed_deltas():
+    signals = FakeCollection(failing_keys={"bob"})
+    buffer = make_buffer(signals=signals)
+    buffer.add("user_video_signals", "alice", {"total": 1})
+    buffer.add("user_video_signals", "bob", {"total": 1})
+    buffer.flush()
+
+    assert signals.documents == {"alice": {"total": 1}}
+    assert buffer.stats()["pending_documents"] == 1
+
+    signals.failing_keys.clear()
+    buffer.flush()
+    assert signals.documents == {"alice": {"total": 1}, "bob": {"total": 1}}
+
+
+def test_discard_drops_a_users_pending_deltas():
+    videos = FakeCollection()
+    videos.documents["video-1"] = {}
+    signals = FakeCollection()
+    buffer = make_buffer(videos=videos, signals=signals)
+    buffer.add("user_video_signals", "alice", {"total": 1})
+    buffer.add("user_video_signals", "bob", {"total": 1})
+    buffer.add("videos", "video-1", {"views": 1})
+
+    buffer.discard("alice")
+    buffer.flush()
+
+    assert signals.documents == {"bob": {"total": 1}}
+    assert videos.documents == {"video-1": {"views": 1}}
+
+
+def test_deltas_for_deleted_users_are_not_upserted():
+    signals = FakeCollection()
+    buffer = make_buffer(signals=signals, live_keys=lambda name, keys: {key for key in keys if key != "deleted"})
+    buffer.add("user_video_signals", "alice", {"total": 1})
+    buffer.add("user_video_signals", "deleted", {"total": 1})
+    buffer.flush()
+
+    assert signals.documents == {"alice": {"total": 1}}
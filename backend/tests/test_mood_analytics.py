@@ -0,0 +1,32 @@
+import datetime
+
+from mood_analytics import build_analytics_response, calendar_from_rows
+
+
+def mood(day, hour, name="happy", intensity=5):
+    return {
+        "_id": f"{day}-{hour}",
+        "mood": name,
+        "intensity": intensity,
+        "timestamp": datetime.datetime(2024, 1, day, hour)
+    }
+
+
+def test_calendar_groups_consecutive_rows_by_day():
+    calendar = calendar_from_rows(iter([mood(1, 8), mood(1, 20), mood(3, 9)]))
+
+    assert [day["date"] for day in calendar] == ["2024-01-01", "2024-01-03"]
+    assert [entry["time"] for entry in calendar[0]["entries"]] == ["08:00:00", "20:00:00"]
+
+
+def test_response_lists_rows_in_timestamp_order():
+    facet = {
+        "summary": [{"total": 3, "averageIntensity": 5, "stdDev": 0, "firstHalfAvg": 5, "secondHalfAvg": 5}],
+        "distribution": [{"_id": "happy", "count": 3}]
+    }
+    rows = [mood(1, 8), mood(2, 8, "sad"), mood(2, 9)]
+
+    response = build_analytics_response(facet, iter(rows), ("moods", "calendar"))
+
+    assert [entry["id"] for entry in response["moods"]] == ["1-8", "2-8", "2-9"]
+    assert len(response["calendar"]) == 2
@@ -0,0 +1,126 @@
+import datetime
+import math
+import random
+import pytest
+from mood_rollups import (
+    half_average_split, half_averages, mood_key, partial_day, window_distribution, window_intensity
+)
+
+START = datetime.datetime(2024, 1, 1)
+
+
+def day(date, counts, intensities, first_seen=None):
+    """A day summary as window_days() returns it"""
+    return {
+        "date": date,
+        "count": sum(counts.values()),
+        "counts": {mood_key(mood): count for mood, count in counts.items()},
+        "first_seen": {mood_key(mood): seen for mood, seen in (first_seen or {}).items()},
+        "intensity_sum": sum(intensities),
+        "intensity_sq_sum": sum(intensity * intensity for intensity in intensities)
+    }
+
+
+def days_from_moods(moods):
+    """Day summaries of (timestamp, intensity) pairs, oldest day first"""
+    by_date = {}
+    for timestamp, intensity in moods:
+        by_date.setdefault(timestamp.strftime('%Y-%m-%d'), []).append(intensity)
+    return [day(date, {"happy": len(values)}, values) for date, values in sorted(by_date.items())]
+
+
+def split_entries(moods, split_query):
+    """What the split query reads from the raw moods"""
+    if split_query is None:
+        return []
+    query, _, limit = split_query
+    window = query["timestamp"]
+    matching = sorted(
+        (timestamp, intensity) for timestamp, intensity in moods
+        if window["$gte"] <= timestamp < window["$lt"]
+    )
+    return [{"intensity": intensity} for _, intensity in matching[:limit]]
+
+
+def test_partial_day_folds_buckets_and_escapes_mood_names():
+    buckets = [
+        {"_id": "happy", "count": 2, "intensity_sum": 9, "intensity_sq_sum": 41, "first_seen": START},
+        {"_id": "so.so", "count": 1, "intensity_sum": 3, "intensity_sq_sum": 9, "first_seen": START}
+    ]
+
+    partial = partial_day("2024-01-01", buckets)
+
+    assert partial["count"] == 3
+    assert partial["counts"] == {"happy": 2, "so%2Eso": 1}
+    assert partial["intensity_sum"] == 12
+    assert partial["intensity_sq_sum"] == 50
+
+
+def test_partial_day_without_moods_is_none():
+    assert partial_day("2024-01-01", []) is None
+
+
+def test_window_intensity_matches_the_population_statistics():
+    intensities = [2, 4, 4, 4, 5, 5, 7, 9]
+    days = [day("2024-01-01", {"happy": 3}, intensities[:3]), day("2024-01-02", {"happy": 5}, intensities[3:])]
+
+    total, mean, std_dev = window_intensity(days)
+
+    assert (total, mean) == (8, 5)
+    assert std_dev == pytest.approx(2.0)
+
+
+def test_window_intensity_of_an_empty_window():
+    assert window_intensity([]) == (0, 0, 0)
+
+
+def test_whole_days_need_no_split_query():
+    moods = [(START + datetime.timedelta(days=offset), intensity) for offset, intensity in enumerate([1, 3, 5, 7])]
+
+    plan, split_query = half_average_split("alice", START, days_from_moods(moods))
+
+    assert split_query is None
+    assert half_averages(plan, []) == (2, 6)
+
+
+def test_fewer_than_three_moods_have_no_halves():
+    plan, split_query = half_average_split("alice", START, days_from_moods([(START, 5), (START, 6)]))
+
+    assert (plan, split_query) == (None, None)
+    assert half_averages(plan, []) == (None, None)
+
+
+def test_half_averages_match_splitting_the_ordered_moods():
+    generator = random.Random(7)
+    for _ in range(200):
+        moods = sorted(
+            (START + datetime.timedelta(hours=generator.randrange(24 * 5), seconds=index), generator.randint(1, 10))
+            for index in range(generator.randint(3, 30))
+        )
+        intensities = [intensity for _, intensity in moods]
+        half_point = len(moods) // 2
+
+        plan, split_query = half_average_split("alice", START, days_from_moods(moods))
+        first_half, second_half = half_averages(plan, split_entries(moods, split_query))
+
+        assert math.isclose(first_half, sum(intensities[:half_point]) / half_point)
+        assert math.isclose(second_half, sum(intensities[half_point:]) / (len(moods) - half_point))
+
+
+def test_distribution_ties_keep_the_order_moods_first_appeared():
+    days = [
+        day("2024-01-01", {"sad": 1, "calm": 2}, [1, 1, 1],
+            {"sad": START.replace(hour=9), "calm": START.replace(hour=8)}),
+        day("2024-01-02", {"happy": 2, "sad": 1}, [1, 1, 1],
+            {"happy": START.replace(day=2, hour=7), "sad": START.replace(day=2, hour=6)})
+    ]
+
+    distribution = window_distribution(days)
+
+    assert [(entry["mood"], entry["count"]) for entry in distribution] == [("calm", 2), ("sad", 2), ("happy", 2)]
+
+
+def test_distribution_unescapes_mood_names():
+    days = [day("2024-01-01", {"so.so": 1, "$weird": 2}, [1, 1, 1], {"so.so": START, "$weird": START})]
+
+    assert [entry["mood"] for entry in window_distribution(days)] == ["$weird", "so.so"]
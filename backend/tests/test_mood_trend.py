@@ -0,0 +1,48 @@
+from cache import Cache, LRUCache
+from mood_trend import MoodTrendCalculator
+
+
+class FakeCursor(list):
+    def sort(self, *args):
+        return self
+
+
+class FakeMoods:
+    def __init__(self, moods):
+        self.moods = moods
+        self.reads = 0
+
+    def find(self, query, projection):
+        self.reads += 1
+        return FakeCursor({"mood": mood} for mood in self.moods)
+
+
+def make_calculator(moods, version_reads):
+    def mood_version(username):
+        version_reads.append(username)
+        return 1
+
+    return MoodTrendCalculator(moods, Cache(LRUCache(100)), ttl=60, mood_version=mood_version)
+
+
+def test_known_mood_version_skips_the_version_read():
+    moods = FakeMoods(["happy", "sad"])
+    version_reads = []
+    calculator = make_calculator(moods, version_reads)
+
+    first = calculator.get("alice", mood_version=1)
+    second = calculator.get("alice", mood_version=1)
+
+    assert first == second
+    assert moods.reads == 1
+    assert version_reads == []
+
+
+def test_new_mood_version_misses_the_cache():
+    moods = FakeMoods(["happy"])
+    calculator = make_calculator(moods, [])
+    calculator.get("alice", mood_version=1)
+
+    moods.moods = ["sad"]
+    assert calculator.get("alice", mood_version=2)["mostCommonMood"] == "sad"
+    assert calculator.get("alice")["mostCommonMood"] == "happy"
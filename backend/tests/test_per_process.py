@@ -0,0 +1,41 @@
+import os
+from per_process import PerProcess
+
+
+def test_resource_is_created_once_per_process():
+    created = []
+    resource = PerProcess(lambda: created.append(os.getpid()) or len(created))
+
+    assert resource.current() is None
+    assert resource.get() == 1
+    assert resource.get() == 1
+    assert created == [os.getpid()]
+
+
+def test_forked_child_creates_its_own_resource_after_reset():
+    resets = []
+    resource = PerProcess(lambda: os.getpid(), reset=lambda: resets.append(os.getpid()))
+    resource.get()
+
+    read_end, write_end = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        ok = resource.current() is None and resource.get() == os.getpid() and resets == [os.getpid()]
+        os.write(write_end, b"1" if ok else b"0")
+        os._exit(0)
+
+    os.close(write_end)
+    child_result = os.read(read_end, 1)
+    os.waitpid(pid, 0)
+    assert child_result == b"1"
+    assert resource.get() == os.getpid()
+    assert resets == []
+
+
+def test_clear_returns_the_resource_and_forgets_it():
+    resource = PerProcess(object)
+    first = resource.get()
+
+    assert resource.clear() is first
+    assert resource.current() is None
+    assert resource.get() is not first
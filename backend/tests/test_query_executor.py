@@ -0,0 +1,99 @@
+import threading
+import time
+from query_executor import QueryExecutor, SubQuery, server_timing
+
+
+def test_results_and_timings_by_name():
+    executor = QueryExecutor(workers=4, default_timeout=1.0)
+    results, timings = executor.run([
+        SubQuery("journals", lambda: 3),
+        SubQuery("streak", lambda: 5)
+    ])
+
+    assert results == {"journals": 3, "streak": 5}
+    assert {timing["status"] for timing in timings.values()} == {"ok"}
+
+
+def test_failing_query_falls_back_without_affecting_the_others():
+    def fail():
+        raise RuntimeError("boom")
+
+    executor = QueryExecutor(workers=2, default_timeout=1.0)
+    results, timings = executor.run([
+        SubQuery("journals", fail, fallback=0),
+        SubQuery("streak", lambda: 5)
+    ])
+
+    assert results == {"journals": 0, "streak": 5}
+    assert timings["journals"]["status"] == "error"
+    assert timings["streak"]["status"] == "ok"
+    assert executor.stats()["journals"]["errors"] == 1
+
+
+def test_slow_query_times_out_to_its_fallback():
+    release = threading.Event()
+    executor = QueryExecutor(workers=2, default_timeout=0.1)
+    results, timings = executor.run([
+        SubQuery("slow", lambda: release.wait(5), fallback="fallback"),
+        SubQuery("fast", lambda: "fast", timeout=1.0)
+    ])
+    release.set()
+
+    assert results == {"slow": "fallback", "fast": "fast"}
+    assert timings["slow"]["status"] == "timeout"
+
+
+def test_time_spent_queued_does_not_count_against_the_timeout():
+    # One pool thread: each query waits for the previous one, longer than its own timeout
+    executor = QueryExecutor(workers=1, default_timeout=0.3)
+    results, timings = executor.run([
+        SubQuery(name, lambda name=name: (time.sleep(0.2), name)[1])
+        for name in ("first", "second", "third")
+    ])
+
+    assert results == {"first": "first", "second": "second", "third": "third"}
+    assert {timing["status"] for timing in timings.values()} == {"ok"}
+
+
+def test_query_still_queued_after_max_queue_wait_falls_back():
+    release = threading.Event()
+    executor = QueryExecutor(workers=1, default_timeout=5.0, max_queue_wait=0.1)
+    blocker = threading.Thread(target=lambda: executor.run([SubQuery("stuck", lambda: release.wait(5))]))
+    blocker.start()
+    time.sleep(0.05)
+
+    results, timings = executor.run([SubQuery("queued", lambda: "ran", fallback="fallback")])
+    release.set()
+    blocker.join()
+
+    assert results == {"queued": "fallback"}
+    assert timings["queued"]["status"] == "timeout"
+
+
+def test_concurrent_requests_share_the_pool():
+    executor = QueryExecutor(workers=8, default_timeout=1.0)
+    outcomes = []
+
+    def request(index):
+        results, _ = executor.run([
+            SubQuery(f"q{part}", lambda part=part: (time.sleep(0.05), index * 10 + part)[1])
+            for part in range(4)
+        ])
+        outcomes.append(results == {f"q{part}": index * 10 + part for part in range(4)})
+
+    threads = [threading.Thread(target=request, args=(index,)) for index in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert outcomes == [True, True]
+
+
+def test_server_timing_header():
+    header = server_timing({
+        "journals": {"ms": 1.5, "status": "ok"},
+        "streak": {"ms": 2000.0, "status": "timeout"}
+    })
+
+    assert header == 'journals;dur=1.5, streak;dur=2000.0;desc="timeout"'
@@ -0,0 +1,64 @@
+import datetime
+import random
+import pytest
+from streaks import current_streak, streak_update, summarize_days
+from tests.pipeline import apply_update
+
+
+def fold(days):
+    """The streak document after folding the days in this order, as record_active_days would"""
+    document = {"username": "alice"}
+    for day in days:
+        document = apply_update(document, streak_update(day))
+    document.pop("username")
+    return document
+
+
+def test_consecutive_days_extend_the_streak():
+    assert fold([10, 11, 12]) == summarize_days([10, 11, 12])
+    assert fold([10, 11, 12])["current_streak"] == 3
+
+
+def test_a_gap_starts_a_new_streak_and_keeps_the_longest():
+    document = fold([10, 11, 12, 14])
+
+    assert document["current_streak"] == 1
+    assert document["longest_streak"] == 3
+
+
+def test_same_day_twice_is_a_no_op():
+    assert fold([10, 11, 11]) == fold([10, 11])
+
+
+def test_late_day_is_inserted_and_the_streaks_recomputed():
+    # Day 12 arrives after 13-15 were folded in, e.g. from a replayed spill file
+    document = fold([10, 11, 13, 14, 15, 12])
+
+    assert document["active_days"] == [10, 11, 12, 13, 14, 15]
+    assert document["current_streak"] == 6
+    assert document["longest_streak"] == 6
+    assert document["last_active_day"] == 15
+
+
+def test_late_day_outside_the_current_run_only_changes_the_history():
+    document = fold([20, 21, 5])
+
+    assert document["active_days"] == [5, 20, 21]
+    assert document["current_streak"] == 2
+    assert document["longest_streak"] == 2
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_any_arrival_order_matches_a_rebuild(seed):
+    generator = random.Random(seed)
+    days = [generator.randint(1, 30) for _ in range(generator.randint(1, 20))]
+
+    assert fold(days) == summarize_days(sorted(set(days)))
+
+
+def test_current_streak_lapses_after_a_missed_day():
+    today = datetime.datetime(2025, 3, 10, 9, 0)
+    document = fold([today.date().toordinal() - 2])
+
+    assert current_streak(document, today) == 0
+    assert current_streak(fold([today.date().toordinal() - 1]), today) == 1
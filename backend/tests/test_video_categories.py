@@ -0,0 +1,43 @@
+import datetime
+from video_ranking import rank_videos, signal_increments
+from video_stats import build_video_analytics, stats_increments
+
+
+def apply_increments(increments):
+    """The document $inc would build from dotted field paths"""
+    document = {}
+    for path, amount in increments.items():
+        *parents, field = path.split(".")
+        target = document
+        for parent in parents:
+            target = target.setdefault(parent, {})
+        target[field] = target.get(field, 0) + amount
+    return document
+
+
+def test_category_names_with_dots_stay_one_field():
+    increments = signal_increments("video-1", "view", ["lo.fi", "$calm"])
+    signals = apply_increments(increments)
+
+    assert signals["categories"] == {"lo%2Efi": 1, "%24calm": 1}
+
+
+def test_ranking_reads_affinity_for_escaped_categories():
+    signals = apply_increments(signal_increments("seen", "view", ["lo.fi"]))
+    candidates = [
+        {"_id": "a", "categories": ["rock"], "rating": 5},
+        {"_id": "b", "categories": ["lo.fi"], "rating": 5}
+    ]
+
+    ranked = rank_videos(candidates, "calm", [], signals, 2)
+
+    assert [video["_id"] for video in ranked] == ["b", "a"]
+
+
+def test_video_analytics_unescapes_category_names():
+    interaction = {"timestamp": datetime.datetime(2024, 1, 1), "interaction_type": "view"}
+    stats = apply_increments(stats_increments(interaction, ["lo.fi"]))
+
+    analytics = build_video_analytics(stats, now=datetime.datetime(2024, 1, 2))
+
+    assert analytics["mostWatchedCategories"] == [{"category": "lo.fi", "count": 1}]
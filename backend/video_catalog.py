@@ -0,0 +1,141 @@
+import threading
+import time
+
+
+def bump_catalog_version(versions_collection, name):
+    """Mark a catalog as changed so every app process reloads it"""
+    versions_collection.update_one({"_id": name}, {"$inc": {"version": 1}}, upsert=True)
+
+
+class _Snapshot:
+    """Immutable view of the active videos with pre-sorted lookup lists"""
+
+    def __init__(self, videos, version):
+        self.version = version
+        self.loaded_at = time.monotonic()
+        self.by_rating = sorted(videos, key=lambda video: video.get('rating', 0), reverse=True)
+        self.by_views = sorted(videos, key=lambda video: video.get('view_count', 0), reverse=True)
+        self.rank = {video['_id']: position for position, video in enumerate(self.by_rating)}
+        self.by_id = {video['_id']: video for video in self.by_rating}
+
+        # Inverted maps, each list already in rating order
+        self.by_category = {}
+        self.by_mood_tag = {}
+        for video in self.by_rating:
+            for category in video.get('categories', []):
+                self.by_category.setdefault(category, []).append(video)
+            for mood_tag in video.get('mood_tags', []):
+                self.by_mood_tag.setdefault(mood_tag, []).append(video)
+
+
+class VersionedCatalog:
+    """
+    Process-local snapshot of a catalog, reloaded when its version stamp changes.
+
+    Every `check_interval` seconds one request reads the catalog version
+    stamp (see bump_catalog_version) and reloads the snapshot if it changed;
+    after `max_age` seconds it is reloaded regardless. Subclasses build the
+    snapshot in `_load(version)` (it needs `version` and `loaded_at`
+    attributes) and describe it for stats() in `_describe(snapshot)`.
+    """
+
+    def __init__(self, versions_collection, name, check_interval=30, max_age=300, logger=None):
+        self.versions_collection = versions_collection
+        self.name = name
+        self.check_interval = check_interval
+        self.max_age = max_age
+        self.logger = logger
+
+        self._snapshot = None
+        self._checked_at = 0
+        self._refresh_lock = threading.Lock()
+
+    def refresh(self):
+        """Reload the catalog from MongoDB unconditionally"""
+        version = self._read_version()
+        self._snapshot = self._load(version)
+        self._checked_at = time.monotonic()
+
+    def stats(self):
+        """Describe the loaded snapshot"""
+        snapshot = self._snapshot
+        if snapshot is None:
+            return {"loaded": False}
+        return {
+            "loaded": True,
+            "version": snapshot.version,
+            **self._describe(snapshot),
+            "ageSeconds": round(time.monotonic() - snapshot.loaded_at, 1)
+        }
+
+    def _load(self, version):
+        raise NotImplementedError
+
+    def _describe(self, snapshot):
+        return {}
+
+    def _current(self):
+        snapshot = self._snapshot
+        if snapshot is None:
+            with self._refresh_lock:
+                if self._snapshot is None:
+                    self.refresh()
+            return self._snapshot
+
+        now = time.monotonic()
+        # Only one thread checks the version; the others keep serving the current snapshot
+        if now - self._checked_at >= self.check_interval and self._refresh_lock.acquire(blocking=False):
+            try:
+                self._checked_at = now
+                if now - snapshot.loaded_at >= self.max_age or self._read_version() != snapshot.version:
+                    self.refresh()
+            except Exception as e:
+                if self.logger:
+                    self.logger.error(f"Failed to refresh {self.name} catalog: {str(e)}")
+            finally:
+                self._refresh_lock.release()
+        return self._snapshot
+
+    def _read_version(self):
+        version_doc = self.versions_collection.find_one({"_id": self.name})
+        return version_doc.get("version", 0) if version_doc else 0
+
+
+class VideoCatalog(VersionedCatalog):
+    """
+    Process-local index of the active videos.
+
+    The catalog is small and rarely changes, so recommendation queries are
+    answered from memory. The videos are also reloaded after `max_age`
+    seconds so view counts used for popularity don't drift too far.
+    """
+
+    def __init__(self, videos_collection, versions_collection, name="videos",
+                 check_interval=30, max_age=300, logger=None):
+        super().__init__(versions_collection, name, check_interval, max_age, logger)
+        self.videos_collection = videos_collection
+
+    def recommend(self, mood, categories, limit=None):
+        """Top videos by rating that match any category or are tagged with the mood"""
+        snapshot = self._current()
+        candidates = {}
+        for category in categories:
+            for video in snapshot.by_category.get(category, []):
+                candidates[video['_id']] = video
+        for video in snapshot.by_mood_tag.get(mood, []):
+            candidates[video['_id']] = video
+        return sorted(candidates.values(), key=lambda video: snapshot.rank[video['_id']])[:limit]
+
+    def get(self, video_id):
+        """Return an active video by _id, or None"""
+        return self._current().by_id.get(video_id)
+
+    def popular(self, limit):
+        """Top videos by view count"""
+        return self._current().by_views[:limit]
+
+    def _load(self, version):
+        return _Snapshot(list(self.videos_collection.find({'active': True})), version)
+
+    def _describe(self, snapshot):
+        return {"videos": len(snapshot.by_rating)}
@@ -0,0 +1,119 @@
+import math
+from mood_rollups import mood_key, mood_name
+
+
+# Per-user interaction vector, one document per user in user_video_signals:
+#   {
+#       "username": str,
+#       "videos": {video_id: {"view": int, "complete": int, "like": int}},
+#       "categories": {category: int}   # affinity from views, completions and likes
+#   }
+# Category names are used as field names, so they are escaped with mood_key().
+
+SIGNAL_TYPES = ('view', 'complete', 'like')
+
+# Ranking weights
+CATEGORY_MATCH_WEIGHT = 2.0
+MOOD_TAG_WEIGHT = 1.5
+RATING_WEIGHT = 0.5
+POPULARITY_WEIGHT = 0.5
+AFFINITY_WEIGHT = 0.5
+LIKED_BONUS = 0.3
+SEEN_PENALTY = 1.0
+COMPLETED_PENALTY = 2.0
+
+
+def signal_increments(video_id, interaction_type, categories):
+    """Return the $inc deltas that fold one interaction into a user's vector"""
+    if interaction_type not in SIGNAL_TYPES:
+        return {}
+
+    increments = {f"videos.{video_id}.{interaction_type}": 1}
+    for category in categories:
+        increments[f"categories.{mood_key(category)}"] = 1
+    return increments
+
+
+def rebuild_signals(interactions_collection, videos_collection, signals_collection, username=None):
+    """
+    Rebuild interaction vectors from the video_interactions history.
+    Returns the number of users rebuilt.
+    """
+    match = {"interaction_type": {"$in": list(SIGNAL_TYPES)}}
+    if username:
+        match["username"] = username
+
+    video_categories = {
+        video['_id']: video.get('categories', [])
+        for video in videos_collection.find({}, {"categories": 1})
+    }
+
+    pipeline = [
+        {"$match": match},
+        {"$group": {
+            "_id": {"username": "$username", "video_id": "$video_id", "type": "$interaction_type"},
+            "count": {"$sum": 1}
+        }}
+    ]
+
+    vectors = {}
+    for bucket in interactions_collection.aggregate(pipeline, allowDiskUse=True):
+        group = bucket["_id"]
+        vector = vectors.setdefault(group["username"], {
+            "username": group["username"],
+            "videos": {},
+            "categories": {}
+        })
+        video_signals = vector["videos"].setdefault(str(group["video_id"]), {})
+        video_signals[group["type"]] = bucket["count"]
+        for category in video_categories.get(group["video_id"], []):
+            key = mood_key(category)
+            vector["categories"][key] = vector["categories"].get(key, 0) + bucket["count"]
+
+    for vector in vectors.values():
+        signals_collection.replace_one({"username": vector["username"]}, vector, upsert=True)
+
+    return len(vectors)
+
+
+def rank_videos(candidates, mood, mood_categories, signals, limit):
+    """
+    Order candidate videos for a user. Scores combine how well a video
+    matches the mood's categories and tags, its global rating and
+    popularity, the user's category affinity, and whether the user has
+    already seen, completed or liked it.
+    """
+    if not candidates:
+        return []
+
+    signals = signals or {}
+    seen_videos = signals.get("videos", {})
+    affinity = {mood_name(key): count for key, count in signals.get("categories", {}).items()}
+    max_affinity = max(affinity.values(), default=0)
+    max_views = max(video.get('view_count', 0) for video in candidates)
+    wanted = set(mood_categories)
+
+    def score(video):
+        categories = video.get('categories', [])
+        total = 0.0
+        if wanted:
+            total += CATEGORY_MATCH_WEIGHT * len(wanted.intersection(categories)) / len(wanted)
+        if mood in video.get('mood_tags', []):
+            total += MOOD_TAG_WEIGHT
+        total += RATING_WEIGHT * video.get('rating', 0) / 5
+        if max_views:
+            total += POPULARITY_WEIGHT * math.log1p(video.get('view_count', 0)) / math.log1p(max_views)
+        if max_affinity and categories:
+            total += AFFINITY_WEIGHT * max(affinity.get(category, 0) for category in categories) / max_affinity
+
+        history = seen_videos.get(str(video['_id']), {})
+        if history.get('like'):
+            total += LIKED_BONUS
+        if history.get('complete'):
+            total -= COMPLETED_PENALTY
+        elif history.get('view'):
+            total -= SEEN_PENALTY
+        return total
+
+    # sorted() is stable, so equal scores keep the catalog's rating order
+    return sorted(candidates, key=score, reverse=True)[:limit]
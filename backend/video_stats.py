@@ -0,0 +1,159 @@
+import datetime
+from mood_rollups import mood_key, mood_name
+
+
+# Per-user video analytics summary, one document per user in user_video_stats:
+#   {
+#       "username": str,
+#       "total_views": int,
+#       "total_completes": int,
+#       "days": {"YYYY-MM-DD": {"count": int, "watch_time": number}},
+#       "categories": {category: int}
+#   }
+# Category names are used as field names, so they are escaped with mood_key().
+
+WATCH_TIME_DAYS = 7
+TOP_CATEGORIES = 5
+
+
+def watched_seconds(value):
+    """Watched duration as it is summed; non-numeric values count as 0"""
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return 0
+    return value
+
+
+def stats_increments(interaction, categories):
+    """Return the $inc deltas that fold one interaction into the user's summary"""
+    day = interaction['timestamp'].strftime('%Y-%m-%d')
+    increments = {
+        f"days.{day}.count": 1,
+        f"days.{day}.watch_time": watched_seconds(interaction.get('watched_duration', 0))
+    }
+    if interaction['interaction_type'] == 'view':
+        increments["total_views"] = 1
+    elif interaction['interaction_type'] == 'complete':
+        increments["total_completes"] = 1
+    for category in categories:
+        increments[f"categories.{mood_key(category)}"] = 1
+    return increments
+
+
+def build_video_analytics(stats, now=None):
+    """Build the /api/user/video-analytics response from a summary document"""
+    stats = stats or {}
+    if now is None:
+        now = datetime.datetime.now()
+
+    total_watched = stats.get("total_views", 0)
+    completed = stats.get("total_completes", 0)
+
+    # Calculate completion rate
+    completion_rate = (completed / total_watched * 100) if total_watched > 0 else 0
+
+    # Watch time by day (last 7 days), oldest first
+    first_day = (now - datetime.timedelta(days=WATCH_TIME_DAYS)).strftime('%Y-%m-%d')
+    watch_time_by_day = []
+    for day, bucket in sorted(stats.get("days", {}).items()):
+        if day < first_day:
+            continue
+        date = datetime.datetime.strptime(day, '%Y-%m-%d')
+        watch_time_by_day.append({
+            "date": f"{date.year}-{date.month}-{date.day}",
+            "count": bucket.get("count", 0),
+            "watchTime": bucket.get("watch_time", 0)
+        })
+
+    # Most watched categories
+    categories = sorted(stats.get("categories", {}).items(), key=lambda item: item[1], reverse=True)
+    most_watched_categories = [
+        {"category": mood_name(key), "count": count}
+        for key, count in categories[:TOP_CATEGORIES]
+    ]
+
+    return {
+        "totalWatched": total_watched,
+        "completionRate": round(completion_rate, 1),
+        "watchTimeByDay": watch_time_by_day,
+        "mostWatchedCategories": most_watched_categories
+    }
+
+
+def prune_video_stats(stats_collection, retention_days, now=None):
+    """
+    Drop day buckets older than the retention window from every summary.
+    Each document is rewritten by one pipeline update, so $inc deltas the
+    counter buffer flushes at the same time are applied before or after it,
+    never lost. Returns the number of summaries changed.
+    """
+    if now is None:
+        now = datetime.datetime.now()
+    cutoff = (now - datetime.timedelta(days=retention_days)).strftime('%Y-%m-%d')
+    result = stats_collection.update_many(
+        {"days": {"$exists": True}},
+        [{"$set": {"days": {"$arrayToObject": {"$filter": {
+            "input": {"$objectToArray": "$days"},
+            "cond": {"$gte": ["$$this.k", cutoff]}
+        }}}}}]
+    )
+    return result.modified_count
+
+
+def rebuild_video_stats(interactions_collection, videos_collection, stats_collection,
+                        username=None, retention_days=None):
+    """
+    Rebuild per-user video summaries from the video_interactions history.
+    Returns the number of users rebuilt.
+    """
+    match = {"username": username} if username else {}
+    video_categories = {
+        video['_id']: video.get('categories', [])
+        for video in videos_collection.find({}, {"categories": 1})
+    }
+
+    pipeline = [
+        {"$match": match},
+        {"$group": {
+            "_id": {
+                "username": "$username",
+                "day": {"$dateToString": {"format": "%Y-%m-%d", "date": "$timestamp"}},
+                "type": "$interaction_type",
+                "video_id": "$video_id"
+            },
+            "count": {"$sum": 1},
+            "watch_time": {"$sum": "$watched_duration"}
+        }}
+    ]
+
+    cutoff = None
+    if retention_days is not None:
+        cutoff = (datetime.datetime.now() - datetime.timedelta(days=retention_days)).strftime('%Y-%m-%d')
+
+    summaries = {}
+    for bucket in interactions_collection.aggregate(pipeline, allowDiskUse=True):
+        group = bucket["_id"]
+        summary = summaries.setdefault(group["username"], {
+            "username": group["username"],
+            "total_views": 0,
+            "total_completes": 0,
+            "days": {},
+            "categories": {}
+        })
+        if group["type"] == 'view':
+            summary["total_views"] += bucket["count"]
+        elif group["type"] == 'complete':
+            summary["total_completes"] += bucket["count"]
+
+        if cutoff is None or group["day"] >= cutoff:
+            day = summary["days"].setdefault(group["day"], {"count": 0, "watch_time": 0})
+            day["count"] += bucket["count"]
+            day["watch_time"] += bucket["watch_time"]
+
+        for category in video_categories.get(group["video_id"], []):
+            key = mood_key(category)
+            summary["categories"][key] = summary["categories"].get(key, 0) + bucket["count"]
+
+    for summary in summaries.values():
+        stats_collection.replace_one({"username": summary["username"]}, summary, upsert=True)
+
+    return len(summaries)
@@ -0,0 +1,9 @@
+# Production entry point: gunicorn -c gunicorn.conf.py wsgi:app
+import os
+from app import create_app
+
+# Every worker must sign sessions with the same key, or logins only work on the worker that issued them
+if not os.getenv("SECRET_KEY"):
+    raise RuntimeError("SECRET_KEY is not set; add it to backend/.env before starting gunicorn")
+
+app = application = create_app()
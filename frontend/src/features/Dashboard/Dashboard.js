@@ -5,10 +5,7 @@ import {
   TrendingUp, Calendar, Award, Clock, Quote, Laugh,
   Home, LogOut, Menu, X, Play, User, BarChart2
 } from 'lucide-react';
-import UserService from '../../services/UserService';
 import DashboardService from '../../services/DashboardService';
-import VideoService from '../../services/VideoService';
-import MoodService from '../../services/MoodService';
 import YouTubeVideoPlayer from '../YouTubeVideoPlayer';
 import MoodAnalyticsSummary from './MoodAnalytics/MoodAnalyticsSummary';
 import Sidebar from '../SideBar/SideBar';
@@ -45,7 +42,6 @@ const Dashboard = () => {
     intensity: 3,
     timestamp: null
   });
-  const [moodData, setMoodData] = useState([]);
   const [recommendedVideos, setRecommendedVideos] = useState([]);
   const [isLoading, setIsLoading] = useState(true);
   const [currentVideo, setCurrentVideo] = useState(null);
@@ -54,51 +50,29 @@ const Dashboard = () => {
     const fetchDashboardData = async () => {
       try {
         setIsLoading(true);
-        // Fetch current user
-        const userService = new UserService();
-        const userData = await userService.getCurrentUser();
-        if (!userData) {
+        // User, stats, current mood and mood videos in one round trip
+        const dashboardService = new DashboardService();
+        const home = await dashboardService.getHome();
+        if (!home) {
           navigate('/login');
           return;
         }
-        setUser(userData);
-        
-        // Create service instances
-        const dashboardService = new DashboardService();
-        const moodService = new MoodService();
-        const videoService = new VideoService();
-        
-        try {
-          // Fetch dashboard stats (may fail if endpoint not available)
-          const statsResponse = await dashboardService.getDashboardStats();
-          setDashboardStats(statsResponse);
-        } catch (statsError) {
-          console.warn('Error fetching dashboard stats, using defaults:', statsError);
-          // Leave default stats
+        const { data } = home;
+        if (!data.currentUser) {
+          navigate('/login');
+          return;
         }
+        setUser(data.currentUser);
         
-        try {
-          // Fetch the user's current mood
-          const currentMoodResponse = await moodService.getCurrentMood();
-          setCurrentMood(currentMoodResponse);
-          
-          // Fetch mood data (using safer implementation that handles errors internally)
-          const moodsResponse = await moodService.getAllMoods();
-          setMoodData(moodsResponse);
-        } catch (moodError) {
-          console.warn('Error fetching mood data:', moodError);
-          // Leave empty mood data
+        // Resources that failed are missing from data; keep their defaults
+        if (data.dashboardStats) {
+          setDashboardStats(data.dashboardStats);
         }
-        
-        try {
-          const currentMoodResponse = await moodService.getCurrentMood();
-          setCurrentMood(currentMoodResponse);
-          // Fetch video recommendations based on the current mood
-          const videos = await videoService.getRecommendedVideos(currentMoodResponse.mood || 'neutral');
-          setRecommendedVideos(videos);
-        } catch (videoError) {
-          console.warn('Error fetching video recommendations:', videoError);
-          // Leave empty recommendations
+        if (data.currentMood) {
+          setCurrentMood(data.currentMood);
+        }
+        if (data.moodVideos) {
+          setRecommendedVideos(data.moodVideos.videos || []);
         }
       } catch (error) {
         console.error('Error fetching dashboard data:', error);
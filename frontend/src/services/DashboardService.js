@@ -37,6 +37,26 @@ class DashboardService {
     }
   }
 
+  /**
+   * Load several dashboard resources in one request
+   * @param {Array<string>} resources - Resource names, e.g. ['currentUser', 'dashboardStats'];
+   *   omit for the dashboard's page-load set
+   * @returns {Promise} Promise with { data, errors } keyed by resource name,
+   *   or null when the user is not logged in
+   */
+  async getHome(resources) {
+    try {
+      const response = await this.axiosInstance.post('/api/home', resources ? { resources } : {});
+      return response.data;
+    } catch (error) {
+      if (error.response && error.response.status === 403) {
+        return null;
+      }
+      console.error('Error fetching home data:', error);
+      return { data: {}, errors: {} };
+    }
+  }
+
   /**
    * Get user streak information
    * @returns {Promise} Promise with user streak data